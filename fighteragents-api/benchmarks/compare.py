@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import click
+
+from benchmarks.report import BenchmarkReport, TargetResult
+
+# Metrics compared, and whether a higher value is better.
+METRICS = {
+    "latency p50": (lambda result: result.latency_ms and result.latency_ms.p50, False),
+    "latency p95": (lambda result: result.latency_ms and result.latency_ms.p95, False),
+    "latency p99": (lambda result: result.latency_ms and result.latency_ms.p99, False),
+    "TTFT p50": (lambda result: result.ttft_ms and result.ttft_ms.p50, False),
+    "TTFT p95": (lambda result: result.ttft_ms and result.ttft_ms.p95, False),
+    "throughput": (lambda result: result.throughput_rps, True),
+    "CPU": (lambda result: result.cpu_utilization, False),
+    "RSS": (lambda result: result.rss_mb, False),
+}
+
+
+def load_report(path: Path) -> BenchmarkReport:
+    return BenchmarkReport.model_validate_json(path.read_text())
+
+
+def index_results(report: BenchmarkReport) -> dict[tuple[str, int], TargetResult]:
+    return {(result.target, result.concurrency): result for result in report.results}
+
+
+@click.command()
+@click.argument("baseline", type=click.Path(exists=True, path_type=Path))
+@click.argument("candidate", type=click.Path(exists=True, path_type=Path))
+@click.option(
+    "--threshold",
+    type=float,
+    default=None,
+    help="Relative change, e.g. 0.1 for 10%, over which a worse metric fails the "
+    "comparison.",
+)
+def main(baseline: Path, candidate: Path, threshold: float | None) -> None:
+    """Compares two benchmark reports, run by target and concurrency.
+
+    Prints the relative change of each metric from BASELINE to CANDIDATE. With
+    `--threshold`, exits with code 1 if a metric got worse by more than it, or if
+    the candidate has more errors.
+    """
+
+    baseline_report = load_report(baseline)
+    candidate_report = load_report(candidate)
+    click.echo(
+        f"Baseline: {baseline_report.commit or baseline} "
+        f"({baseline_report.created_at})\n"
+        f"Candidate: {candidate_report.commit or candidate} "
+        f"({candidate_report.created_at})"
+    )
+    if baseline_report.options != candidate_report.options:
+        click.echo("Warning: the reports were run with different options.")
+
+    baseline_results = index_results(baseline_report)
+    candidate_results = index_results(candidate_report)
+    regressions = []
+    for key, candidate_result in candidate_results.items():
+        baseline_result = baseline_results.get(key)
+        if baseline_result is None:
+            continue
+
+        target, concurrency = key
+        click.echo(f"\n{target} x{concurrency}")
+        if candidate_result.errors > baseline_result.errors:
+            regressions.append(f"{target} x{concurrency} errors")
+        click.echo(
+            f"  {'errors':<12} {baseline_result.errors:>10} "
+            f"{candidate_result.errors:>10}"
+        )
+
+        for name, (get_metric, higher_is_better) in METRICS.items():
+            before = get_metric(baseline_result)
+            after = get_metric(candidate_result)
+            if not before or after is None:
+                continue
+
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            flag = ""
+            if threshold is not None and worse > threshold:
+                regressions.append(f"{target} x{concurrency} {name}")
+                flag = "  REGRESSION"
+            click.echo(
+                f"  {name:<12} {before:>10.2f} {after:>10.2f} {change:>+8.1%}{flag}"
+            )
+
+    if regressions:
+        click.echo(f"\nRegressions: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
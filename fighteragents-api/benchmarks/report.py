@@ -0,0 +1,146 @@
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pydantic import BaseModel
+
+
+class LatencyStats(BaseModel):
+    """Distribution of a latency, in milliseconds."""
+
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+
+class TargetResult(BaseModel):
+    """Load run against one target at one concurrency.
+
+    CPU and memory are those of the benchmark process, which hosts the API as well
+    as the load generator.
+
+    Attributes:
+        target (str): Driven entrypoint: `chat`, `ws` or `get_response`.
+        concurrency (int): Sessions run at once.
+        requests (int): Conversation turns sent.
+        errors (int): Turns that failed or were rejected.
+        wall_seconds (float): Duration of the run.
+        throughput_rps (float): Successful turns per second.
+        latency_ms (LatencyStats | None): Time to the full answer of each turn.
+        ttft_ms (LatencyStats | None): Time to the first streamed chunk, for
+            streaming targets.
+        cpu_seconds (float): CPU time used by the process during the run.
+        cpu_utilization (float): CPU time over wall time, 1.0 being one core.
+        rss_mb (float): Resident memory at the end of the run.
+        rss_peak_mb (float): Peak resident memory of the process so far.
+    """
+
+    target: str
+    concurrency: int
+    requests: int
+    errors: int
+    wall_seconds: float
+    throughput_rps: float
+    latency_ms: LatencyStats | None
+    ttft_ms: LatencyStats | None
+    cpu_seconds: float
+    cpu_utilization: float
+    rss_mb: float
+    rss_peak_mb: float
+
+
+class BenchmarkReport(BaseModel):
+    """Results of a benchmark run, with what's needed to compare it to another one."""
+
+    created_at: str
+    commit: str | None
+    python: str
+    platform: str
+    options: dict
+    results: list[TargetResult]
+
+    @classmethod
+    def create(cls, options: dict, results: list[TargetResult]) -> "BenchmarkReport":
+        return cls(
+            created_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            commit=get_commit(),
+            python=platform.python_version(),
+            platform=platform.platform(),
+            options=options,
+            results=results,
+        )
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+
+    index = max(0, min(len(sorted_values) - 1, round(q * len(sorted_values)) - 1))
+
+    return sorted_values[index]
+
+
+def summarize(values_ms: list[float]) -> LatencyStats | None:
+    if not values_ms:
+        return None
+
+    values_ms = sorted(values_ms)
+
+    return LatencyStats(
+        mean=sum(values_ms) / len(values_ms),
+        p50=percentile(values_ms, 0.50),
+        p95=percentile(values_ms, 0.95),
+        p99=percentile(values_ms, 0.99),
+        max=values_ms[-1],
+    )
+
+
+class ResourceMeter:
+    """Measures the wall time, CPU time and memory of the process over a block."""
+
+    def __enter__(self) -> "ResourceMeter":
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.wall_seconds = time.perf_counter() - self.start_wall
+        self.cpu_seconds = time.process_time() - self.start_cpu
+        self.rss_mb = get_rss_mb()
+        self.rss_peak_mb = get_peak_rss_mb()
+
+
+def get_rss_mb() -> float:
+    """Returns the current resident memory, or the peak one where /proc is missing."""
+
+    statm = Path("/proc/self/statm")
+    if not statm.exists():
+        return get_peak_rss_mb()
+
+    pages = int(statm.read_text().split()[1])
+
+    return pages * resource.getpagesize() / 2**20
+
+
+def get_peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,309 @@
+import asyncio
+import socket
+from contextlib import AsyncExitStack, asynccontextmanager
+from functools import wraps
+from pathlib import Path
+from typing import AsyncIterator
+
+import click
+import httpx
+import uvicorn
+from langgraph.checkpoint.memory import MemorySaver
+from loguru import logger
+
+from benchmarks.report import (
+    BenchmarkReport,
+    ResourceMeter,
+    TargetResult,
+    summarize,
+)
+from benchmarks.stand_ins import StandInRetriever, StandInSpeed, use_stand_ins
+from benchmarks.targets import (
+    SessionRunner,
+    build_sessions,
+    chat_runner,
+    drive,
+    get_response_runner,
+    ws_runner,
+)
+from fighteragents.application.conversation_service.runtime import (
+    start_workflow_runtime,
+    stop_workflow_runtime,
+)
+from fighteragents.config import settings
+
+TARGETS = ("chat", "ws", "get_response")
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+@asynccontextmanager
+async def serve_api() -> AsyncIterator[str]:
+    """Serves the API on a free local port for the duration of the block.
+
+    Yields:
+        str: The host and port of the API.
+    """
+
+    from fighteragents.infrastructure.api import app
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(
+        uvicorn.Config(
+            app, host="127.0.0.1", port=port, log_level="warning", access_log=False
+        )
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.05)
+
+    try:
+        yield f"127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def run_target(
+    target: str,
+    run_session: SessionRunner,
+    concurrency: int,
+    nb_requests: int,
+    turns_per_session: int,
+    warmup_requests: int,
+) -> TargetResult:
+    if warmup_requests:
+        await drive(
+            build_sessions(f"warmup-{target}-{concurrency}", warmup_requests, 1),
+            concurrency,
+            run_session,
+        )
+
+    sessions = build_sessions(f"{target}-{concurrency}", nb_requests, turns_per_session)
+    with ResourceMeter() as meter:
+        timings = await drive(sessions, concurrency, run_session)
+
+    successes = [timing for timing in timings if timing.ok]
+    result = TargetResult(
+        target=target,
+        concurrency=concurrency,
+        requests=len(timings),
+        errors=len(timings) - len(successes),
+        wall_seconds=meter.wall_seconds,
+        throughput_rps=len(successes) / meter.wall_seconds,
+        latency_ms=summarize([timing.latency_ms for timing in successes]),
+        ttft_ms=summarize(
+            [timing.ttft_ms for timing in successes if timing.ttft_ms is not None]
+        ),
+        cpu_seconds=meter.cpu_seconds,
+        cpu_utilization=meter.cpu_seconds / meter.wall_seconds,
+        rss_mb=meter.rss_mb,
+        rss_peak_mb=meter.rss_peak_mb,
+    )
+
+    latency = result.latency_ms
+    ttft = result.ttft_ms
+    logger.info(
+        f"{target} x{concurrency}: {result.throughput_rps:.1f} turns/s | "
+        + (
+            f"p50={latency.p50:.0f} p95={latency.p95:.0f} p99={latency.p99:.0f} ms | "
+            if latency
+            else ""
+        )
+        + (f"TTFT p50={ttft.p50:.0f} ms | " if ttft else "")
+        + f"errors={result.errors} | CPU={result.cpu_utilization:.0%} | "
+        f"RSS={result.rss_mb:.0f} MB"
+    )
+
+    return result
+
+
+@click.command()
+@click.option(
+    "--targets",
+    default=",".join(TARGETS),
+    help="Comma-separated entrypoints to drive: chat, ws and get_response.",
+)
+@click.option(
+    "--concurrency",
+    default="1,8,32",
+    help="Comma-separated numbers of sessions run at once. Each is a run per target.",
+)
+@click.option("--requests", "nb_requests", type=int, default=200, help="Turns per run.")
+@click.option(
+    "--turns-per-session",
+    type=int,
+    default=4,
+    help="Turns of each conversation, so the checkpointed history grows.",
+)
+@click.option(
+    "--warmup-requests", type=int, default=8, help="Unmeasured turns before each run."
+)
+@click.option("--ttft-ms", type=float, default=200.0, help="Stand-in model TTFT.")
+@click.option(
+    "--tokens-per-second",
+    type=float,
+    default=400.0,
+    help="Stand-in model streaming speed. 0 streams every token at once.",
+)
+@click.option(
+    "--response-tokens", type=int, default=64, help="Tokens of each stand-in answer."
+)
+@click.option(
+    "--tool-call-rate",
+    type=float,
+    default=0.3,
+    help="Share of the user messages answered with a retrieval tool call.",
+)
+@click.option(
+    "--retriever-latency-ms",
+    type=float,
+    default=20.0,
+    help="Latency of the in-process retriever stand-in.",
+)
+@click.option(
+    "--checkpointer",
+    type=click.Choice(["memory", "mongo"]),
+    default="memory",
+    help="Keep the conversation state in memory, or in the MongoDB of MONGO_URI.",
+)
+@click.option(
+    "--rate-limit/--no-rate-limit",
+    default=False,
+    help="Apply the Groq rate limits of the settings to the stand-in model.",
+)
+@click.option(
+    "--tracing/--no-tracing",
+    default=False,
+    help="Trace the turns to Opik as configured in the settings.",
+)
+@click.option(
+    "--output",
+    type=click.Path(path_type=Path),
+    default=None,
+    help="Path of the JSON report. Printed to stdout if omitted.",
+)
+@async_command
+async def main(
+    targets: str,
+    concurrency: str,
+    nb_requests: int,
+    turns_per_session: int,
+    warmup_requests: int,
+    ttft_ms: float,
+    tokens_per_second: float,
+    response_tokens: int,
+    tool_call_rate: float,
+    retriever_latency_ms: float,
+    checkpointer: str,
+    rate_limit: bool,
+    tracing: bool,
+    output: Path | None,
+) -> None:
+    """Load-tests the API offline, against a stand-in Groq model and retriever.
+
+    Drives `POST /chat`, `/ws/chat` and `get_response` with conversations of
+    `--turns-per-session` turns, at each concurrency, and reports the latency
+    percentiles, time to first token, throughput, CPU and memory as JSON. The
+    stand-ins answer deterministically, so reports of two commits can be compared
+    with `python -m benchmarks.compare`.
+
+    The API is served in-process on a local port. Conversation state is kept in
+    memory, or in a local MongoDB with `--checkpointer mongo`. Neither Groq, OpenAI
+    nor MongoDB Atlas are called.
+    """
+
+    selected_targets = [target.strip() for target in targets.split(",")]
+    unknown_targets = set(selected_targets) - set(TARGETS)
+    if unknown_targets:
+        raise click.BadParameter(f"Unknown targets: {', '.join(unknown_targets)}")
+
+    # The benchmark measures the API, not Groq's quotas or Opik's export.
+    settings.LLM_RATE_LIMIT_ENABLED = rate_limit
+    if not tracing:
+        settings.OPIK_TRACE_SAMPLE_RATE = 0.0
+        settings.OPIK_TRACE_ERRORS = False
+
+    speed = StandInSpeed(
+        ttft_seconds=ttft_ms / 1000,
+        tokens_per_second=tokens_per_second,
+        response_tokens=response_tokens,
+        tool_call_rate=tool_call_rate,
+    )
+    retriever = StandInRetriever(
+        latency_seconds=retriever_latency_ms / 1000, k=settings.RAG_TOP_K
+    )
+
+    results = []
+    with use_stand_ins(speed, retriever):
+        async with AsyncExitStack() as stack:
+            await start_workflow_runtime(
+                checkpointer=MemorySaver() if checkpointer == "memory" else None
+            )
+            stack.push_async_callback(stop_workflow_runtime)
+
+            runners: dict[str, SessionRunner] = {}
+            if "get_response" in selected_targets:
+                runners["get_response"] = get_response_runner()
+            if {"chat", "ws"} & set(selected_targets):
+                address = await stack.enter_async_context(serve_api())
+                client = await stack.enter_async_context(
+                    httpx.AsyncClient(
+                        base_url=f"http://{address}",
+                        timeout=httpx.Timeout(120.0),
+                        limits=httpx.Limits(max_connections=None),
+                    )
+                )
+                runners["chat"] = chat_runner(client)
+                runners["ws"] = ws_runner(f"ws://{address}")
+
+            for target in selected_targets:
+                for nb_concurrent in [int(value) for value in concurrency.split(",")]:
+                    results.append(
+                        await run_target(
+                            target,
+                            runners[target],
+                            nb_concurrent,
+                            nb_requests,
+                            turns_per_session,
+                            warmup_requests,
+                        )
+                    )
+
+    report = BenchmarkReport.create(
+        options={
+            "requests": nb_requests,
+            "turns_per_session": turns_per_session,
+            "warmup_requests": warmup_requests,
+            "stand_in_speed": speed.model_dump(),
+            "retriever_latency_ms": retriever_latency_ms,
+            "checkpointer": checkpointer,
+            "rate_limit": rate_limit,
+            "tracing": tracing,
+        },
+        results=results,
+    )
+    report_json = report.model_dump_json(indent=2)
+    if output is None:
+        click.echo(report_json)
+    else:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(report_json)
+        logger.info(f"Benchmark report written to '{output}'.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import asyncio
+import json
+import time
+import zlib
+from contextlib import ExitStack, contextmanager
+from typing import Any, AsyncIterator, Iterator, Sequence
+from unittest import mock
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.documents import Document
+from langchain_core.language_models import BaseChatModel
+from langchain_core.language_models.chat_models import agenerate_from_stream
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import Runnable
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_mongodb.retrievers import MongoDBAtlasHybridSearchRetriever
+from pydantic import BaseModel, Field
+
+from fighteragents.application.conversation_service.workflow import chains
+from fighteragents.application.rag.cache import CollectionVersion
+from fighteragents.application.rag.retrievers import CHUNK_SUMMARY_KEY
+from fighteragents.config import settings
+
+# Words the stand-in model answers with.
+_VOCABULARY = (
+    "fight round cage champion strike takedown guard jab hook clinch camp belt "
+    "knockout submission decision pressure footwork cardio coach crowd respect "
+    "discipline focus weight class rival legacy"
+).split()
+
+
+def _seed(text: str) -> int:
+    return zlib.crc32(text.encode())
+
+
+def _rate_hit(seed: int, rate: float) -> bool:
+    """Deterministic coin flip: the same seed always gives the same answer."""
+
+    return (seed % 10_000) / 10_000 < rate
+
+
+class StandInSpeed(BaseModel):
+    """How fast the stand-in model answers.
+
+    Attributes:
+        ttft_seconds (float): Time before the first token.
+        tokens_per_second (float): Streaming speed after the first token. 0 streams
+            every token at once.
+        response_tokens (int): Tokens of each answer.
+        tool_call_rate (float): Share of the user messages answered with a call to
+            the retrieval tool, when the model is bound to it.
+    """
+
+    ttft_seconds: float = 0.2
+    tokens_per_second: float = 400.0
+    response_tokens: int = 64
+    tool_call_rate: float = 0.3
+
+
+class FakeChatGroq(BaseChatModel):
+    """Stand-in for `ChatGroq`, answering deterministically at a configured speed.
+
+    Answers depend only on the prompt, so two runs of a benchmark send the same
+    conversations through the workflow. A user message is answered with a call to
+    the first bound tool at `tool_call_rate`, like a model deciding to retrieve
+    context. Usage metadata is reported as Groq does, with prompt tokens estimated
+    from the prompt length.
+    """
+
+    model_name: str = Field(default="llama-3.3-70b-versatile", alias="model")
+    temperature: float = 0.7
+    streaming: bool = False
+    speed: StandInSpeed = Field(default_factory=StandInSpeed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-groq-chat"
+
+    def _get_ls_params(self, stop: list[str] | None = None, **kwargs: Any) -> dict:
+        params = super()._get_ls_params(stop=stop, **kwargs)
+        params["ls_provider"] = "groq"
+        params["ls_model_name"] = self.model_name
+
+        return params
+
+    def bind_tools(
+        self, tools: Sequence[dict[str, Any] | type | BaseTool], **kwargs: Any
+    ) -> Runnable:
+        return self.bind(
+            tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message, nb_tokens = self.__answer(messages, kwargs.get("tools"))
+        time.sleep(self.__duration(nb_tokens))
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.streaming:
+            return await agenerate_from_stream(
+                self._astream(messages, stop, run_manager, **kwargs)
+            )
+
+        message, nb_tokens = self.__answer(messages, kwargs.get("tools"))
+        await asyncio.sleep(self.__duration(nb_tokens))
+
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message, _ = self.__answer(messages, kwargs.get("tools"))
+        await asyncio.sleep(self.speed.ttft_seconds)
+
+        if message.tool_calls:
+            tool_call = message.tool_calls[0]
+            chunks = [
+                AIMessageChunk(
+                    content="",
+                    tool_call_chunks=[
+                        {
+                            "name": tool_call["name"],
+                            "args": json.dumps(tool_call["args"]),
+                            "id": tool_call["id"],
+                            "index": 0,
+                        }
+                    ],
+                )
+            ]
+        else:
+            words = message.content.split(" ")
+            chunks = [
+                AIMessageChunk(content=word if i == 0 else f" {word}")
+                for i, word in enumerate(words)
+            ]
+        chunks[-1].usage_metadata = message.usage_metadata
+        chunks[-1].response_metadata = message.response_metadata
+
+        for i, chunk in enumerate(chunks):
+            if i > 0 and self.speed.tokens_per_second > 0:
+                await asyncio.sleep(1 / self.speed.tokens_per_second)
+
+            generation = ChatGenerationChunk(message=chunk)
+            if run_manager is not None:
+                await run_manager.on_llm_new_token(chunk.content, chunk=generation)
+            yield generation
+
+    def __answer(
+        self, messages: list[BaseMessage], tools: list[dict] | None
+    ) -> tuple[AIMessage, int]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        seed = _seed(prompt)
+        input_tokens = len(prompt) // 4 + 1
+        response_metadata = {"model_name": self.model_name}
+
+        last_message = messages[-1] if messages else None
+        if (
+            tools
+            and isinstance(last_message, HumanMessage)
+            and _rate_hit(seed, self.speed.tool_call_rate)
+        ):
+            query = str(last_message.content)
+            message = AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": tools[0]["function"]["name"],
+                        "args": {"query": query},
+                        "id": f"call_{seed:08x}",
+                    }
+                ],
+                usage_metadata={
+                    "input_tokens": input_tokens,
+                    "output_tokens": 16,
+                    "total_tokens": input_tokens + 16,
+                },
+                response_metadata={**response_metadata, "finish_reason": "tool_calls"},
+            )
+
+            return message, 1
+
+        nb_tokens = self.speed.response_tokens
+        words = [
+            _VOCABULARY[(seed + i * 7) % len(_VOCABULARY)] for i in range(nb_tokens)
+        ]
+        message = AIMessage(
+            content=" ".join(words),
+            usage_metadata={
+                "input_tokens": input_tokens,
+                "output_tokens": nb_tokens,
+                "total_tokens": input_tokens + nb_tokens,
+            },
+            response_metadata={**response_metadata, "finish_reason": "stop"},
+        )
+
+        return message, nb_tokens
+
+    def __duration(self, nb_tokens: int) -> float:
+        if self.speed.tokens_per_second <= 0:
+            return self.speed.ttft_seconds
+
+        return self.speed.ttft_seconds + (nb_tokens - 1) / self.speed.tokens_per_second
+
+
+class StandInRetriever:
+    """In-process stand-in for the MongoDB Atlas hybrid search, returning `k`
+    deterministic chunks per query after `latency_seconds`.
+
+    Args:
+        latency_seconds (float): Time taken by each search.
+        k (int): Chunks returned per query.
+        chunk_chars (int): Size of each chunk.
+    """
+
+    def __init__(
+        self, latency_seconds: float = 0.02, k: int = 3, chunk_chars: int = 800
+    ) -> None:
+        self.latency_seconds = latency_seconds
+        self.k = k
+        self.chunk_chars = chunk_chars
+
+    def search(self, query: str) -> list[Document]:
+        seed = _seed(query)
+        documents = []
+        for i in range(self.k):
+            words = []
+            while sum(len(word) + 1 for word in words) < self.chunk_chars:
+                words.append(
+                    _VOCABULARY[(seed + i * 13 + len(words) * 7) % len(_VOCABULARY)]
+                )
+            chunk = " ".join(words)
+            documents.append(
+                Document(
+                    page_content=chunk,
+                    metadata={
+                        "source": f"stand-in-{seed % 100}-{i}",
+                        CHUNK_SUMMARY_KEY: chunk[: self.chunk_chars // 4],
+                    },
+                )
+            )
+
+        return documents
+
+
+@contextmanager
+def use_stand_ins(speed: StandInSpeed, retriever: StandInRetriever) -> Iterator[None]:
+    """Answers with `FakeChatGroq` and searches with `StandInRetriever` inside the
+    block, instead of calling Groq and MongoDB Atlas.
+
+    Must be entered before the first chain is built, as chains are cached.
+    """
+
+    def get_chat_model(
+        temperature: float = 0.7,
+        model_name: str = settings.GROQ_LLM_MODEL,
+        http_async_client: Any = None,
+        streaming: bool = False,
+    ) -> FakeChatGroq:
+        return FakeChatGroq(
+            model=model_name, temperature=temperature, streaming=streaming, speed=speed
+        )
+
+    def get_relevant_documents(self, query: str, **kwargs: Any) -> list[Document]:
+        time.sleep(retriever.latency_seconds)
+
+        return retriever.search(query)
+
+    async def aget_relevant_documents(
+        self, query: str, **kwargs: Any
+    ) -> list[Document]:
+        await asyncio.sleep(retriever.latency_seconds)
+
+        return retriever.search(query)
+
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(chains, "get_chat_model", get_chat_model))
+        stack.enter_context(
+            mock.patch.object(
+                MongoDBAtlasHybridSearchRetriever,
+                "_get_relevant_documents",
+                get_relevant_documents,
+            )
+        )
+        stack.enter_context(
+            mock.patch.object(
+                MongoDBAtlasHybridSearchRetriever,
+                "_aget_relevant_documents",
+                aget_relevant_documents,
+            )
+        )
+        # The stand-in collection is never re-ingested.
+        stack.enter_context(
+            mock.patch.object(CollectionVersion, "get", lambda self: None)
+        )
+
+        yield
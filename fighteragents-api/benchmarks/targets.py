@@ -0,0 +1,179 @@
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable, NamedTuple
+
+import httpx
+from websockets.asyncio.client import connect
+from websockets.exceptions import WebSocketException
+
+from fighteragents.application.conversation_service.generate_response import (
+    get_response,
+)
+from fighteragents.domain.ufcfighter_factory import (
+    AVAILABLE_FIGHTERS,
+    UFCFighterFactory,
+)
+
+# User messages of the benchmark conversations: small talk, and questions making
+# the model call the retrieval tool at its configured rate.
+QUERIES = [
+    "Hi champ!",
+    "How did you prepare for your first title fight?",
+    "What was the turning point of your career?",
+    "Thanks, that's inspiring.",
+    "Who was the toughest opponent you ever faced and why?",
+    "What advice would you give a young fighter starting out?",
+    "Haha, nice one.",
+    "How do you keep your cardio up for five rounds?",
+]
+
+
+class Turn(NamedTuple):
+    session_id: str
+    ufcfighter_id: str
+    message: str
+
+
+class TurnTiming(NamedTuple):
+    latency_ms: float
+    ttft_ms: float | None
+    ok: bool
+
+
+SessionRunner = Callable[[list[Turn]], Awaitable[list[TurnTiming]]]
+
+
+def build_sessions(
+    prefix: str, nb_requests: int, turns_per_session: int
+) -> list[list[Turn]]:
+    """Splits `nb_requests` turns into conversations of `turns_per_session` turns,
+    each with its own session, over the available fighters."""
+
+    sessions = []
+    for index in range(0, nb_requests, turns_per_session):
+        session_number = index // turns_per_session
+        session_id = f"{prefix}-{session_number}"
+        ufcfighter_id = AVAILABLE_FIGHTERS[session_number % len(AVAILABLE_FIGHTERS)]
+        sessions.append(
+            [
+                Turn(session_id, ufcfighter_id, QUERIES[i % len(QUERIES)])
+                for i in range(index, min(index + turns_per_session, nb_requests))
+            ]
+        )
+
+    return sessions
+
+
+async def drive(
+    sessions: list[list[Turn]], concurrency: int, run_session: SessionRunner
+) -> list[TurnTiming]:
+    """Runs the sessions, `concurrency` at a time. The turns of a session are sent
+    one after the other, as a user would."""
+
+    pending = iter(sessions)
+    timings: list[TurnTiming] = []
+
+    async def worker() -> None:
+        for session in pending:
+            timings.extend(await run_session(session))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    return timings
+
+
+def get_response_runner() -> SessionRunner:
+    """Sends the turns straight to the workflow, without the API."""
+
+    async def run_session(session: list[Turn]) -> list[TurnTiming]:
+        timings = []
+        for turn in session:
+            ufcfighter = UFCFighterFactory.get_ufcfighter(turn.ufcfighter_id)
+            start_time = time.perf_counter()
+            try:
+                await get_response(
+                    messages=turn.message,
+                    ufcfighter_id=turn.ufcfighter_id,
+                    ufcfighter_name=ufcfighter.name,
+                    ufcfighter_perspective=ufcfighter.perspective,
+                    ufcfighter_style=ufcfighter.style,
+                    ufcfighter_context="",
+                    session_id=turn.session_id,
+                )
+                ok = True
+            except Exception:
+                ok = False
+            timings.append(
+                TurnTiming((time.perf_counter() - start_time) * 1000, None, ok)
+            )
+
+        return timings
+
+    return run_session
+
+
+def chat_runner(client: httpx.AsyncClient) -> SessionRunner:
+    """Sends the turns to `POST /chat`."""
+
+    async def run_session(session: list[Turn]) -> list[TurnTiming]:
+        timings = []
+        for turn in session:
+            start_time = time.perf_counter()
+            try:
+                response = await client.post(
+                    "/chat",
+                    json={
+                        "message": turn.message,
+                        "ufcfighter_id": turn.ufcfighter_id,
+                        "session_id": turn.session_id,
+                    },
+                )
+                ok = response.status_code == 200
+            except httpx.HTTPError:
+                ok = False
+            timings.append(
+                TurnTiming((time.perf_counter() - start_time) * 1000, None, ok)
+            )
+
+        return timings
+
+    return run_session
+
+
+def ws_runner(base_url: str) -> SessionRunner:
+    """Sends the turns of each session over its own `/ws/chat` connection. The time
+    to first token is the time to the first chunk frame."""
+
+    async def run_session(session: list[Turn]) -> list[TurnTiming]:
+        timings = []
+        url = f"{base_url}/ws/chat?session_id={session[0].session_id}"
+        try:
+            async with connect(url, max_size=None) as websocket:
+                for turn in session:
+                    timings.append(await __send_turn(websocket, turn))
+        except (OSError, WebSocketException):
+            # Turns not sent because the connection failed count as errors.
+            timings.extend(
+                TurnTiming(0.0, None, False) for _ in session[len(timings) :]
+            )
+
+        return timings
+
+    return run_session
+
+
+async def __send_turn(websocket, turn: Turn) -> TurnTiming:
+    start_time = time.perf_counter()
+    ttft_ms = None
+    await websocket.send(
+        json.dumps({"message": turn.message, "ufcfighter_id": turn.ufcfighter_id})
+    )
+    while True:
+        frame = json.loads(await websocket.recv())
+        if "chunk" in frame and ttft_ms is None:
+            ttft_ms = (time.perf_counter() - start_time) * 1000
+        elif "error" in frame:
+            return TurnTiming((time.perf_counter() - start_time) * 1000, ttft_ms, False)
+        elif frame.get("streaming") is False:
+            return TurnTiming((time.perf_counter() - start_time) * 1000, ttft_ms, True)
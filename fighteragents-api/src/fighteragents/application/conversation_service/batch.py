@@ -0,0 +1,210 @@
+import asyncio
+import time
+import uuid
+from typing import AsyncIterator, Literal
+
+from pydantic import BaseModel, Field
+
+from fighteragents.application.conversation_service.generate_response import (
+    get_response,
+)
+from fighteragents.application.conversation_service.rate_limiter import (
+    Priority,
+    llm_priority,
+)
+from fighteragents.application.conversation_service.runtime import (
+    use_shared_workflow_runtime,
+)
+from fighteragents.config import settings
+from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
+
+
+class BatchItem(BaseModel):
+    """A message of a batch, sent to one fighter.
+
+    Attributes:
+        ufcfighter_id (str): The fighter answering the message.
+        message (str): The message.
+        session_id (str | None): Session of the conversation. Items without one get a
+            new session, so they don't wait for each other on the fighter's thread.
+    """
+
+    ufcfighter_id: str
+    message: str
+    session_id: str | None = Field(default=None, min_length=1, max_length=128)
+
+
+class BatchItemResult(BaseModel):
+    """The answer to a batch item, or why there is none.
+
+    Attributes:
+        index (int): Position of the item in the batch.
+        ufcfighter_id (str): The fighter answering the message.
+        session_id (str): Session of the conversation.
+        status (str): `ok`, `error` or `timeout`.
+        response (str | None): The answer, if the item succeeded.
+        error (str | None): The error, if the item failed.
+        latency_ms (float): Time spent answering the item, once it got a slot.
+    """
+
+    index: int
+    ufcfighter_id: str
+    session_id: str
+    status: Literal["ok", "error", "timeout"]
+    response: str | None = None
+    error: str | None = None
+    latency_ms: float
+
+
+class BatchStats(BaseModel):
+    """Aggregate results of a batch. Latencies only count the items answered."""
+
+    items: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    elapsed_ms: float = 0.0
+    latency_ms_p50: float | None = None
+    latency_ms_p95: float | None = None
+    latency_ms_max: float | None = None
+
+
+class BatchRunner:
+    """Answers batches of messages, such as the same questions asked to every fighter.
+
+    Items go through the shared workflow runtime, at most `max_concurrency` at a
+    time, and results are yielded as they complete rather than in order. An item
+    running longer than `item_timeout_seconds` is cancelled and reported as timed
+    out, without failing the batch.
+
+    Args:
+        max_concurrency (int): Maximum number of items answered at once.
+        item_timeout_seconds (float): Time after which an item is cancelled.
+    """
+
+    def __init__(
+        self, max_concurrency: int = 8, item_timeout_seconds: float = 60.0
+    ) -> None:
+        self.max_concurrency = max_concurrency
+        self.item_timeout_seconds = item_timeout_seconds
+
+        self._results: list[BatchItemResult] = []
+        self._elapsed_ms = 0.0
+
+    @classmethod
+    def build_from_settings(
+        cls,
+        max_concurrency: int | None = None,
+        item_timeout_seconds: float | None = None,
+    ) -> "BatchRunner":
+        """Creates a runner, the given limits overriding, but never exceeding, the
+        configured ones."""
+
+        return cls(
+            max_concurrency=min(
+                max_concurrency or settings.BATCH_MAX_CONCURRENCY,
+                settings.BATCH_MAX_CONCURRENCY,
+            ),
+            item_timeout_seconds=min(
+                item_timeout_seconds or settings.BATCH_ITEM_TIMEOUT_SECONDS,
+                settings.BATCH_ITEM_TIMEOUT_SECONDS,
+            ),
+        )
+
+    async def run(self, items: list[BatchItem]) -> AsyncIterator[BatchItemResult]:
+        """Answers the items of a batch.
+
+        Items still running when the caller stops iterating are cancelled.
+
+        Args:
+            items (list[BatchItem]): The batch.
+
+        Yields:
+            BatchItemResult: The result of each item, as it completes.
+        """
+
+        self._results = []
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run_item(index: int, item: BatchItem) -> BatchItemResult:
+            # Batch items wait for the LLM rate limit behind interactive traffic.
+            with llm_priority(Priority.BATCH):
+                async with semaphore:
+                    return await self.__run_item(index, item)
+
+        async with use_shared_workflow_runtime():
+            start_time = time.perf_counter()
+            tasks = [
+                asyncio.create_task(run_item(index, item))
+                for index, item in enumerate(items)
+            ]
+            try:
+                for next_result in asyncio.as_completed(tasks):
+                    result = await next_result
+                    self._results.append(result)
+                    self._elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+                    yield result
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    @property
+    def stats(self) -> BatchStats:
+        """Aggregate results of the items completed so far."""
+
+        latencies = sorted(
+            result.latency_ms for result in self._results if result.status == "ok"
+        )
+        stats = BatchStats(
+            items=len(self._results),
+            succeeded=len(latencies),
+            failed=sum(result.status == "error" for result in self._results),
+            timed_out=sum(result.status == "timeout" for result in self._results),
+            elapsed_ms=self._elapsed_ms,
+        )
+        if latencies:
+            stats.latency_ms_p50 = latencies[int(0.50 * (len(latencies) - 1))]
+            stats.latency_ms_p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            stats.latency_ms_max = latencies[-1]
+
+        return stats
+
+    async def __run_item(self, index: int, item: BatchItem) -> BatchItemResult:
+        session_id = item.session_id or str(uuid.uuid4())
+        result = {
+            "index": index,
+            "ufcfighter_id": item.ufcfighter_id,
+            "session_id": session_id,
+        }
+
+        start_time = time.perf_counter()
+        try:
+            ufcfighter_factory = UFCFighterFactory()
+            ufcfighter = ufcfighter_factory.get_ufcfighter(item.ufcfighter_id)
+
+            response, _ = await asyncio.wait_for(
+                get_response(
+                    messages=item.message,
+                    ufcfighter_id=item.ufcfighter_id,
+                    ufcfighter_name=ufcfighter.name,
+                    ufcfighter_perspective=ufcfighter.perspective,
+                    ufcfighter_style=ufcfighter.style,
+                    ufcfighter_context="",
+                    session_id=session_id,
+                ),
+                timeout=self.item_timeout_seconds,
+            )
+            result.update(status="ok", response=response)
+        except asyncio.TimeoutError:
+            result.update(
+                status="timeout",
+                error=f"Timed out after {self.item_timeout_seconds} seconds.",
+            )
+        except Exception as e:
+            result.update(status="error", error=str(e))
+
+        return BatchItemResult(
+            **result, latency_ms=(time.perf_counter() - start_time) * 1000
+        )
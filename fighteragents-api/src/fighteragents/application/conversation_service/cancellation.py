@@ -0,0 +1,61 @@
+from loguru import logger
+
+from fighteragents.application.conversation_service.tokens import (
+    count_text_tokens,
+)
+
+
+class CancellationTracker:
+    """Counts the conversation turns cancelled because their client went away.
+
+    Cancelling a turn stops the LLM before the end of its answer. The rest of the
+    answer is never generated, so the tokens saved are estimated from the average
+    length of the answers completed so far.
+    """
+
+    def __init__(self) -> None:
+        self.completed_turns = 0
+        self.completion_tokens_total = 0
+
+        self.cancelled_turns = 0
+        self.cancelled_tokens_generated = 0
+        self.cancelled_tokens_saved = 0
+
+    def record_completed(self, response: str) -> None:
+        self.completed_turns += 1
+        self.completion_tokens_total += count_text_tokens(response)
+
+    def record_cancelled(self, partial_response: str = "") -> None:
+        """Records a cancelled turn.
+
+        Args:
+            partial_response (str): The part of the answer generated before the
+                cancellation.
+        """
+
+        generated_tokens = count_text_tokens(partial_response)
+        saved_tokens = max(round(self.average_completion_tokens) - generated_tokens, 0)
+
+        self.cancelled_turns += 1
+        self.cancelled_tokens_generated += generated_tokens
+        self.cancelled_tokens_saved += saved_tokens
+
+        logger.info(
+            f"Conversation turn cancelled by its client | generated tokens: {generated_tokens} | estimated tokens saved: {saved_tokens}"
+        )
+
+    @property
+    def average_completion_tokens(self) -> float:
+        if self.completed_turns == 0:
+            return 0.0
+
+        return self.completion_tokens_total / self.completed_turns
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "completed_turns": self.completed_turns,
+            "cancelled_turns": self.cancelled_turns,
+            "cancelled_tokens_generated": self.cancelled_tokens_generated,
+            "cancelled_tokens_saved": self.cancelled_tokens_saved,
+        }
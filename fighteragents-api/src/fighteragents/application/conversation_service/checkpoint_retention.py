@@ -0,0 +1,340 @@
+import asyncio
+import time
+import uuid
+from itertools import islice
+
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pydantic import BaseModel, Field
+from pymongo import DeleteMany
+
+from fighteragents.application.conversation_service.hot_thread_checkpointer import (
+    HotThreadCheckpointSaver,
+)
+from fighteragents.config import settings
+
+# 100-ns intervals between the UUID epoch (1582-10-15) and the Unix epoch.
+UUID_EPOCH_OFFSET = 0x01B21DD213814000
+DELETE_BATCH_SIZE = 500
+
+
+class RetentionReport(BaseModel):
+    """Outcome of a retention run.
+
+    Attributes:
+        threads_scanned (int): Number of conversation threads found.
+        threads_expired (int): Number of idle threads deleted.
+        checkpoints_deleted (int): Number of deleted checkpoints.
+        writes_deleted (int): Number of deleted pending writes.
+        reclaimed_bytes (int): BSON size of the deleted documents.
+        dry_run (bool): Whether the deletions were only computed.
+    """
+
+    threads_scanned: int = 0
+    threads_expired: int = 0
+    checkpoints_deleted: int = 0
+    writes_deleted: int = 0
+    reclaimed_bytes: int = 0
+    dry_run: bool = False
+
+
+class RetentionPlan(BaseModel):
+    """Deletions selected by a retention run.
+
+    Attributes:
+        checkpoint_queries (list[dict]): Filters of the checkpoints to delete.
+        writes_queries (list[dict]): Filters of the writes to delete.
+        expired_thread_ids (set[str]): IDs of the idle threads deleted.
+        report (RetentionReport): Counts and size of the selected documents.
+    """
+
+    checkpoint_queries: list[dict] = Field(default_factory=list)
+    writes_queries: list[dict] = Field(default_factory=list)
+    expired_thread_ids: set[str] = Field(default_factory=set)
+    report: RetentionReport = Field(default_factory=RetentionReport)
+
+
+class CheckpointRetention:
+    """Bounds the growth of the LangGraph checkpoint and writes collections.
+
+    `AsyncMongoDBSaver` stores a full checkpoint and its pending writes at every graph
+    step and never deletes them. Only the latest checkpoint of a thread is read when
+    resuming a conversation, so a retention run:
+
+    - keeps the `keep_last` most recent checkpoints of each thread,
+    - deletes the writes of every checkpoint but the latest one, as they are already
+      applied to the next checkpoint,
+    - deletes threads whose latest checkpoint is older than `idle_ttl_seconds`.
+
+    Checkpoint IDs are time-ordered UUIDv6, so a thread's age is read from its latest
+    checkpoint ID. Deletions only target documents seen when the run started, so turns
+    running concurrently are never affected.
+
+    Args:
+        database (AsyncIOMotorDatabase): Database holding the checkpoint collections.
+        keep_last (int): Number of most recent checkpoints kept per thread.
+        idle_ttl_seconds (int): Idle time after which a thread is deleted. 0 disables it.
+        interval_seconds (int): Interval between two scheduled runs. 0 disables them.
+        checkpoint_cache (HotThreadCheckpointSaver | None): The in-memory checkpoint
+            cache of the API, told about the deleted threads.
+    """
+
+    def __init__(
+        self,
+        database: AsyncIOMotorDatabase,
+        keep_last: int = 10,
+        idle_ttl_seconds: int = 30 * 24 * 60 * 60,
+        interval_seconds: int = 0,
+        checkpoint_cache: HotThreadCheckpointSaver | None = None,
+    ) -> None:
+        if keep_last < 1:
+            raise ValueError("At least the latest checkpoint of a thread must be kept.")
+
+        self.checkpoint_collection: AsyncIOMotorCollection = database[
+            settings.MONGO_STATE_CHECKPOINT_COLLECTION
+        ]
+        self.writes_collection: AsyncIOMotorCollection = database[
+            settings.MONGO_STATE_WRITES_COLLECTION
+        ]
+        self.keep_last = keep_last
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.checkpoint_cache = checkpoint_cache
+
+        self._task: asyncio.Task | None = None
+
+    @classmethod
+    def build_from_settings(
+        cls,
+        database: AsyncIOMotorDatabase,
+        checkpoint_cache: HotThreadCheckpointSaver | None = None,
+    ) -> "CheckpointRetention":
+        return cls(
+            database,
+            keep_last=settings.CHECKPOINT_RETENTION_KEEP_LAST,
+            idle_ttl_seconds=settings.CHECKPOINT_RETENTION_IDLE_TTL_SECONDS,
+            interval_seconds=settings.CHECKPOINT_RETENTION_INTERVAL_SECONDS,
+            checkpoint_cache=checkpoint_cache,
+        )
+
+    def start(self) -> None:
+        """Schedules a retention run every `interval_seconds` on the running event loop."""
+
+        if self.interval_seconds <= 0:
+            return
+
+        self._task = asyncio.create_task(
+            self.__run_periodically(), name="checkpoint-retention"
+        )
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def run(self, dry_run: bool = False) -> RetentionReport:
+        """Deletes the superseded checkpoints and writes and the idle threads.
+
+        Args:
+            dry_run (bool): Only compute what would be deleted.
+
+        Returns:
+            RetentionReport: Counts and size of the deleted documents.
+        """
+
+        # Scanned before the writes, so writes of threads started in between are kept.
+        checkpoint_groups = [
+            group
+            async for group in self.checkpoint_collection.aggregate(
+                [
+                    {
+                        "$sort": {
+                            "thread_id": 1,
+                            "checkpoint_ns": 1,
+                            "checkpoint_id": -1,
+                        }
+                    },
+                    {
+                        "$group": {
+                            "_id": {
+                                "thread_id": "$thread_id",
+                                "checkpoint_ns": "$checkpoint_ns",
+                            },
+                            "checkpoints": {
+                                "$push": {
+                                    "id": "$checkpoint_id",
+                                    "size": {"$bsonSize": "$$ROOT"},
+                                }
+                            },
+                        }
+                    },
+                ],
+                allowDiskUse=True,
+            )
+        ]
+        writes_groups = [
+            group
+            async for group in self.writes_collection.aggregate(
+                [
+                    {
+                        "$group": {
+                            "_id": {
+                                "thread_id": "$thread_id",
+                                "checkpoint_ns": "$checkpoint_ns",
+                                "checkpoint_id": "$checkpoint_id",
+                            },
+                            "count": {"$sum": 1},
+                            "size": {"$sum": {"$bsonSize": "$$ROOT"}},
+                        }
+                    }
+                ],
+                allowDiskUse=True,
+            )
+        ]
+
+        plan = select_deletions(
+            checkpoint_groups,
+            writes_groups,
+            keep_last=self.keep_last,
+            idle_ttl_seconds=self.idle_ttl_seconds,
+            now=time.time(),
+        )
+        report = plan.report
+        report.dry_run = dry_run
+
+        if not dry_run:
+            await self.__bulk_delete(
+                self.checkpoint_collection,
+                [DeleteMany(query) for query in plan.checkpoint_queries],
+            )
+            await self.__bulk_delete(
+                self.writes_collection,
+                [DeleteMany(query) for query in plan.writes_queries],
+            )
+            if self.checkpoint_cache is not None:
+                for thread_id in plan.expired_thread_ids:
+                    self.checkpoint_cache.invalidate(thread_id)
+
+        logger.info(
+            f"Checkpoint retention {'(dry run) ' if dry_run else ''}| threads: {report.threads_scanned} "
+            f"| expired threads: {report.threads_expired} | checkpoints deleted: {report.checkpoints_deleted} "
+            f"| writes deleted: {report.writes_deleted} | reclaimed: {report.reclaimed_bytes} bytes"
+        )
+
+        return report
+
+    async def __bulk_delete(
+        self, collection: AsyncIOMotorCollection, deletions: list[DeleteMany]
+    ) -> None:
+        deletions = iter(deletions)
+        while batch := list(islice(deletions, DELETE_BATCH_SIZE)):
+            await collection.bulk_write(batch, ordered=False)
+
+    async def __run_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"Checkpoint retention failed: {e}")
+
+
+def select_deletions(
+    checkpoint_groups: list[dict],
+    writes_groups: list[dict],
+    keep_last: int,
+    idle_ttl_seconds: int,
+    now: float,
+) -> RetentionPlan:
+    """Selects the checkpoints and writes a retention run deletes.
+
+    Args:
+        checkpoint_groups (list[dict]): The checkpoints of each (thread, namespace), as
+            `{"_id": {"thread_id", "checkpoint_ns"}, "checkpoints": [{"id", "size"}]}`
+            with the checkpoints sorted from the most recent.
+        writes_groups (list[dict]): The writes of each checkpoint, as
+            `{"_id": {"thread_id", "checkpoint_ns", "checkpoint_id"}, "count", "size"}`.
+        keep_last (int): Number of most recent checkpoints kept per thread.
+        idle_ttl_seconds (int): Idle time after which a thread is deleted. 0 disables it.
+        now (float): Unix time the idle time is measured from.
+
+    Returns:
+        RetentionPlan: The deletion queries and the report of the run.
+    """
+
+    plan = RetentionPlan()
+    expire_before = now - idle_ttl_seconds
+
+    # Latest checkpoint ID of each (thread, namespace).
+    latest_checkpoint_ids: dict[tuple[str, str], str] = {}
+    expired_threads: set[tuple[str, str]] = set()
+    threads = set()
+
+    for group in checkpoint_groups:
+        key = (group["_id"]["thread_id"], group["_id"]["checkpoint_ns"])
+        checkpoints = group["checkpoints"]
+        latest_checkpoint_ids[key] = checkpoints[0]["id"]
+        threads.add(key[0])
+
+        is_idle = get_checkpoint_time(checkpoints[0]["id"]) < expire_before
+        if idle_ttl_seconds and is_idle:
+            expired_threads.add(key)
+            stale_checkpoints = checkpoints
+        else:
+            stale_checkpoints = checkpoints[keep_last:]
+
+        if stale_checkpoints:
+            plan.checkpoint_queries.append(
+                {
+                    "thread_id": key[0],
+                    "checkpoint_ns": key[1],
+                    "checkpoint_id": {"$in": [c["id"] for c in stale_checkpoints]},
+                }
+            )
+            plan.report.checkpoints_deleted += len(stale_checkpoints)
+            plan.report.reclaimed_bytes += sum(c["size"] for c in stale_checkpoints)
+
+    plan.expired_thread_ids = {thread_id for thread_id, _ in expired_threads}
+    plan.report.threads_scanned = len(threads)
+    plan.report.threads_expired = len(plan.expired_thread_ids)
+
+    for group in writes_groups:
+        key = (group["_id"]["thread_id"], group["_id"]["checkpoint_ns"])
+        latest_checkpoint_id = latest_checkpoint_ids.get(key)
+        if latest_checkpoint_id is None:
+            # The thread started after the checkpoints were scanned.
+            continue
+
+        checkpoint_id = group["_id"]["checkpoint_id"]
+        if checkpoint_id < latest_checkpoint_id or (
+            key in expired_threads and checkpoint_id == latest_checkpoint_id
+        ):
+            plan.writes_queries.append(dict(group["_id"]))
+            plan.report.writes_deleted += group["count"]
+            plan.report.reclaimed_bytes += group["size"]
+
+    return plan
+
+
+def get_checkpoint_time(checkpoint_id: str) -> float:
+    """Returns the Unix time a LangGraph checkpoint was created at.
+
+    Args:
+        checkpoint_id (str): A UUIDv6 checkpoint ID.
+
+    Returns:
+        float: The creation time, or +inf if the ID isn't a UUIDv6.
+    """
+
+    try:
+        value = uuid.UUID(checkpoint_id)
+    except (TypeError, ValueError):
+        return float("inf")
+
+    if value.version != 6:
+        return float("inf")
+
+    timestamp = ((value.int >> 80) << 12) | ((value.int >> 64) & 0xFFF)
+
+    return (timestamp - UUID_EPOCH_OFFSET) / 1e7
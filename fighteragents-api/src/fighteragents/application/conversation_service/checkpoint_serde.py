@@ -0,0 +1,139 @@
+from typing import Any
+
+import zstandard
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from loguru import logger
+
+from fighteragents.config import settings
+from fighteragents.domain.ufcfighter_factory import (
+    FIGHTER_NAMES,
+    FIGHTER_PERSPECTIVES,
+    FIGHTER_STYLES,
+)
+
+REF_TYPE = "msgpack+ref"
+COMPRESSED_REF_TYPE = "msgpack+ref+zstd"
+
+# Prefix of the strings standing for a fighter field. The NUL characters keep it from
+# colliding with text of a conversation.
+REF_PREFIX = "\x00fighter-field\x00"
+
+FIGHTER_FIELDS = {
+    "ufcfighter_name": FIGHTER_NAMES,
+    "ufcfighter_perspective": FIGHTER_PERSPECTIVES,
+    "ufcfighter_style": FIGHTER_STYLES,
+}
+
+
+class CompactCheckpointSerializer(JsonPlusSerializer):
+    """Checkpoint serializer storing fighter personas by reference, compressed with zstd.
+
+    Every checkpoint of a conversation holds the fighter's name, perspective and style
+    paragraphs, identical from one step to the next. They are replaced by a short
+    reference holding the fighter ID and the field before being encoded by the
+    default serializer, and resolved back from the `UFCFighterFactory` when loading.
+    Editing a persona in the factory thus applies to existing conversations.
+
+    Payloads above `min_compress_size` bytes are compressed with zstd. Checkpoints
+    written by the default serializer remain readable, and with `compact` off new
+    checkpoints are written by it while the compact ones stay readable. A reference to
+    a fighter no longer in the factory loads as an empty string.
+
+    Args:
+        compact (bool): Whether to write the compact format.
+        compression_level (int): Zstd compression level.
+        min_compress_size (int): Size in bytes under which payloads are stored as is.
+    """
+
+    def __init__(
+        self,
+        compact: bool = True,
+        compression_level: int = 3,
+        min_compress_size: int = 256,
+    ) -> None:
+        super().__init__()
+
+        self.compact = compact
+        self.compression_level = compression_level
+        self.min_compress_size = min_compress_size
+
+        self._compressor = zstandard.ZstdCompressor(level=compression_level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._refs = {
+            text: f"{REF_PREFIX}{ufcfighter_id}\x00{field}"
+            for field, texts in FIGHTER_FIELDS.items()
+            for ufcfighter_id, text in texts.items()
+        }
+        self._missing_refs: set[str] = set()
+
+    @classmethod
+    def build_from_settings(cls) -> "CompactCheckpointSerializer":
+        return cls(
+            compact=settings.CHECKPOINT_SERDE_COMPACT,
+            compression_level=settings.CHECKPOINT_SERDE_COMPRESSION_LEVEL,
+            min_compress_size=settings.CHECKPOINT_SERDE_MIN_COMPRESS_SIZE,
+        )
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        if not self.compact or isinstance(obj, (bytes, bytearray)):
+            return super().dumps_typed(obj)
+
+        type_, data = super().dumps_typed(self.__map_persona_fields(obj, self.__to_ref))
+        if type_ != "msgpack":
+            # Not msgpack-encodable, stored as the default serializer does.
+            return super().dumps_typed(obj)
+
+        if len(data) < self.min_compress_size:
+            return REF_TYPE, data
+
+        return COMPRESSED_REF_TYPE, self._compressor.compress(data)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, data_ = data
+        if type_ == COMPRESSED_REF_TYPE:
+            data_ = self._decompressor.decompress(data_)
+        elif type_ != REF_TYPE:
+            return super().loads_typed(data)
+
+        return self.__map_persona_fields(
+            super().loads_typed(("msgpack", data_)), self.__from_ref
+        )
+
+    @staticmethod
+    def __map_persona_fields(obj: Any, map_field) -> Any:
+        """Maps the strings where persona fields appear: the values of channel writes
+        and the channel values of checkpoints."""
+
+        if isinstance(obj, str):
+            return map_field(obj)
+
+        if isinstance(obj, dict) and isinstance(obj.get("channel_values"), dict):
+            channel_values = {
+                channel: map_field(value) if isinstance(value, str) else value
+                for channel, value in obj["channel_values"].items()
+            }
+
+            return {**obj, "channel_values": channel_values}
+
+        return obj
+
+    def __to_ref(self, text: str) -> str:
+        return self._refs.get(text, text)
+
+    def __from_ref(self, text: str) -> str:
+        if not text.startswith(REF_PREFIX):
+            return text
+
+        ufcfighter_id, field = text[len(REF_PREFIX) :].split("\x00")
+        value = FIGHTER_FIELDS.get(field, {}).get(ufcfighter_id)
+        if value is None:
+            # The fighter was renamed or removed: its conversations stay loadable.
+            if text not in self._missing_refs:
+                self._missing_refs.add(text)
+                logger.warning(
+                    f"Unknown fighter field '{field}' of '{ufcfighter_id}' in a checkpoint. Loading it as empty."
+                )
+
+            return ""
+
+        return value
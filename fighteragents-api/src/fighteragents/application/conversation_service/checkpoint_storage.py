@@ -0,0 +1,77 @@
+import uuid
+
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import errors
+
+from fighteragents.config import settings
+
+# Every checkpointer query filters on the thread first, so both collections are keyed
+# by `thread_id`. It is also the field to shard them on.
+CHECKPOINTS_INDEX = [("thread_id", 1), ("checkpoint_ns", 1), ("checkpoint_id", -1)]
+WRITES_INDEX = [
+    ("thread_id", 1),
+    ("checkpoint_ns", 1),
+    ("checkpoint_id", 1),
+    ("task_id", 1),
+    ("idx", 1),
+]
+
+
+def get_thread_id(
+    ufcfighter_id: str, session_id: str | None = None, new_thread: bool = False
+) -> str:
+    """Derives the LangGraph thread of a conversation.
+
+    Each session gets its own thread per fighter, so concurrent users never share a
+    checkpoint chain or a summary.
+
+    Args:
+        ufcfighter_id: Unique identifier for the ufcfighter.
+        session_id: Identifier of the user session. Without one, the fighter's shared
+            thread is used.
+        new_thread: Whether to start a fresh thread instead.
+
+    Returns:
+        str: The thread ID.
+    """
+
+    if new_thread:
+        return f"{ufcfighter_id}-{uuid.uuid4()}"
+
+    if session_id:
+        return f"{ufcfighter_id}-{session_id}"
+
+    return ufcfighter_id
+
+
+async def create_checkpoint_indexes(database: AsyncIOMotorDatabase) -> None:
+    """Creates the indexes backing the checkpointer queries.
+
+    `AsyncMongoDBSaver` looks up the latest checkpoint of a thread sorted by
+    checkpoint ID, then the writes of that checkpoint, and upserts both by their full
+    key. Without these indexes each lookup scans the whole collection. Creating an
+    existing index is a no-op.
+
+    Args:
+        database: The database holding the checkpoint and writes collections.
+    """
+
+    for collection_name, keys, name in [
+        (
+            settings.MONGO_STATE_CHECKPOINT_COLLECTION,
+            CHECKPOINTS_INDEX,
+            "thread_checkpoints",
+        ),
+        (
+            settings.MONGO_STATE_WRITES_COLLECTION,
+            WRITES_INDEX,
+            "thread_checkpoint_writes",
+        ),
+    ]:
+        try:
+            await database[collection_name].create_index(keys, name=name, unique=True)
+        except errors.PyMongoError as e:
+            logger.warning(
+                f"Failed to create index '{name}' on '{collection_name}': {e}"
+            )
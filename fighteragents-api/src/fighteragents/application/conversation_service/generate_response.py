@@ -1,15 +1,32 @@
-import uuid
+import asyncio
+import json
+from contextlib import aclosing
 from typing import Any, AsyncGenerator, Union
 
 from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
-from langgraph.checkpoint.mongodb.aio import AsyncMongoDBSaver
-from opik.integrations.langchain import OpikTracer
 
-from fighteragents.application.conversation_service.workflow.graph import (
-    create_workflow_graph,
+from langgraph.graph.state import CompiledStateGraph
+
+from fighteragents.application.conversation_service.checkpoint_storage import (
+    get_thread_id,
+)
+from fighteragents.application.conversation_service.response_cache import (
+    SemanticResponseCache,
+    replay_response,
+)
+from fighteragents.application.conversation_service.runtime import (
+    WorkflowRuntime,
+    get_workflow_runtime,
+)
+from fighteragents.application.conversation_service.turn_coordinator import Flight
+from fighteragents.application.conversation_service.workflow.state import (
+    UFCFighterState,
 )
-from fighteragents.application.conversation_service.workflow.state import UFCFighterState
-from fighteragents.config import settings
+from fighteragents.infrastructure.metrics import metrics_callback_handler
+
+CHUNK_EVENT = "chunk"
+RETRIEVAL_STARTED_EVENT = "retrieval_started"
+RETRIEVAL_DONE_EVENT = "retrieval_done"
 
 
 async def get_response(
@@ -20,6 +37,7 @@ async def get_response(
     ufcfighter_style: str,
     ufcfighter_context: str,
     new_thread: bool = False,
+    session_id: str | None = None,
 ) -> tuple[str, UFCFighterState]:
     """Run a conversation through the workflow graph.
 
@@ -30,6 +48,9 @@ async def get_response(
         ufcfighter_perspective: UFCFighter's perspective on the topic.
         ufcfighter_style: Style of conversation (e.g., "Socratic").
         ufcfighter_context: Additional context about the ufcfighter.
+        new_thread: Whether to create a new conversation thread.
+        session_id: Identifier of the user session, each session having its own
+            conversation thread.
 
     Returns:
         tuple[str, UFCFighterState]: A tuple containing:
@@ -40,37 +61,28 @@ async def get_response(
         RuntimeError: If there's an error running the conversation workflow.
     """
 
-    graph_builder = create_workflow_graph()
-
     try:
-        async with AsyncMongoDBSaver.from_conn_string(
-            conn_string=settings.MONGO_URI,
-            db_name=settings.MONGO_DB_NAME,
-            checkpoint_collection_name=settings.MONGO_STATE_CHECKPOINT_COLLECTION,
-            writes_collection_name=settings.MONGO_STATE_WRITES_COLLECTION,
-        ) as checkpointer:
-            graph = graph_builder.compile(checkpointer=checkpointer)
-            opik_tracer = OpikTracer(graph=graph.get_graph(xray=True))
-
-            thread_id = (
-                ufcfighter_id if not new_thread else f"{ufcfighter_id}-{uuid.uuid4()}"
-            )
-            config = {
-                "configurable": {"thread_id": thread_id},
-                "callbacks": [opik_tracer],
-            }
-            output_state = await graph.ainvoke(
-                input={
-                    "messages": __format_messages(messages=messages),
-                    "ufcfighter_name": ufcfighter_name,
-                    "ufcfighter_perspective": ufcfighter_perspective,
-                    "ufcfighter_style": ufcfighter_style,
-                    "ufcfighter_context": ufcfighter_context,
-                },
-                config=config,
-            )
-        last_message = output_state["messages"][-1]
-        return last_message.content, UFCFighterState(**output_state)
+        async with get_workflow_runtime() as runtime:
+            thread_id = get_thread_id(ufcfighter_id, session_id, new_thread)
+            flight_key = ("response", thread_id, __get_messages_key(messages))
+
+            async def run_turn(flight: Flight) -> tuple[str, dict]:
+                async with runtime.turn(thread_id):
+                    return await __run_turn(
+                        runtime,
+                        thread_id,
+                        messages,
+                        ufcfighter_id,
+                        ufcfighter_name,
+                        ufcfighter_perspective,
+                        ufcfighter_style,
+                        ufcfighter_context,
+                    )
+
+            async with runtime.coordinator.singleflight(flight_key, run_turn) as flight:
+                response, output_state = await flight.result()
+
+        return response, UFCFighterState(**output_state)
     except Exception as e:
         raise RuntimeError(f"Error running conversation workflow: {str(e)}") from e
 
@@ -83,6 +95,7 @@ async def get_streaming_response(
     ufcfighter_style: str,
     ufcfighter_context: str,
     new_thread: bool = False,
+    session_id: str | None = None,
 ) -> AsyncGenerator[str, None]:
     """Run a conversation through the workflow graph with streaming response.
 
@@ -94,6 +107,8 @@ async def get_streaming_response(
         ufcfighter_style: Style of conversation (e.g., "Socratic").
         ufcfighter_context: Additional context about the ufcfighter.
         new_thread: Whether to create a new conversation thread.
+        session_id: Identifier of the user session, each session having its own
+            conversation thread.
 
     Yields:
         Chunks of the response as they become available.
@@ -101,46 +116,294 @@ async def get_streaming_response(
     Raises:
         RuntimeError: If there's an error running the conversation workflow.
     """
-    graph_builder = create_workflow_graph()
+
+    async with aclosing(
+        get_streaming_events(
+            messages,
+            ufcfighter_id,
+            ufcfighter_name,
+            ufcfighter_perspective,
+            ufcfighter_style,
+            ufcfighter_context,
+            new_thread=new_thread,
+            session_id=session_id,
+        )
+    ) as events:
+        async for event, data in events:
+            if event == CHUNK_EVENT:
+                yield data
+
+
+async def get_streaming_events(
+    messages: str | list[str] | list[dict[str, Any]],
+    ufcfighter_id: str,
+    ufcfighter_name: str,
+    ufcfighter_perspective: str,
+    ufcfighter_style: str,
+    ufcfighter_context: str,
+    new_thread: bool = False,
+    session_id: str | None = None,
+) -> AsyncGenerator[tuple[str, str], None]:
+    """Run a conversation through the workflow graph, streaming the response along
+    with the progress of the turn.
+
+    Takes the same arguments as `get_streaming_response`.
+
+    Yields:
+        tuple[str, str]: The name of the event and its data, one of:
+            - `CHUNK_EVENT`: A chunk of the response.
+            - `RETRIEVAL_STARTED_EVENT`: The fighter looks up its context, with the
+              search query.
+            - `RETRIEVAL_DONE_EVENT`: The context was retrieved, with no data.
+
+    Raises:
+        RuntimeError: If there's an error running the conversation workflow.
+    """
 
     try:
-        async with AsyncMongoDBSaver.from_conn_string(
-            conn_string=settings.MONGO_URI,
-            db_name=settings.MONGO_DB_NAME,
-            checkpoint_collection_name=settings.MONGO_STATE_CHECKPOINT_COLLECTION,
-            writes_collection_name=settings.MONGO_STATE_WRITES_COLLECTION,
-        ) as checkpointer:
-            graph = graph_builder.compile(checkpointer=checkpointer)
-            opik_tracer = OpikTracer(graph=graph.get_graph(xray=True))
-
-            thread_id = (
-                ufcfighter_id if not new_thread else f"{ufcfighter_id}-{uuid.uuid4()}"
+        async with get_workflow_runtime() as runtime:
+            thread_id = get_thread_id(ufcfighter_id, session_id, new_thread)
+            flight_key = ("stream", thread_id, __get_messages_key(messages))
+
+            async def stream_turn(flight: Flight) -> None:
+                async with (
+                    runtime.turn(thread_id),
+                    aclosing(
+                        __stream_turn(
+                            runtime,
+                            thread_id,
+                            messages,
+                            ufcfighter_id,
+                            ufcfighter_name,
+                            ufcfighter_perspective,
+                            ufcfighter_style,
+                            ufcfighter_context,
+                        )
+                    ) as turn_events,
+                ):
+                    async for event in turn_events:
+                        await flight.publish(event)
+
+            async with runtime.coordinator.singleflight(
+                flight_key, stream_turn
+            ) as flight:
+                async for event in flight.stream():
+                    yield event
+
+    except Exception as e:
+        raise RuntimeError(
+            f"Error running streaming conversation workflow: {str(e)}"
+        ) from e
+
+
+async def __run_turn(
+    runtime: WorkflowRuntime,
+    thread_id: str,
+    messages: str | list[str] | list[dict[str, Any]],
+    ufcfighter_id: str,
+    ufcfighter_name: str,
+    ufcfighter_perspective: str,
+    ufcfighter_style: str,
+    ufcfighter_context: str,
+) -> tuple[str, dict]:
+    """Runs a conversation turn, answering from the response cache when possible.
+
+    Returns:
+        tuple[str, dict]: The answer and the state of the thread after the turn.
+    """
+
+    graph = runtime.graph
+    config = {
+        "configurable": {"thread_id": thread_id},
+        "callbacks": [runtime.get_tracer(), metrics_callback_handler],
+    }
+    ufcfighter_state = {
+        "ufcfighter_name": ufcfighter_name,
+        "ufcfighter_perspective": ufcfighter_perspective,
+        "ufcfighter_style": ufcfighter_style,
+        "ufcfighter_context": ufcfighter_context,
+    }
+
+    response_cache = await __get_response_cache(runtime, config, messages)
+    if response_cache is not None:
+        cached_response = await response_cache.lookup(ufcfighter_id, messages)
+        if cached_response is not None:
+            output_state = await __record_cached_turn(
+                graph, config, messages, cached_response, ufcfighter_state
             )
-            config = {
-                "configurable": {"thread_id": thread_id},
-                "callbacks": [opik_tracer],
-            }
+            return cached_response, output_state
+
+    try:
+        output_state = await graph.ainvoke(
+            input={
+                "messages": __format_messages(messages=messages),
+                **ufcfighter_state,
+            },
+            config=config,
+        )
+    except asyncio.CancelledError:
+        runtime.cancellations.record_cancelled()
+
+        raise
+    last_message = output_state["messages"][-1]
+    runtime.cancellations.record_completed(last_message.content)
+
+    if response_cache is not None:
+        await response_cache.store(ufcfighter_id, messages, last_message.content)
 
-            async for chunk in graph.astream(
+    return last_message.content, output_state
+
+
+async def __stream_turn(
+    runtime: WorkflowRuntime,
+    thread_id: str,
+    messages: str | list[str] | list[dict[str, Any]],
+    ufcfighter_id: str,
+    ufcfighter_name: str,
+    ufcfighter_perspective: str,
+    ufcfighter_style: str,
+    ufcfighter_context: str,
+) -> AsyncGenerator[tuple[str, str], None]:
+    """Runs a conversation turn, streaming the answer as it is generated or replayed
+    from the response cache, along with the retrieval events."""
+
+    graph = runtime.graph
+    config = {
+        "configurable": {"thread_id": thread_id},
+        "callbacks": [runtime.get_tracer(), metrics_callback_handler],
+    }
+    ufcfighter_state = {
+        "ufcfighter_name": ufcfighter_name,
+        "ufcfighter_perspective": ufcfighter_perspective,
+        "ufcfighter_style": ufcfighter_style,
+        "ufcfighter_context": ufcfighter_context,
+    }
+
+    response_cache = await __get_response_cache(runtime, config, messages)
+    if response_cache is not None:
+        cached_response = await response_cache.lookup(ufcfighter_id, messages)
+        if cached_response is not None:
+            await __record_cached_turn(
+                graph, config, messages, cached_response, ufcfighter_state
+            )
+            async for chunk in replay_response(cached_response):
+                yield CHUNK_EVENT, chunk
+
+            return
+
+    # The graph stream is closed as soon as the turn is cancelled or its consumer
+    # stops reading, which also closes the LLM stream and skips the remaining nodes.
+    response_chunks = []
+    try:
+        async with aclosing(
+            graph.astream(
                 input={
                     "messages": __format_messages(messages=messages),
-                    "ufcfighter_name": ufcfighter_name,
-                    "ufcfighter_perspective": ufcfighter_perspective,
-                    "ufcfighter_style": ufcfighter_style,
-                    "ufcfighter_context": ufcfighter_context,
+                    **ufcfighter_state,
                 },
                 config=config,
-                stream_mode="messages",
-            ):
-                if chunk[1]["langgraph_node"] == "conversation_node" and isinstance(
-                    chunk[0], AIMessageChunk
+                stream_mode=["messages", "updates"],
+            )
+        ) as graph_stream:
+            async for stream_mode, chunk in graph_stream:
+                if stream_mode == "updates":
+                    # Node updates are only emitted once a node is done. A tool call
+                    # of the conversation node starts the retrieval, while eager
+                    # retrievals are reported once done.
+                    for node, update in chunk.items():
+                        if node == "eager_retrieval_node" and update:
+                            tool_call = update["messages"][0].tool_calls[0]
+                            yield RETRIEVAL_STARTED_EVENT, tool_call["args"]["query"]
+                            yield RETRIEVAL_DONE_EVENT, ""
+                        elif node == "conversation_node":
+                            tool_calls = getattr(
+                                update.get("messages"), "tool_calls", None
+                            )
+                            if tool_calls:
+                                yield (
+                                    RETRIEVAL_STARTED_EVENT,
+                                    str(tool_calls[0]["args"].get("query", "")),
+                                )
+                        elif node == "retrieve_ufcfighter_context":
+                            yield RETRIEVAL_DONE_EVENT, ""
+                elif (
+                    chunk[1]["langgraph_node"] == "conversation_node"
+                    and isinstance(chunk[0], AIMessageChunk)
+                    # Role deltas and tool call chunks have no text.
+                    and chunk[0].content
                 ):
-                    yield chunk[0].content
+                    response_chunks.append(chunk[0].content)
+                    yield CHUNK_EVENT, chunk[0].content
+    except (asyncio.CancelledError, GeneratorExit):
+        runtime.cancellations.record_cancelled("".join(response_chunks))
 
-    except Exception as e:
-        raise RuntimeError(
-            f"Error running streaming conversation workflow: {str(e)}"
-        ) from e
+        raise
+    runtime.cancellations.record_completed("".join(response_chunks))
+
+    if response_cache is not None:
+        await response_cache.store(ufcfighter_id, messages, "".join(response_chunks))
+
+
+async def __record_cached_turn(
+    graph: CompiledStateGraph,
+    config: dict,
+    message: str,
+    response: str,
+    ufcfighter_state: dict,
+) -> dict:
+    """Appends a turn answered from the response cache to the conversation thread.
+
+    The turn is written as if it went through the graph up to `connector_node`,
+    without calling the LLM. The rest of the graph is then run from there, so a
+    summarization triggered by the turn isn't left pending and dropped by the next
+    user message.
+
+    Args:
+        graph: The compiled workflow graph.
+        config: Run configuration identifying the conversation thread.
+        message: The user message.
+        response: The cached answer.
+        ufcfighter_state: Fighter fields of the state, needed for new threads.
+
+    Returns:
+        dict: The state of the thread after the turn.
+    """
+
+    await graph.aupdate_state(
+        config,
+        {
+            "messages": [HumanMessage(content=message), AIMessage(content=response)],
+            **ufcfighter_state,
+        },
+        as_node="connector_node",
+    )
+    state_snapshot = await graph.aget_state(config)
+    if state_snapshot.next:
+        return await graph.ainvoke(None, config=config)
+
+    return state_snapshot.values
+
+
+async def __get_response_cache(
+    runtime: WorkflowRuntime,
+    config: dict,
+    messages: str | list[str] | list[dict[str, Any]],
+) -> SemanticResponseCache | None:
+    """Returns the response cache if the turn can be answered from it or stored in it.
+
+    Cached answers are shared by every thread of a fighter, so only opening messages
+    of a conversation are cached: an answer that depends on the history or summary
+    of one thread would be wrong, or leak its content, in another.
+    """
+
+    if runtime.response_cache is None or not isinstance(messages, str):
+        return None
+
+    state_snapshot = await runtime.graph.aget_state(config)
+    if state_snapshot.values.get("messages") or state_snapshot.values.get("summary"):
+        return None
+
+    return runtime.response_cache
 
 
 def __format_messages(
@@ -181,3 +444,12 @@ def __format_messages(
         return [HumanMessage(content=message) for message in messages]
 
     return []
+
+
+def __get_messages_key(messages: str | list[str] | list[dict[str, Any]]) -> str:
+    """Hashable form of the messages of a request, to detect identical requests."""
+
+    if isinstance(messages, str):
+        return messages
+
+    return json.dumps(messages, sort_keys=True, default=str)
@@ -0,0 +1,394 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+)
+from loguru import logger
+from pydantic import BaseModel, ConfigDict
+
+from fighteragents.config import settings
+
+ThreadKey = tuple[str, str]
+
+
+class HotThread(BaseModel):
+    """Latest checkpoint of a thread, kept serialized so callers never share objects.
+
+    Attributes:
+        config (dict): Config identifying the checkpoint.
+        checkpoint (tuple[str, bytes]): The serialized checkpoint.
+        metadata (dict): Metadata of the checkpoint.
+        parent_config (dict | None): Config of the parent checkpoint.
+        pending_writes (dict): Serialized pending writes keyed by (task ID, index).
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    config: dict
+    checkpoint: tuple[str, bytes]
+    metadata: dict
+    parent_config: dict | None = None
+    pending_writes: dict[tuple[str, int], tuple[str, str, tuple[str, bytes]]] = {}
+
+
+class HotThreadCheckpointSaver(BaseCheckpointSaver):
+    """Checkpointer serving the latest checkpoint of recently active threads from memory.
+
+    Each turn reads the latest checkpoint of its thread, which this process usually
+    wrote moments before. The latest checkpoint and pending writes of up to
+    `max_threads` threads are kept in an LRU and returned without querying MongoDB.
+    Older checkpoints and cold threads are read from the wrapped saver.
+
+    Writes are applied to the LRU at once and forwarded to the wrapped saver in order,
+    per thread. With the `async` durability they are flushed in the background, so a
+    crash loses the writes not flushed yet. With `sync`, callers wait for the flush
+    and only the reads are sped up. At most `max_pending_writes` writes are in flight;
+    further writes wait for room.
+
+    A thread whose flush failed is served by the wrapped saver for
+    `flush_failure_backoff_seconds`, as its durable state is behind the cached one.
+
+    The LRU assumes a thread is only written by this process, e.g. with sticky
+    websocket sessions. Threads written elsewhere may be served stale, and checkpoints
+    deleted behind its back must be reported with `invalidate` or `aclear`.
+
+    Args:
+        saver (BaseCheckpointSaver): The durable checkpointer.
+        max_threads (int): Maximum number of threads kept in memory.
+        durability (str): `async` to flush writes in the background, `sync` to wait.
+        max_pending_writes (int): Maximum number of writes not yet flushed.
+        flush_failure_backoff_seconds (float): Time a thread isn't cached for after
+            one of its flushes failed.
+    """
+
+    def __init__(
+        self,
+        saver: BaseCheckpointSaver,
+        max_threads: int = 1024,
+        durability: str = "async",
+        max_pending_writes: int = 1000,
+        flush_failure_backoff_seconds: float = 30.0,
+    ) -> None:
+        if durability not in ("async", "sync"):
+            raise ValueError(
+                f"Unknown durability '{durability}'. Use 'async' or 'sync'."
+            )
+
+        super().__init__(serde=saver.serde)
+
+        self.saver = saver
+        self.max_threads = max_threads
+        self.durability = durability
+        self.flush_failure_backoff_seconds = flush_failure_backoff_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.flush_failures = 0
+        self.discarded_writes = 0
+
+        self._threads: OrderedDict[ThreadKey, HotThread] = OrderedDict()
+        self._flush_tails: dict[ThreadKey, asyncio.Task] = {}
+        self._pending_slots = asyncio.Semaphore(max_pending_writes)
+        self._backoff_until: dict[ThreadKey, float] = {}
+        # Bumped whenever cached threads are dropped, so reads started before don't
+        # cache what they read, and by `aclear`, so writes queued before are dropped.
+        self._invalidations = 0
+        self._cleared_at = 0
+
+    @classmethod
+    def build_from_settings(
+        cls, saver: BaseCheckpointSaver
+    ) -> "HotThreadCheckpointSaver":
+        return cls(
+            saver,
+            max_threads=settings.CHECKPOINT_CACHE_MAX_THREADS,
+            durability=settings.CHECKPOINT_CACHE_DURABILITY,
+            max_pending_writes=settings.CHECKPOINT_CACHE_MAX_PENDING_WRITES,
+            flush_failure_backoff_seconds=settings.CHECKPOINT_CACHE_FLUSH_FAILURE_BACKOFF_SECONDS,
+        )
+
+    def get_next_version(self, current: Any, channel: Any) -> Any:
+        return self.saver.get_next_version(current, channel)
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        key = get_thread_key(config)
+        checkpoint_id = get_checkpoint_id(config)
+
+        thread = self._threads.get(key)
+        if thread is not None and checkpoint_id in (
+            None,
+            thread.config["configurable"]["checkpoint_id"],
+        ):
+            self._threads.move_to_end(key)
+            self.hits += 1
+
+            return self.__load(thread)
+
+        self.misses += 1
+        invalidations = self._invalidations
+        await self.__wait_flushed(key)
+        checkpoint_tuple = await self.saver.aget_tuple(config)
+
+        if (
+            checkpoint_tuple is not None
+            and checkpoint_id is None
+            and invalidations == self._invalidations
+        ):
+            self.__cache(key, self.__dump(checkpoint_tuple))
+
+        return checkpoint_tuple
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        if config is None:
+            await self.aflush()
+        else:
+            await self.__wait_flushed(get_thread_key(config))
+
+        async for checkpoint_tuple in self.saver.alist(
+            config, filter=filter, before=before, limit=limit
+        ):
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        key = get_thread_key(config)
+        next_config = {
+            "configurable": {
+                "thread_id": key[0],
+                "checkpoint_ns": key[1],
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+        serialized_checkpoint = self.serde.dumps_typed(checkpoint)
+
+        self.__cache(
+            key,
+            HotThread(
+                config=next_config,
+                checkpoint=serialized_checkpoint,
+                metadata=dict(metadata),
+                parent_config=(
+                    {
+                        "configurable": {
+                            "thread_id": key[0],
+                            "checkpoint_ns": key[1],
+                            "checkpoint_id": parent_checkpoint_id,
+                        }
+                    }
+                    if parent_checkpoint_id
+                    else None
+                ),
+            ),
+        )
+        if self.durability == "async":
+            # Nodes may mutate state objects before the flush runs.
+            checkpoint = self.serde.loads_typed(serialized_checkpoint)
+        await self.__flush(
+            key, lambda: self.saver.aput(config, checkpoint, metadata, new_versions)
+        )
+
+        return next_config
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+    ) -> None:
+        key = get_thread_key(config)
+        serialized_writes = [
+            (channel, self.serde.dumps_typed(value)) for channel, value in writes
+        ]
+
+        thread = self._threads.get(key)
+        if (
+            thread is not None
+            and get_checkpoint_id(config)
+            == (thread.config["configurable"]["checkpoint_id"])
+        ):
+            # Same upsert rules as the MongoDB saver: special writes replace existing
+            # ones, regular writes are only inserted once.
+            replace = all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            for idx, (channel, value) in enumerate(serialized_writes):
+                write_key = (task_id, WRITES_IDX_MAP.get(channel, idx))
+                if replace or write_key not in thread.pending_writes:
+                    thread.pending_writes[write_key] = (task_id, channel, value)
+
+        if self.durability == "async":
+            writes = [
+                (channel, self.serde.loads_typed(value))
+                for channel, value in serialized_writes
+            ]
+
+        await self.__flush(key, lambda: self.saver.aput_writes(config, writes, task_id))
+
+    async def aflush(self) -> None:
+        """Waits for every pending write to reach the wrapped saver."""
+
+        await asyncio.gather(*list(self._flush_tails.values()), return_exceptions=True)
+
+    def invalidate(self, thread_id: str | None = None) -> None:
+        """Drops the cached checkpoints of a thread, or of every thread, so they are
+        read from the wrapped saver again. Pending writes are still flushed.
+
+        Args:
+            thread_id (str | None): The thread to drop, or None for every thread.
+        """
+
+        self._invalidations += 1
+        if thread_id is None:
+            self._threads.clear()
+        else:
+            for key in [key for key in self._threads if key[0] == thread_id]:
+                del self._threads[key]
+
+    async def aclear(self) -> None:
+        """Forgets every thread, before the durable checkpoints are deleted.
+
+        Writes not flushed yet are dropped, so they don't bring deleted threads back,
+        and the writes being flushed are waited for.
+        """
+
+        self.invalidate()
+        self._cleared_at = self._invalidations
+        await self.aflush()
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "threads": len(self._threads),
+            "pending_flushes": len(self._flush_tails),
+            "flush_failures": self.flush_failures,
+            "discarded_writes": self.discarded_writes,
+        }
+
+    def __cache(self, key: ThreadKey, thread: HotThread) -> None:
+        backoff_until = self._backoff_until.get(key)
+        if backoff_until is not None:
+            if time.monotonic() < backoff_until:
+                self._threads.pop(key, None)
+
+                return
+
+            del self._backoff_until[key]
+
+        self._threads[key] = thread
+        self._threads.move_to_end(key)
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+
+    def __dump(self, checkpoint_tuple: CheckpointTuple) -> HotThread:
+        return HotThread(
+            config=checkpoint_tuple.config,
+            checkpoint=self.serde.dumps_typed(checkpoint_tuple.checkpoint),
+            metadata=dict(checkpoint_tuple.metadata or {}),
+            parent_config=checkpoint_tuple.parent_config,
+            pending_writes={
+                (task_id, idx): (task_id, channel, self.serde.dumps_typed(value))
+                for idx, (task_id, channel, value) in enumerate(
+                    checkpoint_tuple.pending_writes or []
+                )
+            },
+        )
+
+    def __load(self, thread: HotThread) -> CheckpointTuple:
+        return CheckpointTuple(
+            config=thread.config,
+            checkpoint=self.serde.loads_typed(thread.checkpoint),
+            metadata=dict(thread.metadata),
+            parent_config=thread.parent_config,
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed(value))
+                for task_id, channel, value in thread.pending_writes.values()
+            ],
+        )
+
+    async def __flush(self, key: ThreadKey, write: Callable[[], Awaitable]) -> None:
+        await self._pending_slots.acquire()
+
+        previous = self._flush_tails.get(key)
+        task = asyncio.create_task(
+            self.__write_after(key, previous, write, self._invalidations)
+        )
+        self._flush_tails[key] = task
+        task.add_done_callback(lambda t: self.__on_flushed(key, t))
+
+        if self.durability == "sync":
+            await task
+
+    async def __write_after(
+        self,
+        key: ThreadKey,
+        previous: asyncio.Task | None,
+        write: Callable[[], Awaitable],
+        queued_at: int,
+    ) -> None:
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+
+        if queued_at < self._cleared_at:
+            self.discarded_writes += 1
+
+            return
+
+        try:
+            await write()
+        except Exception as e:
+            # The durable state is now behind: serve the thread from the saver again,
+            # and don't cache it for a while, as the next writes are likely to fail too.
+            self.flush_failures += 1
+            self._threads.pop(key, None)
+            self._backoff_until[key] = (
+                time.monotonic() + self.flush_failure_backoff_seconds
+            )
+            logger.error(f"Failed to flush checkpoint of thread '{key[0]}': {e}")
+
+            raise
+
+    def __on_flushed(self, key: ThreadKey, task: asyncio.Task) -> None:
+        self._pending_slots.release()
+        if not task.cancelled():
+            # Already logged by the task.
+            task.exception()
+        if self._flush_tails.get(key) is task:
+            del self._flush_tails[key]
+
+    async def __wait_flushed(self, key: ThreadKey) -> None:
+        tail = self._flush_tails.get(key)
+        if tail is not None:
+            await asyncio.gather(tail, return_exceptions=True)
+
+
+def get_thread_key(config: RunnableConfig) -> ThreadKey:
+    return (
+        config["configurable"]["thread_id"],
+        config["configurable"].get("checkpoint_ns", ""),
+    )
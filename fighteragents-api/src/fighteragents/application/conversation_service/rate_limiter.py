@@ -0,0 +1,437 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from enum import IntEnum
+from typing import Iterator
+
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables import Runnable, RunnableLambda, RunnablePassthrough
+from loguru import logger
+
+from fighteragents.application.conversation_service.tokens import (
+    count_message_tokens,
+)
+from fighteragents.config import settings
+
+
+class Priority(IntEnum):
+    """Priority of LLM calls waiting for the rate limit. Lower values go first."""
+
+    INTERACTIVE = 0
+    BATCH = 1
+    EVALUATION = 2
+
+
+_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "llm_priority", default=Priority.INTERACTIVE
+)
+
+
+@contextmanager
+def llm_priority(priority: Priority) -> Iterator[None]:
+    """Sets the priority of the LLM calls made inside the block, tasks included."""
+
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an LLM call can't be queued, as the rate limit is saturated.
+
+    Attributes:
+        model_name (str): The rate limited model.
+        retry_after (float): Seconds after which the call is expected to be admitted.
+    """
+
+    def __init__(self, model_name: str, retry_after: float) -> None:
+        self.model_name = model_name
+        self.retry_after = retry_after
+
+        super().__init__(
+            f"Rate limit of model '{model_name}' exceeded. Retry after {math.ceil(retry_after)} seconds."
+        )
+
+
+def find_rate_limit_error(error: BaseException) -> RateLimitExceeded | None:
+    """Finds the rate limit rejection behind an error, such as the `RuntimeError`
+    wrapping workflow failures."""
+
+    while error is not None:
+        if isinstance(error, RateLimitExceeded):
+            return error
+
+        error = error.__cause__ or error.__context__
+
+    return None
+
+
+class TokenBucket:
+    """Refills `capacity` units per minute, continuously.
+
+    Args:
+        capacity (int): Units per minute. 0 means unlimited.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.available = float(capacity)
+        self._refill_rate = capacity / 60
+        self._refilled_at = time.monotonic()
+
+    def get_wait(self, amount: float) -> float:
+        """Returns the seconds until `amount` units are available."""
+
+        if self.capacity == 0:
+            return 0.0
+
+        now = time.monotonic()
+        self.available = min(
+            self.capacity,
+            self.available + (now - self._refilled_at) * self._refill_rate,
+        )
+        self._refilled_at = now
+
+        # A call larger than the whole bucket waits for a full bucket.
+        missing = min(amount, self.capacity) - self.available
+
+        return max(missing / self._refill_rate, 0.0)
+
+    def take(self, amount: float) -> None:
+        if self.capacity > 0:
+            self.available -= min(amount, self.capacity)
+
+
+class _Waiter:
+    """An LLM call waiting for the rate limit, from an event loop or a thread."""
+
+    def __init__(self, priority: Priority, sequence: int, tokens: int) -> None:
+        self.priority = priority
+        self.sequence = sequence
+        self.tokens = tokens
+        self.rejection: RateLimitExceeded | None = None
+
+        try:
+            self._loop: asyncio.AbstractEventLoop | None = asyncio.get_running_loop()
+        except RuntimeError:
+            self._loop = None
+        self._future: asyncio.Future | None = None
+        self._event = threading.Event()
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+    def clear(self) -> None:
+        if self._loop is not None:
+            self._future = self._loop.create_future()
+        else:
+            self._event.clear()
+
+    def wake(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self.__resolve, self._future)
+        else:
+            self._event.set()
+
+    async def wait(self, timeout: float | None) -> None:
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def wait_sync(self, timeout: float | None) -> None:
+        self._event.wait(timeout)
+
+    @staticmethod
+    def __resolve(future: asyncio.Future | None) -> None:
+        if future is not None and not future.done():
+            future.set_result(None)
+
+
+class ModelRateLimiter:
+    """Admission control for the calls to one model, shared by every chain using it.
+
+    Calls take one request and their estimated tokens from two token buckets
+    refilling at the model's requests and tokens per minute. Calls that can't go
+    right away wait in a bounded queue, ordered by `Priority` then arrival, so
+    interactive conversations overtake batch and evaluation traffic. When the queue
+    is full, a call is rejected at once with `RateLimitExceeded`, unless it can take
+    the place of a lower priority call, which is rejected instead.
+
+    The limiter is shared across event loops and threads, so synchronous callers
+    such as the evaluation dataset generator are throttled along with the API.
+
+    Args:
+        model_name (str): The rate limited model.
+        requests_per_minute (int): Allowed requests per minute. 0 means unlimited.
+        tokens_per_minute (int): Allowed tokens per minute. 0 means unlimited.
+        max_queue_size (int): Maximum number of calls waiting at once.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_queue_size: int = 100,
+    ) -> None:
+        self.model_name = model_name
+        self.max_queue_size = max_queue_size
+
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._queue: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+
+    async def acquire(self, tokens: int, priority: Priority | None = None) -> None:
+        """Waits until the call can be sent.
+
+        Args:
+            tokens (int): Estimated tokens of the call, prompt and completion.
+            priority (Priority | None): Defaults to the priority of the context.
+
+        Raises:
+            RateLimitExceeded: If the queue is full.
+        """
+
+        waiter = self.__enqueue(tokens, priority)
+        if waiter is None:
+            return
+
+        start_time = time.monotonic()
+        try:
+            while True:
+                delay = self.__poll(waiter)
+                if delay == 0:
+                    break
+
+                await waiter.wait(delay)
+        except BaseException:
+            self.__dequeue(waiter)
+
+            raise
+        finally:
+            self.wait_seconds_total += time.monotonic() - start_time
+
+    def acquire_sync(self, tokens: int, priority: Priority | None = None) -> None:
+        """Blocking version of `acquire`, for calls made outside an event loop."""
+
+        waiter = self.__enqueue(tokens, priority)
+        if waiter is None:
+            return
+
+        start_time = time.monotonic()
+        try:
+            while True:
+                delay = self.__poll(waiter)
+                if delay == 0:
+                    break
+
+                waiter.wait_sync(delay)
+        except BaseException:
+            self.__dequeue(waiter)
+
+            raise
+        finally:
+            self.wait_seconds_total += time.monotonic() - start_time
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "queued": len(self._queue),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+        }
+
+    def __enqueue(self, tokens: int, priority: Priority | None) -> _Waiter | None:
+        """Admits the call right away, or queues it. Returns None when admitted."""
+
+        priority = _priority.get() if priority is None else priority
+
+        with self._lock:
+            if not self._queue and self.__get_wait(tokens) == 0:
+                self.__take(tokens)
+
+                return None
+
+            if len(self._queue) >= self.max_queue_size:
+                lowest = max(self._queue, default=None)
+                retry_after = self.__get_retry_after(tokens)
+                if lowest is None or lowest.priority <= priority:
+                    self.rejected += 1
+
+                    raise RateLimitExceeded(self.model_name, retry_after)
+
+                # The lowest priority call gives its place to this one.
+                self._queue.remove(lowest)
+                heapq.heapify(self._queue)
+                lowest.rejection = RateLimitExceeded(self.model_name, retry_after)
+                lowest.wake()
+
+            waiter = _Waiter(priority, next(self._sequence), tokens)
+            waiter.clear()
+            heapq.heappush(self._queue, waiter)
+
+            return waiter
+
+    def __poll(self, waiter: _Waiter) -> float | None:
+        """Admits the waiter if it is first in line and the buckets allow it.
+
+        Returns:
+            float | None: 0 if admitted, otherwise how long to wait before polling
+                again, None meaning until woken up.
+
+        Raises:
+            RateLimitExceeded: If the waiter lost its place to a higher priority call.
+        """
+
+        with self._lock:
+            if waiter.rejection is not None:
+                self.rejected += 1
+
+                raise waiter.rejection
+
+            waiter.clear()
+            if self._queue[0] is not waiter:
+                return None
+
+            delay = self.__get_wait(waiter.tokens)
+            if delay > 0:
+                return delay
+
+            heapq.heappop(self._queue)
+            self.__take(waiter.tokens)
+            if self._queue:
+                self._queue[0].wake()
+
+            return 0
+
+    def __dequeue(self, waiter: _Waiter) -> None:
+        with self._lock:
+            if waiter not in self._queue:
+                return
+
+            was_first = self._queue[0] is waiter
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            if was_first and self._queue:
+                self._queue[0].wake()
+
+    def __get_wait(self, tokens: int) -> float:
+        return max(self._requests.get_wait(1), self._tokens.get_wait(tokens))
+
+    def __take(self, tokens: int) -> None:
+        self._requests.take(1)
+        self._tokens.take(tokens)
+        self.admitted += 1
+
+    def __get_retry_after(self, tokens: int) -> float:
+        """Estimates when a new call would be admitted, once the queue has drained."""
+
+        queued_tokens = sum(waiter.tokens for waiter in self._queue) + tokens
+        retry_after = 0.0
+        for bucket, amount in (
+            (self._requests, len(self._queue) + 1),
+            (self._tokens, queued_tokens),
+        ):
+            if bucket.capacity > 0:
+                retry_after = max(
+                    retry_after, (amount - bucket.available) * 60 / bucket.capacity
+                )
+
+        return max(retry_after, 1.0)
+
+
+_limiters: dict[str, ModelRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(model_name: str) -> ModelRateLimiter:
+    """Returns the process-wide rate limiter of a model, sized from settings."""
+
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            requests_per_minute, tokens_per_minute = settings.LLM_RATE_LIMITS.get(
+                model_name,
+                (
+                    settings.LLM_RATE_LIMIT_REQUESTS_PER_MINUTE,
+                    settings.LLM_RATE_LIMIT_TOKENS_PER_MINUTE,
+                ),
+            )
+            limiter = ModelRateLimiter(
+                model_name,
+                requests_per_minute=requests_per_minute,
+                tokens_per_minute=tokens_per_minute,
+                max_queue_size=settings.LLM_RATE_LIMIT_MAX_QUEUE_SIZE,
+            )
+            _limiters[model_name] = limiter
+
+        return limiter
+
+
+def get_rate_limiter_stats() -> dict[str, dict]:
+    """Returns the stats of the rate limiters in use, by model name."""
+
+    with _limiters_lock:
+        limiters = dict(_limiters)
+
+    return {model_name: limiter.stats for model_name, limiter in limiters.items()}
+
+
+def rate_limited(model_name: str) -> Runnable:
+    """Chain step holding a prompt back until the model's rate limit admits it.
+
+    Goes between the prompt and the chat model. The tokens of the call are estimated
+    as the prompt tokens plus `LLM_RATE_LIMIT_COMPLETION_TOKENS`.
+
+    Args:
+        model_name (str): The model the prompt is sent to.
+
+    Returns:
+        Runnable: Passes the prompt through, after waiting for the rate limit.
+    """
+
+    if not settings.LLM_RATE_LIMIT_ENABLED:
+        return RunnablePassthrough()
+
+    limiter = get_rate_limiter(model_name)
+
+    def estimate_tokens(prompt: PromptValue) -> int:
+        return (
+            sum(count_message_tokens(message) for message in prompt.to_messages())
+            + settings.LLM_RATE_LIMIT_COMPLETION_TOKENS
+        )
+
+    def acquire_sync(prompt: PromptValue) -> PromptValue:
+        limiter.acquire_sync(estimate_tokens(prompt))
+
+        return prompt
+
+    async def acquire(prompt: PromptValue) -> PromptValue:
+        tokens = estimate_tokens(prompt)
+        start_time = time.monotonic()
+        await limiter.acquire(tokens)
+
+        wait_seconds = time.monotonic() - start_time
+        if wait_seconds > 1:
+            logger.debug(
+                f"Waited {wait_seconds:.1f} s for the rate limit of '{model_name}'."
+            )
+
+        return prompt
+
+    return RunnableLambda(acquire_sync, afunc=acquire, name="rate_limit")
@@ -1,15 +1,25 @@
 from loguru import logger
 from pymongo import MongoClient
 
+from fighteragents.application.conversation_service.hot_thread_checkpointer import (
+    HotThreadCheckpointSaver,
+)
 from fighteragents.config import settings
 
 
-async def reset_conversation_state() -> dict:
+async def reset_conversation_state(
+    checkpoint_cache: HotThreadCheckpointSaver | None = None,
+) -> dict:
     """Deletes all conversation state data from MongoDB.
 
     This function removes all stored conversation checkpoints and writes,
     effectively resetting all ufcfighter conversations.
 
+    Args:
+        checkpoint_cache (HotThreadCheckpointSaver | None): The in-memory checkpoint
+            cache of the API, cleared first so it neither serves nor flushes back the
+            deleted conversations.
+
     Returns:
         dict: Status message indicating success or failure with details
               about which collections were deleted
@@ -18,6 +28,9 @@ async def reset_conversation_state() -> dict:
         Exception: If there's an error connecting to MongoDB or deleting collections
     """
     try:
+        if checkpoint_cache is not None:
+            await checkpoint_cache.aclear()
+
         client = MongoClient(settings.MONGO_URI)
         db = client[settings.MONGO_DB_NAME]
 
@@ -0,0 +1,288 @@
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import AsyncGenerator
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel, ConfigDict, Field
+
+from fighteragents.config import settings
+
+
+class CachedResponse(BaseModel):
+    """A fighter answer stored in the semantic response cache.
+
+    Args:
+        ufcfighter_id (str): ID of the fighter that gave the answer.
+        query (str): Normalized user query the answer was generated for.
+        embedding (np.ndarray): Unit-norm embedding of the normalized query.
+        response (str): The fighter's answer.
+        created_at (float): Unix timestamp of when the answer was cached.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    ufcfighter_id: str
+    query: str
+    embedding: np.ndarray
+    response: str
+    created_at: float = Field(default_factory=time.time)
+
+
+class SemanticResponseCache:
+    """Replays fighter answers to queries that are near-duplicates of earlier ones.
+
+    Queries are normalized and embedded with the RAG embedding model. A lookup returns
+    the cached answer of the most similar query asked to the same fighter, provided
+    the cosine similarity is above `similarity_threshold`. The in-memory tier is an LRU
+    per fighter whose entries expire after `ttl_seconds`. When a MongoDB collection is
+    given, entries are also written through to it (with a TTL index) and each fighter's
+    entries are loaded from it on first use, so the cache survives restarts.
+
+    Answers are keyed by fighter and query only, so they must not depend on the
+    conversation they were given in: callers only cache the opening turn of a thread.
+
+    Args:
+        embeddings (Embeddings): Model used to embed the queries.
+        similarity_threshold (float): Minimum cosine similarity for a cache hit.
+        ttl_seconds (int): Lifetime of a cached answer.
+        max_entries (int): Maximum number of in-memory entries per fighter.
+        collection (AsyncIOMotorCollection | None): Optional persistent tier.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: int = 86400,
+        max_entries: int = 1024,
+        collection: AsyncIOMotorCollection | None = None,
+    ) -> None:
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.collection = collection
+
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: dict[str, OrderedDict[str, CachedResponse]] = {}
+        self._load_locks: dict[str, asyncio.Lock] = {}
+        self._indexes_created = False
+
+    @classmethod
+    def build_from_settings(
+        cls, embeddings: Embeddings, collection: AsyncIOMotorCollection | None = None
+    ) -> "SemanticResponseCache":
+        return cls(
+            embeddings=embeddings,
+            similarity_threshold=settings.SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS,
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            collection=collection if settings.SEMANTIC_CACHE_PERSISTENT else None,
+        )
+
+    @property
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": sum(len(entries) for entries in self._entries.values()),
+        }
+
+    async def lookup(self, ufcfighter_id: str, query: str) -> str | None:
+        """Returns the cached answer of the closest earlier query, if close enough.
+
+        Args:
+            ufcfighter_id (str): ID of the fighter being asked.
+            query (str): The user query.
+
+        Returns:
+            str | None: The cached answer, or None on a cache miss.
+        """
+
+        normalized_query = normalize_query(query)
+        entries = await self.__get_entries(ufcfighter_id)
+        self.__evict_expired(entries)
+
+        entry = entries.get(normalized_query)
+        if entry is None and entries:
+            embedding = await self.__embed(normalized_query)
+            entry = self.__find_most_similar(entries, embedding)
+
+        if entry is None:
+            self.misses += 1
+
+            return None
+
+        entries.move_to_end(entry.query)
+        self.hits += 1
+        logger.debug(f"Semantic cache hit for '{ufcfighter_id}': '{normalized_query}'")
+
+        return entry.response
+
+    async def store(self, ufcfighter_id: str, query: str, response: str) -> None:
+        """Caches the answer a fighter gave to a query.
+
+        Args:
+            ufcfighter_id (str): ID of the fighter that answered.
+            query (str): The user query.
+            response (str): The fighter's answer.
+        """
+
+        if not response:
+            return
+
+        normalized_query = normalize_query(query)
+        entry = CachedResponse(
+            ufcfighter_id=ufcfighter_id,
+            query=normalized_query,
+            embedding=await self.__embed(normalized_query),
+            response=response,
+        )
+
+        entries = await self.__get_entries(ufcfighter_id)
+        self.__insert(entries, entry)
+
+        if self.collection is not None:
+            await self.collection.update_one(
+                {"ufcfighter_id": ufcfighter_id, "query": normalized_query},
+                {
+                    "$set": {
+                        "embedding": entry.embedding.tolist(),
+                        "response": response,
+                        "created_at": datetime.fromtimestamp(
+                            entry.created_at, tz=timezone.utc
+                        ),
+                    }
+                },
+                upsert=True,
+            )
+
+    def clear(self) -> None:
+        """Drops every in-memory entry. The persistent tier is left untouched."""
+
+        self._entries.clear()
+
+    async def __get_entries(
+        self, ufcfighter_id: str
+    ) -> OrderedDict[str, CachedResponse]:
+        entries = self._entries.get(ufcfighter_id)
+        if entries is not None:
+            return entries
+
+        if self.collection is None:
+            return self._entries.setdefault(ufcfighter_id, OrderedDict())
+
+        # Concurrent first lookups wait for a single load. The entries are only
+        # registered once loaded, so a failed load is retried by the next lookup.
+        async with self._load_locks.setdefault(ufcfighter_id, asyncio.Lock()):
+            entries = self._entries.get(ufcfighter_id)
+            if entries is None:
+                entries = OrderedDict()
+                await self.__load_persisted_entries(ufcfighter_id, entries)
+                self._entries[ufcfighter_id] = entries
+
+        return entries
+
+    async def __load_persisted_entries(
+        self, ufcfighter_id: str, entries: OrderedDict[str, CachedResponse]
+    ) -> None:
+        if not self._indexes_created:
+            await self.collection.create_index(
+                [("ufcfighter_id", 1), ("query", 1)], unique=True
+            )
+            await self.collection.create_index(
+                "created_at", expireAfterSeconds=self.ttl_seconds
+            )
+            self._indexes_created = True
+
+        cursor = self.collection.find(
+            {"ufcfighter_id": ufcfighter_id},
+            sort=[("created_at", 1)],
+        )
+        async for doc in cursor:
+            self.__insert(
+                entries,
+                CachedResponse(
+                    ufcfighter_id=ufcfighter_id,
+                    query=doc["query"],
+                    embedding=np.asarray(doc["embedding"], dtype=np.float32),
+                    response=doc["response"],
+                    created_at=doc["created_at"]
+                    .replace(tzinfo=timezone.utc)
+                    .timestamp(),
+                ),
+            )
+
+        logger.info(
+            f"Loaded {len(entries)} cached response(s) for '{ufcfighter_id}' from MongoDB."
+        )
+
+    def __insert(
+        self, entries: OrderedDict[str, CachedResponse], entry: CachedResponse
+    ) -> None:
+        entries[entry.query] = entry
+        entries.move_to_end(entry.query)
+
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def __evict_expired(self, entries: OrderedDict[str, CachedResponse]) -> None:
+        expired_before = time.time() - self.ttl_seconds
+        expired_queries = [
+            query
+            for query, entry in entries.items()
+            if entry.created_at < expired_before
+        ]
+        for query in expired_queries:
+            del entries[query]
+
+    def __find_most_similar(
+        self, entries: OrderedDict[str, CachedResponse], embedding: np.ndarray
+    ) -> CachedResponse | None:
+        candidates = list(entries.values())
+        similarities = np.stack([entry.embedding for entry in candidates]) @ embedding
+        best_idx = int(np.argmax(similarities))
+
+        if similarities[best_idx] < self.similarity_threshold:
+            return None
+
+        return candidates[best_idx]
+
+    async def __embed(self, text: str) -> np.ndarray:
+        embedding = np.asarray(
+            await self.embeddings.aembed_query(text), dtype=np.float32
+        )
+        norm = np.linalg.norm(embedding)
+
+        return embedding / norm if norm > 0 else embedding
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases a query and collapses its whitespace and trailing punctuation."""
+
+    return re.sub(r"\s+", " ", query).strip().rstrip("?!. ").lower()
+
+
+async def replay_response(response: str) -> AsyncGenerator[str, None]:
+    """Streams a cached answer back word by word, mimicking LLM token chunks.
+
+    Args:
+        response (str): The cached answer.
+
+    Yields:
+        Consecutive chunks of the answer.
+    """
+
+    for chunk in re.findall(r"\s*\S+", response):
+        yield chunk
@@ -0,0 +1,320 @@
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.mongodb.aio import AsyncMongoDBSaver
+from langgraph.graph.state import CompiledStateGraph
+from loguru import logger
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from fighteragents.application.conversation_service.cancellation import (
+    CancellationTracker,
+)
+from fighteragents.application.conversation_service.checkpoint_retention import (
+    CheckpointRetention,
+)
+from fighteragents.application.conversation_service.checkpoint_serde import (
+    CompactCheckpointSerializer,
+)
+from fighteragents.application.conversation_service.checkpoint_storage import (
+    create_checkpoint_indexes,
+)
+from fighteragents.application.conversation_service.hot_thread_checkpointer import (
+    HotThreadCheckpointSaver,
+)
+from fighteragents.application.conversation_service.response_cache import (
+    SemanticResponseCache,
+)
+from fighteragents.application.conversation_service.summarization_worker import (
+    ConversationSummarizer,
+)
+from fighteragents.application.conversation_service.turn_coordinator import (
+    TurnCoordinator,
+)
+from fighteragents.application.conversation_service.workflow.chains import (
+    close_chain_registry,
+)
+from fighteragents.application.conversation_service.workflow.graph import (
+    create_workflow_graph,
+)
+from fighteragents.application.conversation_service.workflow.tools import retriever
+from fighteragents.config import settings
+from fighteragents.infrastructure.metrics import MongoCommandListener
+from fighteragents.infrastructure.tracing import SampledOpikTracer, create_tracer
+
+
+class WorkflowRuntime:
+    """Long-lived resources shared by every conversation turn.
+
+    Owns the pooled MongoDB client backing the LangGraph checkpointer, the workflow
+    graph compiled against that checkpointer and the rendered graph definition
+    attached to Opik traces. Building these once avoids a MongoDB handshake, a graph
+    compilation and a mermaid rendering on every request.
+
+    Args:
+        client (AsyncIOMotorClient): Pooled MongoDB client used by the checkpointer.
+        checkpointer (BaseCheckpointSaver): Checkpointer persisting the conversation state.
+        graph (CompiledStateGraph): Workflow graph compiled with the checkpointer.
+        response_cache (SemanticResponseCache | None): Optional cache of fighter answers.
+        summarizer (ConversationSummarizer | None): Background summarizer, set when the
+            graph defers conversation summarization.
+        retention (CheckpointRetention | None): Scheduled cleanup of old checkpoints.
+    """
+
+    def __init__(
+        self,
+        client: AsyncIOMotorClient,
+        checkpointer: BaseCheckpointSaver,
+        graph: CompiledStateGraph,
+        response_cache: SemanticResponseCache | None = None,
+        summarizer: ConversationSummarizer | None = None,
+        retention: CheckpointRetention | None = None,
+    ) -> None:
+        self.client = client
+        self.checkpointer = checkpointer
+        self.graph = graph
+        self.response_cache = response_cache
+        self.summarizer = summarizer
+        self.retention = retention
+        self.coordinator = TurnCoordinator()
+        self.cancellations = CancellationTracker()
+        self.graph_definition = {
+            "format": "mermaid",
+            "data": graph.get_graph(xray=True).draw_mermaid(),
+        }
+        self.loop = asyncio.get_running_loop()
+
+    @classmethod
+    def build_from_settings(
+        cls,
+        deferred_summarization: bool = False,
+        scheduled_retention: bool = False,
+        checkpointer: BaseCheckpointSaver | None = None,
+    ) -> "WorkflowRuntime":
+        """Creates a runtime bound to the running event loop.
+
+        Args:
+            deferred_summarization (bool): Whether conversations are summarized by
+                background workers. Only long-lived runtimes should enable it, as
+                pending summarizations are dropped when the runtime is closed.
+            scheduled_retention (bool): Whether old checkpoints are periodically
+                deleted while the runtime is open.
+            checkpointer (BaseCheckpointSaver | None): Checkpointer used as is instead
+                of the MongoDB one, such as an in-memory saver for offline runs.
+
+        Returns:
+            WorkflowRuntime: A runtime with its connection pool sized from settings.
+        """
+
+        client = AsyncIOMotorClient(
+            settings.MONGO_URI,
+            appname="fighteragents",
+            maxPoolSize=settings.MONGO_CHECKPOINT_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGO_CHECKPOINT_MIN_POOL_SIZE,
+            event_listeners=[MongoCommandListener()],
+        )
+        if checkpointer is None:
+            checkpointer = AsyncMongoDBSaver(
+                client,
+                db_name=settings.MONGO_DB_NAME,
+                checkpoint_collection_name=settings.MONGO_STATE_CHECKPOINT_COLLECTION,
+                writes_collection_name=settings.MONGO_STATE_WRITES_COLLECTION,
+            )
+            # Installed even with the compact format off, so the checkpoints it wrote
+            # stay readable. The saver's constructor ignores a custom serializer.
+            checkpointer.serde = CompactCheckpointSerializer.build_from_settings()
+            if settings.CHECKPOINT_CACHE_ENABLED:
+                checkpointer = HotThreadCheckpointSaver.build_from_settings(
+                    checkpointer
+                )
+        graph = create_workflow_graph(
+            deferred_summarization=deferred_summarization
+        ).compile(checkpointer=checkpointer)
+
+        response_cache = None
+        if settings.SEMANTIC_CACHE_ENABLED:
+            response_cache = SemanticResponseCache.build_from_settings(
+                embeddings=retriever.vectorstore.embeddings,
+                collection=client[settings.MONGO_DB_NAME][
+                    settings.MONGO_RESPONSE_CACHE_COLLECTION
+                ],
+            )
+
+        summarizer = None
+        if deferred_summarization:
+            summarizer = ConversationSummarizer.build_from_settings(graph)
+            summarizer.start()
+
+        retention = None
+        if scheduled_retention:
+            retention = CheckpointRetention.build_from_settings(
+                client[settings.MONGO_DB_NAME],
+                checkpoint_cache=checkpointer
+                if isinstance(checkpointer, HotThreadCheckpointSaver)
+                else None,
+            )
+            retention.start()
+
+        return cls(client, checkpointer, graph, response_cache, summarizer, retention)
+
+    @asynccontextmanager
+    async def turn(self, thread_id: str) -> AsyncIterator[None]:
+        """Wraps a conversation turn on a thread.
+
+        Waits for the previous turns of the thread and for any background summarization
+        of it before the turn reads its state, and queues the thread for summarization
+        once the turn succeeded.
+
+        Args:
+            thread_id (str): The conversation thread of the turn.
+        """
+
+        async with self.coordinator.lock(thread_id):
+            if self.summarizer is not None:
+                await self.summarizer.wait(thread_id)
+
+            yield
+
+            if self.summarizer is not None:
+                self.summarizer.submit(thread_id)
+
+    def get_tracer(self) -> SampledOpikTracer:
+        """Creates an Opik tracer reusing the cached graph definition, sampled at
+        `OPIK_TRACE_SAMPLE_RATE`.
+
+        Returns:
+            SampledOpikTracer: A tracer for a single graph run.
+        """
+
+        return create_tracer(
+            metadata={"_opik_graph_definition": dict(self.graph_definition)}
+        )
+
+    async def aclose(self) -> None:
+        """Stops the background tasks, flushes pending checkpoints and closes the MongoDB
+        connection pool."""
+
+        if self.retention is not None:
+            await self.retention.stop()
+
+        if self.summarizer is not None:
+            await self.summarizer.stop()
+
+        if isinstance(self.checkpointer, HotThreadCheckpointSaver):
+            await self.checkpointer.aflush()
+
+        self.client.close()
+
+
+_runtime: WorkflowRuntime | None = None
+# Number of open short-lived runtimes per event loop.
+_short_lived_runtimes: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, int]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def start_workflow_runtime(
+    checkpointer: BaseCheckpointSaver | None = None,
+) -> WorkflowRuntime:
+    """Creates the process-wide runtime. Meant to be called once at startup.
+
+    Also makes sure the checkpoint collections are indexed by thread.
+
+    Args:
+        checkpointer (BaseCheckpointSaver | None): Checkpointer used instead of the
+            MongoDB one. Its checkpoints are neither indexed nor cleaned up.
+
+    Returns:
+        WorkflowRuntime: The shared runtime.
+    """
+
+    global _runtime
+
+    if _runtime is None:
+        _runtime = WorkflowRuntime.build_from_settings(
+            deferred_summarization=settings.CONVERSATION_SUMMARY_DEFERRED,
+            scheduled_retention=checkpointer is None
+            and settings.CHECKPOINT_RETENTION_INTERVAL_SECONDS > 0,
+            checkpointer=checkpointer,
+        )
+        if checkpointer is None:
+            await create_checkpoint_indexes(_runtime.client[settings.MONGO_DB_NAME])
+        logger.info(
+            f"Workflow runtime started | checkpoint pool size: {settings.MONGO_CHECKPOINT_MAX_POOL_SIZE}"
+        )
+
+    return _runtime
+
+
+async def stop_workflow_runtime() -> None:
+    """Closes the process-wide runtime. Meant to be called once at shutdown."""
+
+    global _runtime
+
+    if _runtime is not None:
+        await _runtime.aclose()
+        _runtime = None
+        logger.info("Workflow runtime stopped.")
+
+
+def get_shared_workflow_runtime() -> WorkflowRuntime | None:
+    """Returns the process-wide runtime, if started."""
+
+    return _runtime
+
+
+@asynccontextmanager
+async def use_shared_workflow_runtime() -> AsyncIterator[None]:
+    """Shares one runtime across the conversation turns run inside the block.
+
+    Starts the process-wide runtime for the duration of the block when none is
+    running, so batch jobs outside the API don't build a runtime per turn. It is
+    closed on exit, along with the chain registry of the event loop.
+    """
+
+    if _runtime is not None:
+        yield
+
+        return
+
+    await start_workflow_runtime()
+    try:
+        yield
+    finally:
+        await stop_workflow_runtime()
+        await close_chain_registry()
+
+
+@asynccontextmanager
+async def get_workflow_runtime() -> AsyncIterator[WorkflowRuntime]:
+    """Provides the runtime to use for a single conversation turn.
+
+    The shared runtime is used when it was started on the current event loop. Callers
+    running outside the API (CLI tools, evaluation threads with their own event loop)
+    get a short-lived runtime that is closed on exit, as motor clients can't be shared
+    across event loops. The chain registry of the event loop is closed along with its
+    last short-lived runtime, as the loop may not outlive it.
+
+    Yields:
+        WorkflowRuntime: The runtime to run the conversation turn with.
+    """
+
+    loop = asyncio.get_running_loop()
+    if _runtime is not None and _runtime.loop is loop:
+        yield _runtime
+
+        return
+
+    runtime = WorkflowRuntime.build_from_settings()
+    _short_lived_runtimes[loop] = _short_lived_runtimes.get(loop, 0) + 1
+    try:
+        yield runtime
+    finally:
+        await runtime.aclose()
+
+        _short_lived_runtimes[loop] -= 1
+        if not _short_lived_runtimes[loop]:
+            del _short_lived_runtimes[loop]
+            await close_chain_registry()
@@ -0,0 +1,156 @@
+import asyncio
+
+from langgraph.graph.state import CompiledStateGraph
+from loguru import logger
+
+from fighteragents.application.conversation_service.rate_limiter import (
+    Priority,
+    llm_priority,
+)
+from fighteragents.application.conversation_service.workflow.edges import (
+    should_summarize_conversation,
+)
+from fighteragents.application.conversation_service.workflow.nodes import (
+    summarize_conversation_node,
+)
+from fighteragents.config import settings
+
+
+class ConversationSummarizer:
+    """Bounded pool of background workers summarizing conversations off the request path.
+
+    Used with the deferred summarization graph, which ends at `connector_node`. Once a
+    turn is done, its thread is submitted; a worker reloads the thread state, runs
+    `summarize_conversation_node` if the conversation is long enough and writes the
+    summary and `RemoveMessage` deltas back to the thread checkpoint.
+
+    A thread is queued at most once, and the next turn of a thread calls `wait` before
+    reading its state: a summarization that hasn't started yet is dropped (that turn
+    will submit the thread again), while one already running is awaited. A thread's
+    checkpoint is thus never written by a summarization and a turn at the same time.
+
+    Args:
+        graph (CompiledStateGraph): Deferred summarization graph with a checkpointer.
+        workers (int): Number of concurrent summarizations.
+        max_pending (int): Maximum number of queued threads. Submissions beyond it are
+            dropped and retried after the thread's next turn.
+    """
+
+    def __init__(
+        self, graph: CompiledStateGraph, workers: int = 2, max_pending: int = 100
+    ) -> None:
+        self.graph = graph
+        self.workers = workers
+
+        self._queue: asyncio.Queue[str] = asyncio.Queue(maxsize=max_pending)
+        self._pending: set[str] = set()
+        self._running: dict[str, asyncio.Event] = {}
+        self._worker_tasks: list[asyncio.Task] = []
+
+    @classmethod
+    def build_from_settings(cls, graph: CompiledStateGraph) -> "ConversationSummarizer":
+        return cls(
+            graph,
+            workers=settings.CONVERSATION_SUMMARY_WORKERS,
+            max_pending=settings.CONVERSATION_SUMMARY_MAX_PENDING,
+        )
+
+    def start(self) -> None:
+        """Starts the worker tasks on the running event loop."""
+
+        self._worker_tasks = [
+            asyncio.create_task(self.__work(), name=f"conversation-summarizer-{i}")
+            for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """Drops the queued threads and waits for the running summarizations to finish."""
+
+        self._pending.clear()
+        for thread_id in list(self._running):
+            await self.wait(thread_id)
+
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+    def submit(self, thread_id: str) -> bool:
+        """Queues a thread for summarization, unless it is already queued.
+
+        Args:
+            thread_id (str): The conversation thread that just completed a turn.
+
+        Returns:
+            bool: Whether the thread is queued.
+        """
+
+        if thread_id in self._pending:
+            return True
+
+        try:
+            self._queue.put_nowait(thread_id)
+        except asyncio.QueueFull:
+            logger.warning(
+                f"Summarization queue is full. Skipping summarization of thread '{thread_id}'."
+            )
+
+            return False
+
+        self._pending.add(thread_id)
+
+        return True
+
+    async def wait(self, thread_id: str) -> None:
+        """Makes sure no summarization of the thread runs concurrently with the caller.
+
+        Args:
+            thread_id (str): The conversation thread about to be read.
+        """
+
+        self._pending.discard(thread_id)
+
+        running = self._running.get(thread_id)
+        if running is not None:
+            await running.wait()
+
+    async def __work(self) -> None:
+        while True:
+            thread_id = await self._queue.get()
+            try:
+                if thread_id not in self._pending:
+                    continue
+
+                self._pending.discard(thread_id)
+                self._running[thread_id] = asyncio.Event()
+                # No one waits for the summary, so conversations get the rate limit first.
+                with llm_priority(Priority.BATCH):
+                    await self.summarize(thread_id)
+            except Exception as e:
+                logger.error(f"Failed to summarize thread '{thread_id}': {e}")
+            finally:
+                running = self._running.pop(thread_id, None)
+                if running is not None:
+                    running.set()
+                self._queue.task_done()
+
+    async def summarize(self, thread_id: str) -> None:
+        """Summarizes a conversation thread if it is long enough.
+
+        Args:
+            thread_id (str): The conversation thread to summarize.
+        """
+
+        config = {"configurable": {"thread_id": thread_id}}
+        state_snapshot = await self.graph.aget_state(config)
+        state = state_snapshot.values
+
+        if (
+            not state.get("messages")
+            or should_summarize_conversation(state) != "summarize_conversation_node"
+        ):
+            return
+
+        update = await summarize_conversation_node(state)
+        await self.graph.aupdate_state(config, update, as_node="connector_node")
+        logger.debug(f"Summarized conversation thread '{thread_id}'.")
@@ -0,0 +1,133 @@
+import json
+from functools import lru_cache
+
+import tiktoken
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+
+# Fixed cost of the role and delimiters wrapping each message in a chat prompt.
+MESSAGE_TOKEN_OVERHEAD = 4
+
+
+@lru_cache(maxsize=1)
+def get_token_encoder() -> tiktoken.Encoding:
+    """Returns the tokenizer used to budget prompts, the same one as the text splitters."""
+
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def count_text_tokens(text: str) -> int:
+    return len(get_token_encoder().encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: BaseMessage) -> int:
+    """Counts the tokens a message takes in a chat prompt, tool calls included."""
+
+    content = message.content
+    if not isinstance(content, str):
+        content = json.dumps(content)
+
+    num_tokens = MESSAGE_TOKEN_OVERHEAD + count_text_tokens(content)
+    if isinstance(message, AIMessage) and message.tool_calls:
+        num_tokens += count_text_tokens(json.dumps(message.tool_calls))
+
+    return num_tokens
+
+
+def update_message_token_counts(
+    left: dict[str, int], right: dict[str, int | None]
+) -> dict[str, int]:
+    """Reducer of the per-message token counts kept in the state.
+
+    Args:
+        left: Token counts stored in the state, keyed by message ID.
+        right: Counts to add. A None count removes the message from the counts.
+
+    Returns:
+        dict[str, int]: The merged token counts.
+    """
+
+    merged = dict(left or {})
+    for message_id, num_tokens in (right or {}).items():
+        if num_tokens is None:
+            merged.pop(message_id, None)
+        else:
+            merged[message_id] = num_tokens
+
+    return merged
+
+
+def count_new_message_tokens(
+    messages: list[BaseMessage], token_counts: dict[str, int]
+) -> dict[str, int]:
+    """Counts the tokens of the messages that aren't counted yet.
+
+    Args:
+        messages: Messages of the conversation.
+        token_counts: Token counts already stored in the state.
+
+    Returns:
+        dict[str, int]: Token counts of the new messages, keyed by message ID.
+    """
+
+    return {
+        message.id: count_message_tokens(message)
+        for message in messages
+        if message.id not in token_counts
+    }
+
+
+def get_conversation_tokens(
+    messages: list[BaseMessage], token_counts: dict[str, int]
+) -> int:
+    """Sums the tokens of a conversation, counting uncounted messages on the fly."""
+
+    return sum(
+        token_counts[message.id]
+        if message.id in token_counts
+        else count_message_tokens(message)
+        for message in messages
+    )
+
+
+def trim_messages_to_budget(
+    messages: list[BaseMessage], token_counts: dict[str, int], max_tokens: int
+) -> list[BaseMessage]:
+    """Keeps the most recent messages fitting in a token budget.
+
+    The last message is always kept. The trimmed history never starts with a tool
+    result whose tool call was dropped: results of an earlier tool call are dropped
+    along with it, while the results ending the conversation keep their tool call,
+    even over the budget.
+
+    Args:
+        messages: Messages of the conversation.
+        token_counts: Token counts of the messages, keyed by message ID.
+        max_tokens: Token budget of the history.
+
+    Returns:
+        list[BaseMessage]: The trimmed history.
+    """
+
+    num_tokens = 0
+    start = len(messages)
+    while start > 0:
+        message = messages[start - 1]
+        message_tokens = token_counts.get(message.id) or count_message_tokens(message)
+        if num_tokens + message_tokens > max_tokens and start < len(messages):
+            break
+
+        num_tokens += message_tokens
+        start -= 1
+
+    end_of_results = start
+    while end_of_results < len(messages) and isinstance(
+        messages[end_of_results], ToolMessage
+    ):
+        end_of_results += 1
+    if end_of_results < len(messages):
+        start = end_of_results
+    else:
+        while start > 0 and isinstance(messages[start], ToolMessage):
+            start -= 1
+
+    return messages[start:]
@@ -0,0 +1,222 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Hashable
+
+from loguru import logger
+
+
+class Flight:
+    """A conversation turn in flight, shared with the identical requests it absorbs.
+
+    The turn runs in its own task and publishes the streamed chunks and the result;
+    every request waiting on it replays the chunks from the start and gets the same
+    result.
+    """
+
+    def __init__(self) -> None:
+        self.chunks: list[Any] = []
+        self.waiters = 0
+
+        self._result: Any = None
+        self._error: BaseException | None = None
+        self._done = False
+        self._changed = asyncio.Condition()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def start(self, compute: Callable[["Flight"], Awaitable[Any]]) -> asyncio.Task:
+        """Runs the turn in a task, finishing the flight with its result or error.
+
+        Args:
+            compute (Callable[[Flight], Awaitable[Any]]): Runs the turn, publishing its
+                chunks on the flight, and returns its result.
+
+        Returns:
+            asyncio.Task: The task running the turn.
+        """
+
+        self._task = asyncio.create_task(self.__run(compute))
+
+        return self._task
+
+    async def cancel(self) -> None:
+        """Cancels the turn and waits for it to stop."""
+
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def publish(self, chunk: Any) -> None:
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(
+        self, result: Any = None, error: BaseException | None = None
+    ) -> None:
+        async with self._changed:
+            if self._done:
+                return
+
+            self._result = result
+            self._error = error
+            self._done = True
+            self._changed.notify_all()
+
+    async def stream(self) -> AsyncIterator[Any]:
+        """Yields every chunk of the turn, then raises its error if it failed."""
+
+        index = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self._done or index < len(self.chunks)
+                )
+                chunks = self.chunks[index:]
+                done = self._done
+
+            for chunk in chunks:
+                yield chunk
+            index += len(chunks)
+
+            if done and index == len(self.chunks):
+                break
+
+        self.__raise_error()
+
+    async def result(self) -> Any:
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._done)
+
+        self.__raise_error()
+
+        return self._result
+
+    async def __run(self, compute: Callable[["Flight"], Awaitable[Any]]) -> None:
+        try:
+            result = await compute(self)
+        except asyncio.CancelledError as e:
+            await self.finish(error=e)
+
+            raise
+        except Exception as e:
+            # Raised to every waiter instead.
+            await self.finish(error=e)
+        else:
+            await self.finish(result)
+
+    def __raise_error(self) -> None:
+        if isinstance(self._error, (asyncio.CancelledError, GeneratorExit)):
+            raise RuntimeError("The coalesced conversation turn was cancelled.")
+
+        if self._error is not None:
+            raise self._error
+
+
+class TurnCoordinator:
+    """Orders the conversation turns of each thread and coalesces duplicate requests.
+
+    Two turns running concurrently on a thread would read the same parent checkpoint
+    and overwrite each other's messages, so turns hold a per-thread lock. Identical
+    requests arriving while a turn is in flight (retries, double submissions) join it
+    instead of calling the LLM again.
+
+    Locks and flights only live in this process: API replicas need sticky sessions.
+    """
+
+    def __init__(self) -> None:
+        self._locks: dict[str, tuple[asyncio.Lock, list[int]]] = {}
+        self._flights: dict[Hashable, Flight] = {}
+
+        self.coalesced = 0
+        self.lock_waits = 0
+        self.lock_wait_seconds_total = 0.0
+        self.lock_wait_seconds_max = 0.0
+
+    @asynccontextmanager
+    async def lock(self, thread_id: str) -> AsyncIterator[None]:
+        """Holds the thread's lock, waiting for the turns started before.
+
+        Args:
+            thread_id (str): The conversation thread.
+        """
+
+        lock, waiters = self._locks.setdefault(thread_id, (asyncio.Lock(), [0]))
+        waiters[0] += 1
+        try:
+            start_time = time.perf_counter()
+            async with lock:
+                self.__record_lock_wait(thread_id, time.perf_counter() - start_time)
+
+                yield
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0:
+                del self._locks[thread_id]
+
+    @asynccontextmanager
+    async def singleflight(
+        self, key: Hashable, compute: Callable[[Flight], Awaitable[Any]]
+    ) -> AsyncIterator[Flight]:
+        """Joins the flight of an identical request, or starts one running `compute`.
+
+        The turn runs in its own task rather than in the request that started it, so
+        that request leaving, e.g. on a client disconnect, doesn't fail the others.
+        The turn is only cancelled once every request waiting on it has left.
+
+        Args:
+            key (Hashable): Identifies identical requests, including their thread.
+            compute (Callable[[Flight], Awaitable[Any]]): Runs the turn, publishing its
+                chunks on the flight, and returns its result.
+
+        Yields:
+            Flight: The flight to read the chunks or the result from.
+        """
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = Flight()
+            self._flights[key] = flight
+            flight.start(compute).add_done_callback(
+                lambda _: self.__forget_flight(key, flight)
+            )
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            yield flight
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.done:
+                self.__forget_flight(key, flight)
+                await flight.cancel()
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "locked_threads": len(self._locks),
+            "flights": len(self._flights),
+            "coalesced": self.coalesced,
+            "lock_waits": self.lock_waits,
+            "lock_wait_seconds_total": self.lock_wait_seconds_total,
+            "lock_wait_seconds_max": self.lock_wait_seconds_max,
+        }
+
+    def __forget_flight(self, key: Hashable, flight: Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def __record_lock_wait(self, thread_id: str, wait_seconds: float) -> None:
+        self.lock_waits += 1
+        self.lock_wait_seconds_total += wait_seconds
+        self.lock_wait_seconds_max = max(self.lock_wait_seconds_max, wait_seconds)
+
+        if wait_seconds > 0.001:
+            logger.debug(
+                f"Waited {wait_seconds * 1000:.0f} ms for the previous turn of thread '{thread_id}'."
+            )
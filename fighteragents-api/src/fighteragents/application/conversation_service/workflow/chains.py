@@ -1,6 +1,19 @@
+import asyncio
+import weakref
+from typing import Callable, Hashable
+
+import httpx
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import Runnable
 from langchain_groq import ChatGroq
 
+from fighteragents.application.conversation_service.rate_limiter import (
+    rate_limited,
+)
+from fighteragents.application.conversation_service.workflow.hedging import (
+    HedgedResponseChain,
+    get_hedging_policy,
+)
 from fighteragents.application.conversation_service.workflow.tools import tools
 from fighteragents.config import settings
 from fighteragents.domain.prompts import (
@@ -11,16 +24,190 @@ from fighteragents.domain.prompts import (
 )
 
 
-def get_chat_model(temperature: float = 0.7, model_name: str = settings.GROQ_LLM_MODEL) -> ChatGroq:
+class ChainRegistry:
+    """Cache of built chains sharing one pooled keep-alive HTTP client per provider.
+
+    Chains are keyed by everything that changes how they are built (chain kind, model
+    name, temperature, summary mode), so a graph step only pays a dictionary lookup
+    instead of creating a new chat model client, binding tools and parsing the jinja2
+    prompt. HTTP connection pools are bound to the event loop they were opened on,
+    hence there is one registry per event loop (see `get_chain_registry`).
+    """
+
+    def __init__(self) -> None:
+        self._chains: dict[Hashable, Runnable] = {}
+        self._http_clients: dict[str, httpx.AsyncClient] = {}
+
+    def get_http_client(self, provider: str) -> httpx.AsyncClient:
+        """Returns the pooled HTTP client of a provider, creating it on first use.
+
+        Args:
+            provider (str): Name of the LLM provider (e.g. "groq").
+
+        Returns:
+            httpx.AsyncClient: Keep-alive client shared by every chain of the provider.
+        """
+
+        if provider not in self._http_clients:
+            self._http_clients[provider] = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+                ),
+                timeout=httpx.Timeout(settings.LLM_HTTP_TIMEOUT),
+            )
+
+        return self._http_clients[provider]
+
+    def get_or_create(self, key: Hashable, factory: Callable[[], Runnable]) -> Runnable:
+        """Returns the chain registered under `key`, building it with `factory` if missing.
+
+        Args:
+            key (Hashable): Identifier of the chain configuration.
+            factory (Callable[[], Runnable]): Builds the chain on a cache miss.
+
+        Returns:
+            Runnable: The cached chain.
+        """
+
+        chain = self._chains.get(key)
+        if chain is None:
+            chain = factory()
+            self._chains[key] = chain
+
+        return chain
+
+    def __len__(self) -> int:
+        return len(self._chains)
+
+    async def aclose(self) -> None:
+        """Drops every cached chain and closes the pooled HTTP clients."""
+
+        self._chains.clear()
+        for http_client in self._http_clients.values():
+            await http_client.aclose()
+        self._http_clients.clear()
+
+
+_registries: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ChainRegistry]" = (
+    weakref.WeakKeyDictionary()
+)
+_sync_registry = ChainRegistry()
+
+
+def get_chain_registry() -> ChainRegistry:
+    """Returns the chain registry of the running event loop.
+
+    Outside of an event loop, a process-wide registry whose chat models use the
+    provider's default HTTP client is returned.
+
+    Returns:
+        ChainRegistry: The registry to get chains from.
+    """
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _sync_registry
+
+    registry = _registries.get(loop)
+    if registry is None:
+        registry = ChainRegistry()
+        _registries[loop] = registry
+
+    return registry
+
+
+async def close_chain_registry() -> None:
+    """Closes the chain registry of the running event loop, if any."""
+
+    registry = _registries.pop(asyncio.get_running_loop(), None)
+    if registry is not None:
+        await registry.aclose()
+
+
+def get_chat_model(
+    temperature: float = 0.7,
+    model_name: str = settings.GROQ_LLM_MODEL,
+    http_async_client: httpx.AsyncClient | None = None,
+    streaming: bool = False,
+) -> ChatGroq:
     return ChatGroq(
         api_key=settings.GROQ_API_KEY,
         model_name=model_name,
         temperature=temperature,
+        http_async_client=http_async_client,
+        streaming=streaming,
+    )
+
+
+def get_ufcfighter_response_chain(
+    model_name: str = settings.GROQ_LLM_MODEL, temperature: float = 0.7
+):
+    registry = get_chain_registry()
+
+    if settings.LLM_HEDGING_ENABLED and model_name != settings.GROQ_LLM_MODEL_FALLBACK:
+        return registry.get_or_create(
+            ("hedged_ufcfighter_response", model_name, temperature),
+            lambda: build_hedged_ufcfighter_response_chain(
+                model_name,
+                settings.GROQ_LLM_MODEL_FALLBACK,
+                temperature,
+                _get_groq_http_client(registry),
+            ),
+        )
+
+    return registry.get_or_create(
+        ("ufcfighter_response", model_name, temperature),
+        lambda: build_ufcfighter_response_chain(
+            model_name, temperature, _get_groq_http_client(registry)
+        ),
+    )
+
+
+def get_conversation_summary_chain(
+    summary: str = "",
+    model_name: str = settings.GROQ_LLM_MODEL_SUMMARY,
+    temperature: float = 0.7,
+):
+    registry = get_chain_registry()
+    extend_summary = bool(summary)
+
+    return registry.get_or_create(
+        ("conversation_summary", model_name, temperature, extend_summary),
+        lambda: build_conversation_summary_chain(
+            extend_summary, model_name, temperature, _get_groq_http_client(registry)
+        ),
+    )
+
+
+def get_context_summary_chain(
+    model_name: str = settings.GROQ_LLM_MODEL_CONTEXT_SUMMARY,
+    temperature: float = 0.7,
+):
+    registry = get_chain_registry()
+
+    return registry.get_or_create(
+        ("context_summary", model_name, temperature),
+        lambda: build_context_summary_chain(
+            model_name, temperature, _get_groq_http_client(registry)
+        ),
     )
 
 
-def get_ufcfighter_response_chain():
-    model = get_chat_model()
+def build_ufcfighter_response_chain(
+    model_name: str = settings.GROQ_LLM_MODEL,
+    temperature: float = 0.7,
+    http_async_client: httpx.AsyncClient | None = None,
+    streaming: bool = False,
+):
+    model = get_chat_model(
+        temperature=temperature,
+        model_name=model_name,
+        http_async_client=http_async_client,
+        streaming=streaming,
+    )
     model = model.bind_tools(tools)
     system_message = FIGHTER_CHARACTER_CARD
 
@@ -32,13 +219,40 @@ def get_ufcfighter_response_chain():
         template_format="jinja2",
     )
 
-    return prompt | model
+    return prompt | rate_limited(model_name) | model
+
 
+def build_hedged_ufcfighter_response_chain(
+    model_name: str = settings.GROQ_LLM_MODEL,
+    fallback_model_name: str = settings.GROQ_LLM_MODEL_FALLBACK,
+    temperature: float = 0.7,
+    http_async_client: httpx.AsyncClient | None = None,
+) -> HedgedResponseChain:
+    # Both models stream, so their first token is observed when the graph is invoked.
+    return HedgedResponseChain(
+        primary=build_ufcfighter_response_chain(
+            model_name, temperature, http_async_client, streaming=True
+        ),
+        fallback=build_ufcfighter_response_chain(
+            fallback_model_name, temperature, http_async_client, streaming=True
+        ),
+        policy=get_hedging_policy(model_name, fallback_model_name),
+    )
 
-def get_conversation_summary_chain(summary: str = ""):
-    model = get_chat_model(model_name=settings.GROQ_LLM_MODEL_SUMMARY)
 
-    summary_message = EXTEND_SUMMARY_PROMPT if summary else SUMMARY_PROMPT
+def build_conversation_summary_chain(
+    extend_summary: bool = False,
+    model_name: str = settings.GROQ_LLM_MODEL_SUMMARY,
+    temperature: float = 0.7,
+    http_async_client: httpx.AsyncClient | None = None,
+):
+    model = get_chat_model(
+        temperature=temperature,
+        model_name=model_name,
+        http_async_client=http_async_client,
+    )
+
+    summary_message = EXTEND_SUMMARY_PROMPT if extend_summary else SUMMARY_PROMPT
 
     prompt = ChatPromptTemplate.from_messages(
         [
@@ -48,11 +262,19 @@ def get_conversation_summary_chain(summary: str = ""):
         template_format="jinja2",
     )
 
-    return prompt | model
+    return prompt | rate_limited(model_name) | model
 
 
-def get_context_summary_chain():
-    model = get_chat_model(model_name=settings.GROQ_LLM_MODEL_CONTEXT_SUMMARY)
+def build_context_summary_chain(
+    model_name: str = settings.GROQ_LLM_MODEL_CONTEXT_SUMMARY,
+    temperature: float = 0.7,
+    http_async_client: httpx.AsyncClient | None = None,
+):
+    model = get_chat_model(
+        temperature=temperature,
+        model_name=model_name,
+        http_async_client=http_async_client,
+    )
     prompt = ChatPromptTemplate.from_messages(
         [
             ("human", CONTEXT_SUMMARY_PROMPT.prompt),
@@ -60,4 +282,11 @@ def get_context_summary_chain():
         template_format="jinja2",
     )
 
-    return prompt | model
\ No newline at end of file
+    return prompt | rate_limited(model_name) | model
+
+
+def _get_groq_http_client(registry: ChainRegistry) -> httpx.AsyncClient | None:
+    if registry is _sync_registry:
+        return None
+
+    return registry.get_http_client("groq")
@@ -2,7 +2,12 @@ from typing_extensions import Literal
 
 from langgraph.graph import END
 
-from fighteragents.application.conversation_service.workflow.state import UFCFighterState
+from fighteragents.application.conversation_service.tokens import (
+    get_conversation_tokens,
+)
+from fighteragents.application.conversation_service.workflow.state import (
+    UFCFighterState,
+)
 from fighteragents.config import settings
 
 
@@ -11,7 +16,19 @@ def should_summarize_conversation(
 ) -> Literal["summarize_conversation_node", "__end__"]:
     messages = state["messages"]
 
+    if len(messages) <= settings.TOTAL_MESSAGES_AFTER_SUMMARY:
+        return END
+
     if len(messages) > settings.TOTAL_MESSAGES_SUMMARY_TRIGGER:
         return "summarize_conversation_node"
 
+    # Only the messages a summarization removes count, as the kept ones alone may be
+    # over the trigger, e.g. after a long paste, and would trigger it on every turn.
+    removed_tokens = get_conversation_tokens(
+        messages[: -settings.TOTAL_MESSAGES_AFTER_SUMMARY],
+        state.get("message_token_counts", {}),
+    )
+    if removed_tokens > settings.CONVERSATION_SUMMARY_TOKEN_TRIGGER:
+        return "summarize_conversation_node"
+
     return END
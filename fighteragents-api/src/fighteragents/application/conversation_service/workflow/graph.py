@@ -8,41 +8,76 @@ from fighteragents.application.conversation_service.workflow.edges import (
 )
 from fighteragents.application.conversation_service.workflow.nodes import (
     conversation_node,
+    eager_retrieval_node,
     summarize_conversation_node,
     retriever_node,
+    precomputed_summary_retriever_node,
     summarize_context_node,
     connector_node,
 )
-from fighteragents.application.conversation_service.workflow.state import UFCFighterState
+from fighteragents.application.conversation_service.workflow.state import (
+    UFCFighterState,
+)
+from fighteragents.config import settings
 
 
-@lru_cache(maxsize=1)
-def create_workflow_graph():
+@lru_cache(maxsize=4)
+def create_workflow_graph(
+    precomputed_context_summaries: bool = settings.RAG_PRECOMPUTED_CONTEXT_SUMMARIES,
+    deferred_summarization: bool = False,
+    eager_retrieval: bool = settings.RAG_EAGER_RETRIEVAL,
+):
     graph_builder = StateGraph(UFCFighterState)
 
     # Add all nodes
+    if eager_retrieval:
+        # The context of knowledge questions is retrieved before the first response
+        # call, saving the LLM round trip deciding on the tool call. The tool call
+        # path stays available for the turns the classifier misses.
+        graph_builder.add_node("eager_retrieval_node", eager_retrieval_node)
     graph_builder.add_node("conversation_node", conversation_node)
-    graph_builder.add_node("retrieve_ufcfighter_context", retriever_node)
-    graph_builder.add_node("summarize_conversation_node", summarize_conversation_node)
-    graph_builder.add_node("summarize_context_node", summarize_context_node)
     graph_builder.add_node("connector_node", connector_node)
+    if not deferred_summarization:
+        graph_builder.add_node(
+            "summarize_conversation_node", summarize_conversation_node
+        )
+    if precomputed_context_summaries:
+        # The retriever returns the chunk summaries computed at ingestion time,
+        # so the context summary LLM call is skipped.
+        graph_builder.add_node(
+            "retrieve_ufcfighter_context", precomputed_summary_retriever_node
+        )
+    else:
+        graph_builder.add_node("retrieve_ufcfighter_context", retriever_node)
+        graph_builder.add_node("summarize_context_node", summarize_context_node)
 
     # Define the flow
-    graph_builder.add_edge(START, "conversation_node")
+    if eager_retrieval:
+        graph_builder.add_edge(START, "eager_retrieval_node")
+        graph_builder.add_edge("eager_retrieval_node", "conversation_node")
+    else:
+        graph_builder.add_edge(START, "conversation_node")
     graph_builder.add_conditional_edges(
         "conversation_node",
         tools_condition,
-        {
-            "tools": "retrieve_ufcfighter_context",
-            END: "connector_node"
-        }
+        {"tools": "retrieve_ufcfighter_context", END: "connector_node"},
     )
-    graph_builder.add_edge("retrieve_ufcfighter_context", "summarize_context_node")
-    graph_builder.add_edge("summarize_context_node", "conversation_node")
-    graph_builder.add_conditional_edges("connector_node", should_summarize_conversation)
-    graph_builder.add_edge("summarize_conversation_node", END)
+    if precomputed_context_summaries:
+        graph_builder.add_edge("retrieve_ufcfighter_context", "conversation_node")
+    else:
+        graph_builder.add_edge("retrieve_ufcfighter_context", "summarize_context_node")
+        graph_builder.add_edge("summarize_context_node", "conversation_node")
+    if deferred_summarization:
+        # The conversation is summarized in the background by a ConversationSummarizer.
+        graph_builder.add_edge("connector_node", END)
+    else:
+        graph_builder.add_conditional_edges(
+            "connector_node", should_summarize_conversation
+        )
+        graph_builder.add_edge("summarize_conversation_node", END)
 
     return graph_builder
 
+
 # Compiled without a checkpointer. Used for LangGraph Studio
 graph = create_workflow_graph().compile()
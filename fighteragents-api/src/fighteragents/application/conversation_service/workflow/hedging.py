@@ -0,0 +1,349 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.runnables import Runnable, RunnableConfig, ensure_config
+from loguru import logger
+
+from fighteragents.config import settings
+
+
+class LatencyTracker:
+    """Recent time-to-first-token samples of each model.
+
+    Args:
+        window (int): Number of samples kept per model.
+    """
+
+    def __init__(self, window: int = 500) -> None:
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_name: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(model_name, deque(maxlen=self.window))
+            samples.append(seconds)
+
+    def get_percentile(self, model_name: str, percentile: float) -> float | None:
+        """Returns the latency percentile of a model, or None without samples."""
+
+        with self._lock:
+            samples = sorted(self._samples.get(model_name, ()))
+
+        if not samples:
+            return None
+
+        return samples[min(int(percentile * len(samples)), len(samples) - 1)]
+
+    def count(self, model_name: str) -> int:
+        return len(self._samples.get(model_name, ()))
+
+
+class HedgingPolicy:
+    """When the response chain sends a hedge request to its fallback model.
+
+    The deadline is the `percentile` time to first token of the primary model over
+    its recent calls, or `default_deadline_seconds` until `min_samples` calls were
+    measured. Hedges are capped to `max_ratio` of the last `budget_window` primary
+    calls and to `max_in_flight` at once, so a slow provider doesn't double the
+    traffic. The window keeps quiet periods from banking a burst of hedges.
+
+    Args:
+        primary_model (str): Model answering the conversation.
+        fallback_model (str): Faster model racing the primary one when it is late.
+        tracker (LatencyTracker): Latencies of both models.
+        percentile (float): Percentile of the primary latencies used as deadline.
+        min_samples (int): Samples needed before the percentile is trusted.
+        default_deadline_seconds (float): Deadline until then.
+        min_deadline_seconds (float): Lower bound of the deadline.
+        max_ratio (float): Maximum hedges per primary call.
+        budget_window (int): Number of recent primary calls `max_ratio` applies to.
+        max_in_flight (int): Maximum concurrent hedges.
+    """
+
+    def __init__(
+        self,
+        primary_model: str,
+        fallback_model: str,
+        tracker: LatencyTracker,
+        percentile: float = 0.95,
+        min_samples: int = 20,
+        default_deadline_seconds: float = 1.5,
+        min_deadline_seconds: float = 0.2,
+        max_ratio: float = 0.1,
+        budget_window: int = 100,
+        max_in_flight: int = 8,
+    ) -> None:
+        self.primary_model = primary_model
+        self.fallback_model = fallback_model
+        self.tracker = tracker
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_deadline_seconds = default_deadline_seconds
+        self.min_deadline_seconds = min_deadline_seconds
+        self.max_ratio = max_ratio
+        self.budget_window = budget_window
+        self.max_in_flight = max_in_flight
+
+        self.calls = 0
+        self.hedges = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+        self._in_flight = 0
+        # Number of the primary call each recent hedge was sent for.
+        self._recent_hedges: deque[int] = deque()
+
+    def get_deadline(self) -> float:
+        """Returns the seconds to wait for the primary first token before hedging."""
+
+        deadline = None
+        if self.tracker.count(self.primary_model) >= self.min_samples:
+            deadline = self.tracker.get_percentile(self.primary_model, self.percentile)
+
+        return max(
+            deadline if deadline is not None else self.default_deadline_seconds,
+            self.min_deadline_seconds,
+        )
+
+    def try_start_hedge(self) -> bool:
+        """Reserves a hedge within the budget. Must be followed by `finish_hedge`."""
+
+        while (
+            self._recent_hedges
+            and self._recent_hedges[0] <= self.calls - self.budget_window
+        ):
+            self._recent_hedges.popleft()
+
+        budget = self.max_ratio * min(self.calls, self.budget_window)
+        if (
+            self._in_flight >= self.max_in_flight
+            or len(self._recent_hedges) + 1 > budget
+        ):
+            self.hedges_skipped += 1
+
+            return False
+
+        self.hedges += 1
+        self._in_flight += 1
+        self._recent_hedges.append(self.calls)
+
+        return True
+
+    def finish_hedge(self, won: bool) -> None:
+        self._in_flight -= 1
+        if won:
+            self.hedges_won += 1
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "hedges_skipped": self.hedges_skipped,
+            "deadline_seconds": self.get_deadline(),
+            "primary_latency_p50_seconds": self.tracker.get_percentile(
+                self.primary_model, 0.5
+            ),
+            "fallback_latency_p50_seconds": self.tracker.get_percentile(
+                self.fallback_model, 0.5
+            ),
+        }
+
+
+class _Race:
+    """Candidate calls of a hedged invocation. The first to stream a token wins."""
+
+    def __init__(self, tracker: LatencyTracker) -> None:
+        self.tracker = tracker
+        self.tasks: dict[str, asyncio.Task] = {}
+        self.winner: str | None = None
+        self.decided = asyncio.get_running_loop().create_future()
+        self._start_times: dict[str, float] = {}
+
+    def start(
+        self, model_name: str, chain: Runnable, input: Any, config: RunnableConfig
+    ) -> asyncio.Task:
+        self._start_times[model_name] = time.perf_counter()
+        self.tasks[model_name] = asyncio.create_task(
+            chain.ainvoke(input, self.__with_first_token_handler(config, model_name))
+        )
+
+        return self.tasks[model_name]
+
+    def declare_winner(self, model_name: str) -> None:
+        """Makes a candidate win, cancelling the others at once.
+
+        Called from the token callback, so a losing call can't emit a single token
+        into the graph stream after the winner's first one.
+        """
+
+        if self.winner is not None:
+            return
+
+        self.winner = model_name
+        self.tracker.record(
+            model_name, time.perf_counter() - self._start_times[model_name]
+        )
+        for other_name, task in self.tasks.items():
+            if other_name != model_name and not task.done():
+                # The loser was at least this slow, which keeps the deadline honest.
+                self.tracker.record(
+                    other_name, time.perf_counter() - self._start_times[other_name]
+                )
+                task.cancel()
+
+        if not self.decided.done():
+            self.decided.set_result(model_name)
+
+    async def cancel(self) -> None:
+        for task in self.tasks.values():
+            task.cancel()
+        await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    def __with_first_token_handler(
+        self, config: RunnableConfig | None, model_name: str
+    ) -> RunnableConfig:
+        handler = _FirstTokenHandler(self, model_name)
+        config = ensure_config(config)
+        callbacks = config.get("callbacks")
+        if isinstance(callbacks, BaseCallbackManager):
+            callbacks = callbacks.copy()
+            callbacks.add_handler(handler, inherit=True)
+        else:
+            callbacks = [*(callbacks or []), handler]
+
+        return {**config, "callbacks": callbacks}
+
+
+class _FirstTokenHandler(BaseCallbackHandler):
+    # Runs within the model's stream rather than in a thread pool, see `_Race`.
+    run_inline = True
+
+    def __init__(self, race: _Race, model_name: str) -> None:
+        self.race = race
+        self.model_name = model_name
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self.race.winner is None:
+            self.race.declare_winner(self.model_name)
+
+
+class HedgedResponseChain:
+    """Response chain racing a faster fallback model when the primary one is late.
+
+    The primary chain is called first. If its first token hasn't arrived by the
+    policy's deadline, and the hedge budget allows it, the fallback chain is called
+    too. The first chain to stream a token answers, and the other one is cancelled.
+    Once hedged, a chain failing before its first token leaves the answer to the
+    other one.
+
+    Both chains must stream, so their time to first token is observed even when the
+    graph is invoked rather than streamed.
+
+    Args:
+        primary (Runnable): Chain of the primary model.
+        fallback (Runnable): Chain of the fallback model.
+        policy (HedgingPolicy): Deadline and budget of the hedges.
+    """
+
+    def __init__(
+        self, primary: Runnable, fallback: Runnable, policy: HedgingPolicy
+    ) -> None:
+        self.primary = primary
+        self.fallback = fallback
+        self.policy = policy
+
+    def invoke(self, input: Any, config: RunnableConfig | None = None) -> Any:
+        return self.primary.invoke(input, config)
+
+    async def ainvoke(self, input: Any, config: RunnableConfig | None = None) -> Any:
+        policy = self.policy
+        policy.calls += 1
+
+        race = _Race(policy.tracker)
+        primary = race.start(policy.primary_model, self.primary, input, config)
+        hedged = False
+        try:
+            await asyncio.wait({primary, race.decided}, timeout=policy.get_deadline())
+            if race.decided.done() or primary.done():
+                return await primary
+
+            hedged = policy.try_start_hedge()
+            if not hedged:
+                return await primary
+
+            logger.debug(
+                f"No first token from '{policy.primary_model}' after {policy.get_deadline():.2f} s. Hedging with '{policy.fallback_model}'."
+            )
+            race.start(policy.fallback_model, self.fallback, input, config)
+
+            return await self.__get_winner_result(race)
+        finally:
+            if hedged:
+                policy.finish_hedge(won=race.winner == policy.fallback_model)
+            await race.cancel()
+
+    async def __get_winner_result(self, race: _Race) -> Any:
+        pending = set(race.tasks.values())
+        errors: dict[str, BaseException] = {}
+        while pending:
+            done, pending = await asyncio.wait(
+                pending | {race.decided}, return_when=asyncio.FIRST_COMPLETED
+            )
+            pending.discard(race.decided)
+
+            if race.decided.done():
+                return await race.tasks[race.winner]
+
+            for model_name, task in race.tasks.items():
+                if task not in done:
+                    continue
+
+                if task.exception() is not None:
+                    errors[model_name] = task.exception()
+                    continue
+
+                # Finished without streaming: the chain answered in one go.
+                race.declare_winner(model_name)
+
+                return task.result()
+
+        # Both failed: report the primary model's error.
+        raise errors.get(self.policy.primary_model) or next(iter(errors.values()))
+
+
+_policies: dict[tuple[str, str], HedgingPolicy] = {}
+_tracker = LatencyTracker()
+
+
+def get_hedging_policy(primary_model: str, fallback_model: str) -> HedgingPolicy:
+    """Returns the process-wide hedging policy of a model pair, sized from settings."""
+
+    key = (primary_model, fallback_model)
+    if key not in _policies:
+        _policies[key] = HedgingPolicy(
+            primary_model,
+            fallback_model,
+            _tracker,
+            percentile=settings.LLM_HEDGING_PERCENTILE,
+            min_samples=settings.LLM_HEDGING_MIN_SAMPLES,
+            default_deadline_seconds=settings.LLM_HEDGING_DEFAULT_DEADLINE_SECONDS,
+            min_deadline_seconds=settings.LLM_HEDGING_MIN_DEADLINE_SECONDS,
+            max_ratio=settings.LLM_HEDGING_MAX_RATIO,
+            budget_window=settings.LLM_HEDGING_BUDGET_WINDOW,
+            max_in_flight=settings.LLM_HEDGING_MAX_IN_FLIGHT,
+        )
+
+    return _policies[key]
+
+
+def get_hedging_stats() -> dict[tuple[str, str], dict]:
+    """Returns the stats of the hedging policies in use, by primary and fallback
+    model."""
+
+    return {key: policy.stats for key, policy in list(_policies.items())}
@@ -1,26 +1,83 @@
-from langchain_core.messages import RemoveMessage
+import uuid
+
+from langchain_core.messages import AIMessage, BaseMessage, RemoveMessage, ToolMessage
 from langchain_core.runnables import RunnableConfig
 from langgraph.prebuilt import ToolNode
 
+from fighteragents.application.conversation_service.tokens import (
+    count_new_message_tokens,
+    trim_messages_to_budget,
+)
 from fighteragents.application.conversation_service.workflow.chains import (
     get_context_summary_chain,
     get_conversation_summary_chain,
     get_ufcfighter_response_chain,
 )
-from fighteragents.application.conversation_service.workflow.state import UFCFighterState
-from fighteragents.application.conversation_service.workflow.tools import tools
+from fighteragents.application.conversation_service.workflow.router import (
+    needs_retrieval,
+    select_response_model,
+)
+from fighteragents.application.conversation_service.workflow.state import (
+    UFCFighterState,
+)
+from fighteragents.application.conversation_service.workflow.tools import (
+    precomputed_summary_retriever_tool,
+    retriever_tool,
+    tools,
+)
 from fighteragents.config import settings
 
 retriever_node = ToolNode(tools)
+precomputed_summary_retriever_node = ToolNode([precomputed_summary_retriever_tool])
+
+
+async def eager_retrieval_node(state: UFCFighterState, config: RunnableConfig):
+    """Retrieves the fighter's context before the first response call, when the last
+    user message needs it.
+
+    The retrieval is recorded as a tool call of the fighter followed by its result,
+    as if the conversation node had asked for it, so the response call answers from
+    the context right away. Retrieved chunks aren't summarized on this path, unless
+    they were at ingestion.
+    """
+
+    if not needs_retrieval(state["messages"]):
+        return {}
+
+    tool = (
+        precomputed_summary_retriever_tool
+        if settings.RAG_PRECOMPUTED_CONTEXT_SUMMARIES
+        else retriever_tool
+    )
+    query = f"{state['ufcfighter_name']} {state['messages'][-1].content}"
+    tool_call = {
+        "name": tool.name,
+        "args": {"query": query},
+        "id": f"eager_{uuid.uuid4().hex}",
+        "type": "tool_call",
+    }
+    tool_message = await tool.ainvoke(tool_call, config)
+
+    return {"messages": [AIMessage(content="", tool_calls=[tool_call]), tool_message]}
 
 
 async def conversation_node(state: UFCFighterState, config: RunnableConfig):
     summary = state.get("summary", "")
-    conversation_chain = get_ufcfighter_response_chain()
+    model_name = await select_response_model(state["messages"])
+    conversation_chain = get_ufcfighter_response_chain(model_name=model_name)
+
+    new_token_counts = count_new_message_tokens(
+        state["messages"], state.get("message_token_counts", {})
+    )
+    messages = trim_messages_to_budget(
+        state["messages"],
+        {**state.get("message_token_counts", {}), **new_token_counts},
+        max_tokens=settings.CONVERSATION_TOKEN_BUDGET,
+    )
 
     response = await conversation_chain.ainvoke(
         {
-            "messages": state["messages"],
+            "messages": messages,
             "ufcfighter_context": state["ufcfighter_context"],
             "ufcfighter_name": state["ufcfighter_name"],
             "ufcfighter_perspective": state["ufcfighter_perspective"],
@@ -29,27 +86,40 @@ async def conversation_node(state: UFCFighterState, config: RunnableConfig):
         },
         config,
     )
+    # Tells which model answered, as routed turns may use the small one.
+    response.response_metadata.setdefault("model_name", model_name)
 
-    return {"messages": response}
+    return {"messages": response, "message_token_counts": new_token_counts}
 
 
 async def summarize_conversation_node(state: UFCFighterState):
     summary = state.get("summary", "")
-    summary_chain = get_conversation_summary_chain(summary)
-
-    response = await summary_chain.ainvoke(
-        {
-            "messages": state["messages"],
-            "ufcfighter_name": state["ufcfighter_name"],
-            "summary": summary,
-        }
+    new_messages = get_unsummarized_messages(
+        state["messages"], state.get("summary_watermark", "")
     )
 
+    if new_messages:
+        summary_chain = get_conversation_summary_chain(summary)
+
+        response = await summary_chain.ainvoke(
+            {
+                "messages": new_messages,
+                "ufcfighter_name": state["ufcfighter_name"],
+                "summary": summary,
+            }
+        )
+        summary = response.content
+
     delete_messages = [
         RemoveMessage(id=m.id)
         for m in state["messages"][: -settings.TOTAL_MESSAGES_AFTER_SUMMARY]
     ]
-    return {"summary": response.content, "messages": delete_messages}
+    return {
+        "summary": summary,
+        "summary_watermark": state["messages"][-1].id,
+        "messages": delete_messages,
+        "message_token_counts": {m.id: None for m in delete_messages},
+    }
 
 
 async def summarize_context_node(state: UFCFighterState):
@@ -65,5 +135,33 @@ async def summarize_context_node(state: UFCFighterState):
     return {}
 
 
+def get_unsummarized_messages(
+    messages: list[BaseMessage], summary_watermark: str
+) -> list[BaseMessage]:
+    """Returns the messages that aren't folded into the conversation summary yet.
+
+    Args:
+        messages: Messages of the conversation.
+        summary_watermark: ID of the last message folded into the summary.
+
+    Returns:
+        list[BaseMessage]: The messages after the watermark, or all of them if the
+            watermark isn't among them. Tool results are never separated from the
+            message holding their tool call.
+    """
+
+    start = next(
+        (i + 1 for i, m in enumerate(messages) if m.id == summary_watermark), 0
+    )
+    while 0 < start < len(messages) and isinstance(messages[start], ToolMessage):
+        start -= 1
+
+    return messages[start:]
+
+
 async def connector_node(state: UFCFighterState):
-    return {}
\ No newline at end of file
+    return {
+        "message_token_counts": count_new_message_tokens(
+            state["messages"], state.get("message_token_counts", {})
+        )
+    }
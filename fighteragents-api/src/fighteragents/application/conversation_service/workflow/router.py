@@ -0,0 +1,294 @@
+import contextvars
+import re
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage, HumanMessage
+from pydantic import BaseModel
+
+from fighteragents.application.conversation_service.tokens import (
+    count_text_tokens,
+)
+from fighteragents.application.conversation_service.workflow.tools import retriever
+from fighteragents.config import settings
+
+# Turns the small model answers as well as the large one: greetings and banter.
+SIMPLE_EXAMPLES = [
+    "Hi!",
+    "Hello, how are you?",
+    "Hey champ, what's up?",
+    "Good morning!",
+    "Thanks a lot!",
+    "Thank you, that was great.",
+    "Haha, that's funny.",
+    "Nice one.",
+    "Cool, I love it.",
+    "You're the best!",
+    "Bye, see you later.",
+    "Good night.",
+    "Ok, got it.",
+    "Really?",
+    "Let's go!",
+    "My name is Sophia.",
+]
+
+# Turns that need the large model: facts about fighters, analysis and opinions.
+COMPLEX_EXAMPLES = [
+    "How did you prepare for your title fight?",
+    "What was the turning point of your career?",
+    "Can you explain your grappling strategy against strikers?",
+    "Tell me about your rivalry with your toughest opponent.",
+    "How many times did you defend your belt?",
+    "What do you think about AI replacing coaches in combat sports?",
+    "Why did you move up a weight class?",
+    "Compare your striking with your wrestling.",
+    "What did you learn from your first loss?",
+    "Describe your training camp before a championship fight.",
+    "Who was the hardest fighter you ever faced and why?",
+    "What advice would you give a young fighter starting out?",
+]
+
+# Words announcing that the answer depends on facts about the fighter.
+_RETRIEVAL_CUES = re.compile(
+    r"\b(fights?|fought|record|career|titles?|belts?|champion\w*|won|lost|beat|"
+    r"opponents?|rival\w*|history|stats?|training|techniques?|strateg\w*|explain|"
+    r"why|when|where|which|how (?:many|much|did|do|does|was|were))\b|\d",
+    re.IGNORECASE,
+)
+
+# Questions this short are small talk, such as "How are you?".
+_MAX_SMALL_TALK_QUESTION_TOKENS = 6
+
+# Sharpness of the nearest-centroid head, turning a cosine similarity gap into a
+# probability. MiniLM similarities of short messages are close to each other.
+_HEAD_SCALE = 40.0
+
+_routing_enabled: contextvars.ContextVar[bool | None] = contextvars.ContextVar(
+    "model_routing_enabled", default=None
+)
+
+
+@contextmanager
+def use_model_routing(enabled: bool) -> Iterator[None]:
+    """Turns model routing on or off for the turns answered inside the block,
+    whatever `MODEL_ROUTING_ENABLED` says. Used to compare both in evaluations."""
+
+    token = _routing_enabled.set(enabled)
+    try:
+        yield
+    finally:
+        _routing_enabled.reset(token)
+
+
+class RouteDecision(BaseModel):
+    """The model picked to answer a turn.
+
+    Args:
+        model_name (str): The model answering the turn.
+        confidence (float): Confidence that the turn is simple, from 0 to 1.
+        reason (str): Why the model was picked.
+    """
+
+    model_name: str
+    confidence: float
+    reason: str
+
+
+class ComplexityRouter:
+    """Sends the simple turns of a conversation to a small model.
+
+    A turn can be simple when it is a short user message, neither a question nor
+    showing signs of needing the fighter's context. Its confidence is a length score,
+    averaged with a nearest-centroid head over the embeddings of `SIMPLE_EXAMPLES`
+    and `COMPLEX_EXAMPLES` when an embedding model is given. Turns below
+    `min_confidence`, and the answers to retrieved context, go to the primary model.
+
+    Args:
+        primary_model (str): Model answering the turns by default.
+        small_model (str): Model answering the simple turns.
+        embeddings (Embeddings | None): Model embedding the user messages.
+        min_confidence (float): Confidence needed to pick the small model.
+        max_simple_tokens (int): Longer user messages go to the primary model.
+    """
+
+    def __init__(
+        self,
+        primary_model: str,
+        small_model: str,
+        embeddings: Embeddings | None = None,
+        min_confidence: float = 0.75,
+        max_simple_tokens: int = 32,
+    ) -> None:
+        self.primary_model = primary_model
+        self.small_model = small_model
+        self.embeddings = embeddings
+        self.min_confidence = min_confidence
+        self.max_simple_tokens = max_simple_tokens
+
+        self.routed_primary = 0
+        self.routed_small = 0
+        self._centroids: np.ndarray | None = None
+
+    async def route(self, messages: list[BaseMessage]) -> RouteDecision:
+        """Picks the model answering the last message of a conversation."""
+
+        decision = await self.__decide(messages)
+        if decision.model_name == self.small_model:
+            self.routed_small += 1
+        else:
+            self.routed_primary += 1
+
+        return decision
+
+    @property
+    def stats(self) -> dict:
+        total = self.routed_primary + self.routed_small
+
+        return {
+            "routed_primary": self.routed_primary,
+            "routed_small": self.routed_small,
+            "small_ratio": self.routed_small / total if total else 0.0,
+        }
+
+    async def __decide(self, messages: list[BaseMessage]) -> RouteDecision:
+        last_message = messages[-1] if messages else None
+        if not isinstance(last_message, HumanMessage) or not isinstance(
+            last_message.content, str
+        ):
+            # Answers grounded on retrieved context stay on the primary model.
+            return RouteDecision(
+                model_name=self.primary_model, confidence=0.0, reason="not_user_turn"
+            )
+
+        text = last_message.content
+        num_tokens = count_text_tokens(text)
+        if num_tokens > self.max_simple_tokens:
+            return RouteDecision(
+                model_name=self.primary_model, confidence=0.0, reason="long_message"
+            )
+
+        if _RETRIEVAL_CUES.search(text):
+            return RouteDecision(
+                model_name=self.primary_model, confidence=0.0, reason="needs_context"
+            )
+
+        if text.rstrip().endswith("?"):
+            return RouteDecision(
+                model_name=self.primary_model, confidence=0.0, reason="question"
+            )
+
+        confidence = 1.0 - 0.5 * num_tokens / self.max_simple_tokens
+        if self.embeddings is not None:
+            confidence = (confidence + await self.__get_head_confidence(text)) / 2
+
+        if confidence < self.min_confidence:
+            return RouteDecision(
+                model_name=self.primary_model, confidence=confidence, reason="complex"
+            )
+
+        return RouteDecision(
+            model_name=self.small_model, confidence=confidence, reason="simple"
+        )
+
+    async def __get_head_confidence(self, text: str) -> float:
+        if self._centroids is None:
+            self._centroids = await self.__fit_centroids()
+
+        embedding = self.__normalize(
+            np.asarray(await self.embeddings.aembed_query(text), dtype=np.float32)
+        )
+        simple_similarity, complex_similarity = self._centroids @ embedding
+        margin = _HEAD_SCALE * (simple_similarity - complex_similarity)
+
+        return float(1.0 / (1.0 + np.exp(-margin)))
+
+    async def __fit_centroids(self) -> np.ndarray:
+        centroids = []
+        for examples in (SIMPLE_EXAMPLES, COMPLEX_EXAMPLES):
+            vectors = np.asarray(
+                await self.embeddings.aembed_documents(examples), dtype=np.float32
+            )
+            vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+            centroids.append(self.__normalize(vectors.mean(axis=0)))
+
+        return np.stack(centroids)
+
+    @staticmethod
+    def __normalize(vector: np.ndarray) -> np.ndarray:
+        norm = np.linalg.norm(vector)
+
+        return vector / norm if norm > 0 else vector
+
+
+def needs_retrieval(messages: list[BaseMessage]) -> bool:
+    """Tells whether the last user message asks about the fighter, so their context
+    can be retrieved before answering rather than through a tool call.
+
+    Questions and messages showing retrieval cues need the context, except short
+    small talk questions.
+    """
+
+    last_message = messages[-1] if messages else None
+    if not isinstance(last_message, HumanMessage) or not isinstance(
+        last_message.content, str
+    ):
+        return False
+
+    text = last_message.content
+    if _RETRIEVAL_CUES.search(text):
+        return True
+
+    return (
+        text.rstrip().endswith("?")
+        and count_text_tokens(text) > _MAX_SMALL_TALK_QUESTION_TOKENS
+    )
+
+
+_router: ComplexityRouter | None = None
+
+
+def get_complexity_router() -> ComplexityRouter:
+    """Returns the process-wide router, sized from settings.
+
+    Its embedding head shares the RAG embedding model, and its query cache.
+    """
+
+    global _router
+
+    if _router is None:
+        embeddings = None
+        if settings.MODEL_ROUTING_USE_EMBEDDINGS:
+            embeddings = retriever.vectorstore.embeddings
+
+        _router = ComplexityRouter(
+            primary_model=settings.GROQ_LLM_MODEL,
+            small_model=settings.GROQ_LLM_MODEL_SMALL,
+            embeddings=embeddings,
+            min_confidence=settings.MODEL_ROUTING_MIN_CONFIDENCE,
+            max_simple_tokens=settings.MODEL_ROUTING_MAX_SIMPLE_TOKENS,
+        )
+
+    return _router
+
+
+def get_routing_stats() -> dict | None:
+    """Returns the stats of the router, or None if no turn was routed yet."""
+
+    return _router.stats if _router is not None else None
+
+
+async def select_response_model(messages: list[BaseMessage]) -> str:
+    """Returns the model answering the last message of a conversation, routed when
+    model routing is enabled."""
+
+    enabled = _routing_enabled.get()
+    if enabled is None:
+        enabled = settings.MODEL_ROUTING_ENABLED
+    if not enabled:
+        return settings.GROQ_LLM_MODEL
+
+    decision = await get_complexity_router().route(messages)
+
+    return decision.model_name
@@ -1,5 +1,11 @@
+from typing import Annotated
+
 from langgraph.graph import MessagesState
 
+from fighteragents.application.conversation_service.tokens import (
+    update_message_token_counts,
+)
+
 
 class UFCFighterState(MessagesState):
     """State class for the LangGraph workflow. It keeps track of the information necessary to maintain a coherent
@@ -11,6 +17,10 @@ class UFCFighterState(MessagesState):
         ufcfighter_perspective (str): The perspective of the ufcfighter about AI.
         ufcfighter_style (str): The style of the ufcfighter.
         summary (str): A summary of the conversation. This is used to reduce the token usage of the model.
+        summary_watermark (str): ID of the last message folded into the summary. Only the messages after it are
+            sent when extending the summary.
+        message_token_counts (dict[str, int]): Number of tokens of each message, keyed by message ID. Messages are
+            counted once, when first seen by a node, so the conversation size is known without re-tokenizing it.
     """
 
     ufcfighter_context: str
@@ -18,6 +28,8 @@ class UFCFighterState(MessagesState):
     ufcfighter_perspective: str
     ufcfighter_style: str
     summary: str
+    summary_watermark: str
+    message_token_counts: Annotated[dict[str, int], update_message_token_counts]
 
 
 def state_to_str(state: UFCFighterState) -> str:
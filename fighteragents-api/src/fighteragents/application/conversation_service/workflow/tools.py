@@ -1,17 +1,37 @@
 from langchain.tools.retriever import create_retriever_tool
 
-from fighteragents.application.rag.retrievers import get_retriever
+from fighteragents.application.rag.cache import get_cached_retriever
+from fighteragents.application.rag.retrievers import (
+    PrecomputedSummaryRetriever,
+    get_retriever,
+)
 from fighteragents.config import settings
 
 retriever = get_retriever(
     embedding_model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
     k=settings.RAG_TOP_K,
-    device=settings.RAG_DEVICE)
+    device=settings.RAG_DEVICE,
+    cache_query_embeddings=settings.RAG_CACHE_ENABLED,
+)
+
+tool_retriever = (
+    get_cached_retriever(retriever, k=settings.RAG_TOP_K)
+    if settings.RAG_CACHE_ENABLED
+    else retriever
+)
 
 retriever_tool = create_retriever_tool(
-    retriever,
+    tool_retriever,
     "retrieve_ufcfighter_context",
     "Search and return information about a specific ufcfighter. Always use this tool when the user asks you about a ufcfighter, their works, ideas or historical context.",
 )
 
-tools = [retriever_tool]
\ No newline at end of file
+# Same tool returning the chunk summaries precomputed at ingestion time. It shares the
+# name and description of `retriever_tool`, so chains bound to `tools` can call either.
+precomputed_summary_retriever_tool = create_retriever_tool(
+    PrecomputedSummaryRetriever(retriever=tool_retriever),
+    retriever_tool.name,
+    retriever_tool.description,
+)
+
+tools = [retriever_tool]
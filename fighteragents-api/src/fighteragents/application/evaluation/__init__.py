@@ -1,5 +1,11 @@
 from .evaluate import evaluate_agent
 from .generate_dataset import EvaluationDatasetGenerator
+from .routing import evaluate_routing
 from .upload_dataset import upload_dataset
 
-__all__ = ["upload_dataset", "evaluate_agent", "EvaluationDatasetGenerator"]
+__all__ = [
+    "upload_dataset",
+    "evaluate_agent",
+    "evaluate_routing",
+    "EvaluationDatasetGenerator",
+]
@@ -11,7 +11,13 @@ from opik.evaluation.metrics import (
     Moderation,
 )
 
-from fighteragents.application.conversation_service.generate_response import get_response
+from fighteragents.application.conversation_service.generate_response import (
+    get_response,
+)
+from fighteragents.application.conversation_service.rate_limiter import (
+    Priority,
+    llm_priority,
+)
 from fighteragents.application.conversation_service.workflow import state_to_str
 from fighteragents.config import settings
 from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
@@ -40,15 +46,16 @@ async def evaluation_task(x: dict) -> dict:
     input_messages = x["messages"][:-1]
     expected_output_message = x["messages"][-1]
 
-    response, latest_state = await get_response(
-        messages=input_messages,
-        ufcfighter_id=ufcfighter.id,
-        ufcfighter_name=ufcfighter.name,
-        ufcfighter_perspective=ufcfighter.perspective,
-        ufcfighter_style=ufcfighter.style,
-        ufcfighter_context="",
-        new_thread=True,
-    )
+    with llm_priority(Priority.EVALUATION):
+        response, latest_state = await get_response(
+            messages=input_messages,
+            ufcfighter_id=ufcfighter.id,
+            ufcfighter_name=ufcfighter.name,
+            ufcfighter_perspective=ufcfighter.perspective,
+            ufcfighter_style=ufcfighter.style,
+            ufcfighter_context="",
+            new_thread=True,
+        )
     context = state_to_str(latest_state)
 
     return {
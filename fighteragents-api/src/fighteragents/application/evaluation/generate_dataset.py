@@ -1,5 +1,3 @@
-import time
-
 from langchain_core.prompts import (
     ChatPromptTemplate,
 )
@@ -7,6 +5,11 @@ from langchain_groq import ChatGroq
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from loguru import logger
 
+from fighteragents.application.conversation_service.rate_limiter import (
+    Priority,
+    llm_priority,
+    rate_limited,
+)
 from fighteragents.application.data.extract import get_extraction_generator
 from fighteragents.config import settings
 from fighteragents.domain import prompts
@@ -29,9 +32,11 @@ class EvaluationDatasetGenerator:
             chunks = self.__splitter.split_documents(docs)
             for chunk in chunks[:4]:
                 try:
-                    dataset_sample: EvaluationDatasetSample = self.__chain.invoke(
-                        {"ufcfighter": ufcfighter, "document": chunk.page_content}
-                    )
+                    # The chain waits for the rate limit, behind interactive traffic.
+                    with llm_priority(Priority.EVALUATION):
+                        dataset_sample: EvaluationDatasetSample = self.__chain.invoke(
+                            {"ufcfighter": ufcfighter, "document": chunk.page_content}
+                        )
                 except Exception as e:
                     logger.error(f"Error generating dataset sample: {e}")
                     continue
@@ -41,8 +46,6 @@ class EvaluationDatasetGenerator:
                 if self.__validate_sample(dataset_sample):
                     dataset_samples.append(dataset_sample)
 
-                time.sleep(1)  # To avoid rate limiting
-
                 if len(dataset_samples) >= self.max_samples:
                     break
 
@@ -78,7 +81,7 @@ class EvaluationDatasetGenerator:
             template_format="jinja2",
         )
 
-        return prompt | model
+        return prompt | rate_limited(settings.GROQ_LLM_MODEL) | model
 
     def __build_splitter(
         self, max_token_limit: int = 6000
@@ -0,0 +1,241 @@
+import json
+import time
+from pathlib import Path
+
+from langchain_core.messages import AIMessage, BaseMessage
+from loguru import logger
+from opik.evaluation.metrics import AnswerRelevance
+from pydantic import BaseModel
+
+from fighteragents.application.conversation_service.generate_response import (
+    get_response,
+)
+from fighteragents.application.conversation_service.rate_limiter import (
+    Priority,
+    llm_priority,
+)
+from fighteragents.application.conversation_service.runtime import (
+    use_shared_workflow_runtime,
+)
+from fighteragents.application.conversation_service.tokens import (
+    count_message_tokens,
+)
+from fighteragents.application.conversation_service.workflow import state_to_str
+from fighteragents.application.conversation_service.workflow.router import (
+    use_model_routing,
+)
+from fighteragents.config import settings
+from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
+
+
+class RoutingSampleResult(BaseModel):
+    """A dataset sample answered with and without model routing.
+
+    Attributes:
+        index (int): Position of the sample in the dataset.
+        ufcfighter_id (str): The fighter answering the sample.
+        routed_model (str): Model that gave the routed answer.
+        baseline_latency_ms (float): Latency of the answer of GROQ_LLM_MODEL.
+        routed_latency_ms (float): Latency of the routed answer.
+        baseline_cost_usd (float): Cost of the answer of GROQ_LLM_MODEL.
+        routed_cost_usd (float): Cost of the routed answer.
+        baseline_relevance (float): Answer relevance of the answer of GROQ_LLM_MODEL.
+        routed_relevance (float): Answer relevance of the routed answer.
+    """
+
+    index: int
+    ufcfighter_id: str
+    routed_model: str
+    baseline_latency_ms: float
+    routed_latency_ms: float
+    baseline_cost_usd: float
+    routed_cost_usd: float
+    baseline_relevance: float
+    routed_relevance: float
+
+
+class RoutingReport(BaseModel):
+    """Savings of model routing over a dataset, against its answer relevance delta.
+
+    Relevance deltas are routed minus baseline, so a negative delta is a quality loss.
+    `relevance_delta_small` only counts the samples routed to the small model, the
+    only ones whose answer can differ in quality.
+    """
+
+    samples: int
+    routed_small: int
+    latency_ms_mean_baseline: float
+    latency_ms_mean_routed: float
+    latency_saved_ratio: float
+    cost_usd_baseline: float
+    cost_usd_routed: float
+    cost_saved_ratio: float
+    relevance_mean_baseline: float
+    relevance_mean_routed: float
+    relevance_delta: float
+    relevance_delta_small: float | None
+    results: list[RoutingSampleResult]
+
+
+async def evaluate_routing(
+    data_path: Path = settings.EVALUATION_DATASET_FILE_PATH,
+    nb_samples: int | None = None,
+) -> RoutingReport:
+    """Answers the evaluation dataset with and without model routing, and compares them.
+
+    Each sample is answered in a new thread by GROQ_LLM_MODEL, then by the model the
+    router picks, whatever `MODEL_ROUTING_ENABLED` says. Both answers are scored with
+    the Opik answer relevance metric. Samples are answered one at a time, so the
+    latencies aren't skewed by concurrency.
+
+    Args:
+        data_path: Path to the evaluation dataset file.
+        nb_samples: Optional number of samples to evaluate.
+            If None, evaluates the entire dataset.
+
+    Returns:
+        RoutingReport: Latency and cost savings, and answer relevance deltas.
+    """
+
+    with open(data_path, "r") as f:
+        samples = json.load(f)["samples"][:nb_samples]
+
+    answer_relevance = AnswerRelevance(track=False)
+    results = []
+    with llm_priority(Priority.EVALUATION):
+        async with use_shared_workflow_runtime():
+            for index, sample in enumerate(samples):
+                results.append(await __evaluate_sample(index, sample, answer_relevance))
+                logger.info(f"Evaluated routing of sample {index + 1}/{len(samples)}.")
+
+    report = get_routing_report(results)
+    logger.info(
+        f"Routing sent {report.routed_small}/{report.samples} samples to "
+        f"'{settings.GROQ_LLM_MODEL_SMALL}', saving {report.latency_saved_ratio:.1%} "
+        f"latency and {report.cost_saved_ratio:.1%} cost for a relevance delta of "
+        f"{report.relevance_delta:+.3f}."
+    )
+
+    return report
+
+
+def get_routing_report(results: list[RoutingSampleResult]) -> RoutingReport:
+    def mean(values: list[float]) -> float:
+        return sum(values) / len(values) if values else 0.0
+
+    def saved_ratio(baseline: float, routed: float) -> float:
+        return 1 - routed / baseline if baseline else 0.0
+
+    small_results = [
+        result
+        for result in results
+        if result.routed_model == settings.GROQ_LLM_MODEL_SMALL
+    ]
+    latency_baseline = mean([result.baseline_latency_ms for result in results])
+    latency_routed = mean([result.routed_latency_ms for result in results])
+    cost_baseline = sum(result.baseline_cost_usd for result in results)
+    cost_routed = sum(result.routed_cost_usd for result in results)
+    relevance_baseline = mean([result.baseline_relevance for result in results])
+    relevance_routed = mean([result.routed_relevance for result in results])
+
+    return RoutingReport(
+        samples=len(results),
+        routed_small=len(small_results),
+        latency_ms_mean_baseline=latency_baseline,
+        latency_ms_mean_routed=latency_routed,
+        latency_saved_ratio=saved_ratio(latency_baseline, latency_routed),
+        cost_usd_baseline=cost_baseline,
+        cost_usd_routed=cost_routed,
+        cost_saved_ratio=saved_ratio(cost_baseline, cost_routed),
+        relevance_mean_baseline=relevance_baseline,
+        relevance_mean_routed=relevance_routed,
+        relevance_delta=relevance_routed - relevance_baseline,
+        relevance_delta_small=(
+            mean(
+                [
+                    result.routed_relevance - result.baseline_relevance
+                    for result in small_results
+                ]
+            )
+            if small_results
+            else None
+        ),
+        results=results,
+    )
+
+
+def get_turn_cost(messages: list[BaseMessage]) -> float:
+    """Returns the cost of the answers generated in a turn, priced per model.
+
+    Only answers tagged with the model that generated them are counted, so the
+    assistant messages given as input are left out.
+    """
+
+    cost = 0.0
+    for message in messages:
+        if not isinstance(message, AIMessage):
+            continue
+
+        model_name = message.response_metadata.get("model_name")
+        if model_name is None:
+            continue
+
+        input_price, output_price = settings.LLM_PRICES_PER_MILLION_TOKENS.get(
+            model_name, (0.0, 0.0)
+        )
+        usage = message.usage_metadata or {
+            "input_tokens": 0,
+            "output_tokens": count_message_tokens(message),
+        }
+        cost += (
+            usage["input_tokens"] * input_price + usage["output_tokens"] * output_price
+        ) / 1_000_000
+
+    return cost
+
+
+async def __evaluate_sample(
+    index: int, sample: dict, answer_relevance: AnswerRelevance
+) -> RoutingSampleResult:
+    ufcfighter_factory = UFCFighterFactory()
+    ufcfighter = ufcfighter_factory.get_ufcfighter(sample["ufcfighter_id"])
+    input_messages = sample["messages"][:-1]
+
+    answers = {}
+    for routing in (False, True):
+        start_time = time.perf_counter()
+        with use_model_routing(routing):
+            response, latest_state = await get_response(
+                messages=input_messages,
+                ufcfighter_id=ufcfighter.id,
+                ufcfighter_name=ufcfighter.name,
+                ufcfighter_perspective=ufcfighter.perspective,
+                ufcfighter_style=ufcfighter.style,
+                ufcfighter_context="",
+                new_thread=True,
+            )
+        latency_ms = (time.perf_counter() - start_time) * 1000
+
+        relevance = await answer_relevance.ascore(
+            input=input_messages[-1]["content"],
+            output=response,
+            context=[state_to_str(latest_state)],
+        )
+        answers[routing] = (latest_state, latency_ms, relevance.value)
+
+    (baseline_state, baseline_latency_ms, baseline_relevance) = answers[False]
+    (routed_state, routed_latency_ms, routed_relevance) = answers[True]
+
+    return RoutingSampleResult(
+        index=index,
+        ufcfighter_id=ufcfighter.id,
+        routed_model=routed_state["messages"][-1].response_metadata.get(
+            "model_name", settings.GROQ_LLM_MODEL
+        ),
+        baseline_latency_ms=baseline_latency_ms,
+        routed_latency_ms=routed_latency_ms,
+        baseline_cost_usd=get_turn_cost(baseline_state["messages"]),
+        routed_cost_usd=get_turn_cost(routed_state["messages"]),
+        baseline_relevance=baseline_relevance,
+        routed_relevance=routed_relevance,
+    )
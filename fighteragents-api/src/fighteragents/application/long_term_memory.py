@@ -1,21 +1,49 @@
 from langchain_core.documents import Document
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_groq import ChatGroq
 from loguru import logger
 
-from fighteragents.application.data import deduplicate_documents, get_extraction_generator
-from fighteragents.application.rag.retrievers import Retriever, get_retriever
+from fighteragents.application.conversation_service.rate_limiter import (
+    Priority,
+    llm_priority,
+    rate_limited,
+)
+from fighteragents.application.data import (
+    deduplicate_documents,
+    get_extraction_generator,
+)
+from fighteragents.application.rag.cache import (
+    invalidate_retrieval_caches,
+    mark_ingestion,
+)
+from fighteragents.application.rag.retrievers import (
+    CHUNK_SUMMARY_KEY,
+    Retriever,
+    get_retriever,
+)
 from fighteragents.application.rag.splitters import Splitter, get_splitter
 from fighteragents.config import settings
+from fighteragents.domain.prompts import CONTEXT_SUMMARY_PROMPT
 from fighteragents.domain.ufcfighter import UFCFighterExtract
 from fighteragents.infrastructure.mongo import MongoClientWrapper, MongoIndex
 
 
 class LongTermMemoryCreator:
-    def __init__(self, retriever: Retriever, splitter: Splitter) -> None:
+    def __init__(
+        self, retriever: Retriever, splitter: Splitter, summarize_chunks: bool = False
+    ) -> None:
         self.retriever = retriever
         self.splitter = splitter
+        self.summarize_chunks = summarize_chunks
+
+        self.__summary_chain = (
+            self.__build_summary_chain() if summarize_chunks else None
+        )
 
     @classmethod
-    def build_from_settings(cls) -> "LongTermMemoryCreator":
+    def build_from_settings(
+        cls, summarize_chunks: bool = settings.RAG_PRECOMPUTED_CONTEXT_SUMMARIES
+    ) -> "LongTermMemoryCreator":
         retriever = get_retriever(
             embedding_model_id=settings.RAG_TEXT_EMBEDDING_MODEL_ID,
             k=settings.RAG_TOP_K,
@@ -23,7 +51,7 @@ class LongTermMemoryCreator:
         )
         splitter = get_splitter(chunk_size=settings.RAG_CHUNK_SIZE)
 
-        return cls(retriever, splitter)
+        return cls(retriever, splitter, summarize_chunks=summarize_chunks)
 
     def __call__(self, ufcfighters: list[UFCFighterExtract]) -> None:
         if len(ufcfighters) == 0:
@@ -43,10 +71,57 @@ class LongTermMemoryCreator:
 
             chunked_docs = deduplicate_documents(chunked_docs, threshold=0.7)
 
+            if self.summarize_chunks:
+                self.__add_chunk_summaries(chunked_docs)
+
             self.retriever.vectorstore.add_documents(chunked_docs)
 
         self.__create_index()
 
+        collection = self.retriever.vectorstore.collection
+        mark_ingestion(collection.database, collection.name)
+        invalidate_retrieval_caches()
+
+    def __add_chunk_summaries(self, chunked_docs: list[Document]) -> None:
+        """Stores a compact summary of each chunk in its metadata.
+
+        The summaries are served by the retriever tool when
+        `RAG_PRECOMPUTED_CONTEXT_SUMMARIES` is enabled, which removes the context
+        summary LLM call from the conversation. Chunks whose summary can't be
+        generated are stored without one and fall back to their raw text.
+        """
+
+        with llm_priority(Priority.BATCH):
+            summaries = self.__summary_chain.batch(
+                [{"context": doc.page_content} for doc in chunked_docs],
+                config={"max_concurrency": settings.RAG_CHUNK_SUMMARY_MAX_CONCURRENCY},
+                return_exceptions=True,
+            )
+
+        for doc, summary in zip(chunked_docs, summaries):
+            if isinstance(summary, Exception):
+                logger.error(f"Error summarizing chunk: {summary}")
+                continue
+
+            doc.metadata[CHUNK_SUMMARY_KEY] = summary.content
+
+        logger.info(f"Summarized {len(chunked_docs)} chunk(s).")
+
+    def __build_summary_chain(self):
+        model = ChatGroq(
+            api_key=settings.GROQ_API_KEY,
+            model_name=settings.GROQ_LLM_MODEL_CONTEXT_SUMMARY,
+            temperature=0.0,
+        )
+        prompt = ChatPromptTemplate.from_messages(
+            [
+                ("human", CONTEXT_SUMMARY_PROMPT.prompt),
+            ],
+            template_format="jinja2",
+        )
+
+        return prompt | rate_limited(settings.GROQ_LLM_MODEL_CONTEXT_SUMMARY) | model
+
     def __create_index(self) -> None:
         with MongoClientWrapper(
             model=Document, collection_name=settings.MONGO_LONG_TERM_MEMORY_COLLECTION
@@ -1,3 +1,10 @@
+from .cache import (
+    get_cached_embeddings,
+    get_cached_retriever,
+    get_retrieval_cache_stats,
+    invalidate_retrieval_caches,
+    mark_ingestion,
+)
 from .embeddings import get_embedding_model
 from .retrievers import get_retriever
 from .splitters import get_splitter
@@ -6,4 +13,9 @@ __all__ = [
     "get_retriever",
     "get_splitter",
     "get_embedding_model",
+    "get_cached_embeddings",
+    "get_cached_retriever",
+    "get_retrieval_cache_stats",
+    "invalidate_retrieval_caches",
+    "mark_ingestion",
 ]
@@ -0,0 +1,322 @@
+import threading
+import time
+import uuid
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Generic, Hashable, TypeVar
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from loguru import logger
+from pydantic import ConfigDict
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import PyMongoError
+
+from fighteragents.config import settings
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live.
+
+    Besides hits and misses, it tracks how long computing a missing value takes on
+    average, which is used to estimate the time saved by each hit.
+
+    Args:
+        name (str): Name of the cache, used in logs and stats.
+        max_size (int): Maximum number of entries before evicting the least recently used.
+        ttl_seconds (float): Lifetime of an entry.
+    """
+
+    def __init__(self, name: str, max_size: int, ttl_seconds: float) -> None:
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_ms = 0.0
+        self._miss_ms_total = 0.0
+
+        self._entries: OrderedDict[Hashable, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], V]) -> V:
+        """Returns the cached value for `key`, computing and caching it on a miss.
+
+        Args:
+            key (Hashable): Cache key.
+            compute (Callable[[], V]): Computes the value on a miss. Called outside
+                the lock, so concurrent misses on the same key may both compute it.
+
+        Returns:
+            V: The cached or freshly computed value.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self.saved_ms += self.__average_miss_ms()
+
+                return entry[1]
+
+        start_time = time.perf_counter()
+        value = compute()
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        with self._lock:
+            self.misses += 1
+            self._miss_ms_total += elapsed_ms
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "saved_ms": self.saved_ms,
+                "entries": len(self._entries),
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __average_miss_ms(self) -> float:
+        return self._miss_ms_total / self.misses if self.misses else 0.0
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper memoizing query vectors.
+
+    Document embeddings are computed at ingestion time only, so they pass through.
+
+    Args:
+        embeddings (Embeddings): The wrapped embedding model.
+        cache (TTLCache[list[float]]): Cache of query vectors keyed by query text.
+    """
+
+    def __init__(self, embeddings: Embeddings, cache: TTLCache[list[float]]) -> None:
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.cache.get_or_compute(
+            text, lambda: self.embeddings.embed_query(text)
+        )
+
+
+class CollectionVersion:
+    """Version of a collection's content, read from the marker written by its ingestion.
+
+    Ingestion runs in its own process, so caches of the API can't be cleared by it.
+    Keying them by this version instead makes them stop serving entries computed
+    before a re-ingestion. The marker is read at most every `check_interval_seconds`,
+    which bounds how long stale entries are served. The last known version is kept
+    when the marker can't be read.
+
+    Args:
+        markers (Collection): Collection holding the ingestion markers.
+        collection_name (str): Name of the versioned collection.
+        check_interval_seconds (float): Minimum time between two reads of the marker.
+    """
+
+    def __init__(
+        self, markers: Collection, collection_name: str, check_interval_seconds: float
+    ) -> None:
+        self.markers = markers
+        self.collection_name = collection_name
+        self.check_interval_seconds = check_interval_seconds
+
+        self._version: str | None = None
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def get(self) -> str | None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._checked_at < self.check_interval_seconds:
+                return self._version
+            # Concurrent callers keep using the current version meanwhile.
+            self._checked_at = now
+
+        try:
+            marker = self.markers.find_one({"_id": self.collection_name})
+        except PyMongoError as e:
+            logger.warning(
+                f"Failed to read the ingestion marker of '{self.collection_name}': {e}"
+            )
+
+            return self._version
+
+        version = marker["version"] if marker else None
+        with self._lock:
+            if version != self._version and self._version is not None:
+                logger.info(
+                    f"'{self.collection_name}' was re-ingested. Cached retrieval results are now stale."
+                )
+            self._version = version
+
+        return version
+
+
+def mark_ingestion(database: Database, collection_name: str) -> str:
+    """Records that a collection's content changed, invalidating the retrieval caches
+    keyed by its `CollectionVersion` in every process.
+
+    Args:
+        database (Database): Database of the collection.
+        collection_name (str): Name of the re-ingested collection.
+
+    Returns:
+        str: The new version of the collection.
+    """
+
+    version = uuid.uuid4().hex
+    database[settings.MONGO_INGESTION_MARKERS_COLLECTION].update_one(
+        {"_id": collection_name},
+        {"$set": {"version": version, "ingested_at": datetime.now(timezone.utc)}},
+        upsert=True,
+    )
+    logger.info(f"Marked '{collection_name}' as ingested | version: {version}")
+
+    return version
+
+
+class CachedRetriever(BaseRetriever):
+    """Retriever wrapper memoizing the documents returned for a (query, k) pair.
+
+    Attributes:
+        retriever (BaseRetriever): The wrapped retriever.
+        k (int): Number of documents the wrapped retriever returns.
+        cache (TTLCache[list[Document]]): Cache of documents keyed by collection
+            version, normalized query and k.
+        version (CollectionVersion | None): Version of the searched collection.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    k: int
+    cache: Any
+    version: Any = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        version = self.version.get() if self.version is not None else None
+        documents = self.cache.get_or_compute(
+            (version, normalize_query(query), self.k),
+            lambda: self.retriever.invoke(
+                query, config={"callbacks": run_manager.get_child()}
+            ),
+        )
+
+        return [document.model_copy() for document in documents]
+
+
+_caches: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+_document_caches: "weakref.WeakSet[TTLCache]" = weakref.WeakSet()
+
+
+def get_cached_embeddings(embeddings: Embeddings) -> CachedEmbeddings:
+    """Wraps an embedding model with a query embedding cache.
+
+    The wrapper is meant to be given to the vector store, so any other user of the
+    store's embedding model (e.g. the semantic response cache) shares the cache.
+
+    Args:
+        embeddings (Embeddings): The embedding model.
+
+    Returns:
+        CachedEmbeddings: The caching embedding model.
+    """
+
+    embedding_cache = TTLCache[list[float]](
+        name="query_embeddings",
+        max_size=settings.RAG_CACHE_MAX_EMBEDDINGS,
+        ttl_seconds=settings.RAG_CACHE_TTL_SECONDS,
+    )
+    _caches.add(embedding_cache)
+
+    return CachedEmbeddings(embeddings, embedding_cache)
+
+
+def get_cached_retriever(retriever: BaseRetriever, k: int) -> CachedRetriever:
+    """Wraps a hybrid search retriever with a retrieved documents cache.
+
+    Cached documents are keyed by the version of the searched collection, so they
+    are dropped once the collection is re-ingested, by any process.
+
+    Args:
+        retriever (BaseRetriever): A retriever backed by a `vectorstore`.
+        k (int): Number of documents the retriever returns.
+
+    Returns:
+        CachedRetriever: The caching retriever.
+    """
+
+    document_cache = TTLCache[list[Document]](
+        name="retrieved_documents",
+        max_size=settings.RAG_CACHE_MAX_QUERIES,
+        ttl_seconds=settings.RAG_CACHE_TTL_SECONDS,
+    )
+    _caches.add(document_cache)
+    _document_caches.add(document_cache)
+
+    collection = retriever.vectorstore.collection
+    version = CollectionVersion(
+        markers=collection.database[settings.MONGO_INGESTION_MARKERS_COLLECTION],
+        collection_name=collection.name,
+        check_interval_seconds=settings.RAG_CACHE_VERSION_CHECK_SECONDS,
+    )
+
+    return CachedRetriever(
+        retriever=retriever, k=k, cache=document_cache, version=version
+    )
+
+
+def invalidate_retrieval_caches() -> None:
+    """Drops every cached retrieval result of this process.
+
+    Query embeddings only depend on the embedding model, so they are kept. Other
+    processes pick up a re-ingestion from its marker, see `mark_ingestion`.
+    """
+
+    for cache in list(_document_caches):
+        cache.clear()
+
+    logger.info("Invalidated the retrieved documents caches.")
+
+
+def get_retrieval_cache_stats() -> list[dict]:
+    """Returns the hit rate and saved time of every retrieval cache of this process."""
+
+    return [cache.stats for cache in list(_caches)]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).lower()
@@ -1,5 +1,8 @@
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 
+from fighteragents.infrastructure.metrics import EMBEDDING_DURATION
+
 EmbeddingsModel = HuggingFaceEmbeddings
 
 
@@ -38,3 +41,23 @@ def get_huggingface_embedding_model(
         model_kwargs={"device": device, "trust_remote_code": True},
         encode_kwargs={"normalize_embeddings": False},
     )
+
+
+class TimedEmbeddings(Embeddings):
+    """Embeddings wrapper recording the time the wrapped model takes in the
+    embedding duration metric.
+
+    Args:
+        embeddings (Embeddings): The wrapped embedding model.
+    """
+
+    def __init__(self, embeddings: Embeddings) -> None:
+        self.embeddings = embeddings
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        with EMBEDDING_DURATION.labels(operation="documents").time():
+            return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        with EMBEDDING_DURATION.labels(operation="query").time():
+            return self.embeddings.embed_query(text)
@@ -1,4 +1,7 @@
-from langchain_huggingface import HuggingFaceEmbeddings
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 from langchain_mongodb import MongoDBAtlasVectorSearch
 from langchain_mongodb.retrievers import (
     MongoDBAtlasHybridSearchRetriever,
@@ -7,15 +10,19 @@ from loguru import logger
 
 from fighteragents.config import settings
 
-from .embeddings import get_embedding_model
+from .cache import get_cached_embeddings
+from .embeddings import TimedEmbeddings, get_embedding_model
 
 Retriever = MongoDBAtlasHybridSearchRetriever
 
+CHUNK_SUMMARY_KEY = "chunk_summary"
+
 
 def get_retriever(
     embedding_model_id: str,
     k: int = 3,
     device: str = "cpu",
+    cache_query_embeddings: bool = False,
 ) -> Retriever:
     """Creates and returns a hybrid search retriever with the specified embedding model.
 
@@ -23,6 +30,8 @@ def get_retriever(
         embedding_model_id (str): The identifier for the embedding model to use.
         k (int, optional): Number of documents to retrieve. Defaults to 3.
         device (str, optional): Device to run the embedding model on. Defaults to "cpu".
+        cache_query_embeddings (bool, optional): Whether to memoize the embeddings of
+            the queries. Defaults to False.
 
     Returns:
         Retriever: A configured hybrid search retriever.
@@ -31,18 +40,20 @@ def get_retriever(
         f"Initializing retriever | model: {embedding_model_id} | device: {device} | top_k: {k}"
     )
 
-    embedding_model = get_embedding_model(embedding_model_id, device)
+    embedding_model = TimedEmbeddings(get_embedding_model(embedding_model_id, device))
+    if cache_query_embeddings:
+        embedding_model = get_cached_embeddings(embedding_model)
 
     return get_hybrid_search_retriever(embedding_model, k)
 
 
 def get_hybrid_search_retriever(
-    embedding_model: HuggingFaceEmbeddings, k: int
+    embedding_model: Embeddings, k: int
 ) -> MongoDBAtlasHybridSearchRetriever:
     """Creates a MongoDB Atlas hybrid search retriever with the given embedding model.
 
     Args:
-        embedding_model (HuggingFaceEmbeddings): The embedding model to use for vector search.
+        embedding_model (Embeddings): The embedding model to use for vector search.
         k (int): Number of documents to retrieve.
 
     Returns:
@@ -67,3 +78,31 @@ def get_hybrid_search_retriever(
     )
 
     return retriever
+
+
+class PrecomputedSummaryRetriever(BaseRetriever):
+    """Retriever wrapper returning the summary stored with each chunk at ingestion.
+
+    Chunks ingested without a summary fall back to their raw text.
+
+    Attributes:
+        retriever (BaseRetriever): The wrapped retriever.
+    """
+
+    retriever: BaseRetriever
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        documents = self.retriever.invoke(
+            query, config={"callbacks": run_manager.get_child()}
+        )
+
+        return [
+            Document(
+                page_content=document.metadata.get(CHUNK_SUMMARY_KEY)
+                or document.page_content,
+                metadata=document.metadata,
+            )
+            for document in documents
+        ]
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -12,7 +13,106 @@ class Settings(BaseSettings):
     # --- GROQ Configuration ---
     GROQ_API_KEY: str
     GROQ_LLM_MODEL: str = "llama-3.3-70b-versatile"
+    GROQ_LLM_MODEL_SUMMARY: str = "llama-3.1-8b-instant"
     GROQ_LLM_MODEL_CONTEXT_SUMMARY: str = "llama-3.1-8b-instant"
+    GROQ_LLM_MODEL_SMALL: str = Field(
+        default="llama-3.1-8b-instant",
+        description="Model answering the simple turns when model routing is enabled.",
+    )
+
+    # --- LLM HTTP Client Configuration ---
+    LLM_HTTP_MAX_CONNECTIONS: int = 100
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    LLM_HTTP_TIMEOUT: float = 60.0
+
+    # --- LLM Rate Limit Configuration ---
+    LLM_RATE_LIMIT_ENABLED: bool = Field(
+        default=False,
+        description="Queue LLM calls client-side to stay under the limits below, e.g. on Groq's free tier. Off, calls are only limited by Groq.",
+    )
+    LLM_RATE_LIMIT_REQUESTS_PER_MINUTE: int = Field(
+        default=30,
+        ge=0,
+        description="Requests per minute allowed for each model. 0 means unlimited.",
+    )
+    LLM_RATE_LIMIT_TOKENS_PER_MINUTE: int = Field(
+        default=6000,
+        ge=0,
+        description="Tokens per minute allowed for each model. 0 means unlimited.",
+    )
+    LLM_RATE_LIMITS: dict[str, tuple[int, int]] = Field(
+        default_factory=dict,
+        description="Requests and tokens per minute of specific models, overriding the defaults.",
+    )
+    LLM_RATE_LIMIT_MAX_QUEUE_SIZE: int = Field(
+        default=100,
+        ge=0,
+        description="Calls waiting for the rate limit of a model before new ones are rejected.",
+    )
+    LLM_RATE_LIMIT_COMPLETION_TOKENS: int = Field(
+        default=256,
+        ge=0,
+        description="Completion tokens a call is assumed to use, on top of its prompt tokens.",
+    )
+
+    # --- LLM Hedging Configuration ---
+    LLM_HEDGING_ENABLED: bool = Field(
+        default=False,
+        description="Race GROQ_LLM_MODEL_FALLBACK against GROQ_LLM_MODEL when the first token of a response is late.",
+    )
+    GROQ_LLM_MODEL_FALLBACK: str = "llama-3.1-8b-instant"
+    LLM_HEDGING_PERCENTILE: float = Field(
+        default=0.95,
+        gt=0,
+        le=1,
+        description="Percentile of the recent GROQ_LLM_MODEL times to first token used as hedging deadline.",
+    )
+    LLM_HEDGING_MIN_SAMPLES: int = 20
+    LLM_HEDGING_DEFAULT_DEADLINE_SECONDS: float = Field(
+        default=1.5,
+        gt=0,
+        description="Hedging deadline until LLM_HEDGING_MIN_SAMPLES latencies were measured.",
+    )
+    LLM_HEDGING_MIN_DEADLINE_SECONDS: float = 0.2
+    LLM_HEDGING_MAX_RATIO: float = Field(
+        default=0.1,
+        ge=0,
+        description="Maximum share of the last LLM_HEDGING_BUDGET_WINDOW GROQ_LLM_MODEL calls that are hedged.",
+    )
+    LLM_HEDGING_BUDGET_WINDOW: int = Field(
+        default=100,
+        ge=1,
+        description="Number of recent GROQ_LLM_MODEL calls LLM_HEDGING_MAX_RATIO applies to.",
+    )
+    LLM_HEDGING_MAX_IN_FLIGHT: int = 8
+
+    # --- Model Routing Configuration ---
+    MODEL_ROUTING_ENABLED: bool = Field(
+        default=False,
+        description="Answer simple turns, such as greetings and banter, with GROQ_LLM_MODEL_SMALL.",
+    )
+    MODEL_ROUTING_MIN_CONFIDENCE: float = Field(
+        default=0.75,
+        ge=0,
+        le=1,
+        description="Confidence that a turn is simple needed to route it to GROQ_LLM_MODEL_SMALL. Higher is safer.",
+    )
+    MODEL_ROUTING_MAX_SIMPLE_TOKENS: int = Field(
+        default=32,
+        description="User messages longer than this are always answered by GROQ_LLM_MODEL.",
+    )
+    MODEL_ROUTING_USE_EMBEDDINGS: bool = Field(
+        default=True,
+        description="Score turns with the RAG embedding model rather than their length only.",
+    )
+    LLM_PRICES_PER_MILLION_TOKENS: dict[str, tuple[float, float]] = Field(
+        default={
+            "llama-3.3-70b-versatile": (0.59, 0.79),
+            "llama-3.1-8b-instant": (0.05, 0.08),
+        },
+        description="Input and output prices in USD per million tokens, used to report costs.",
+    )
 
     # --- OpenAI Configuration (Required for evaluation) ---
     OPENAI_API_KEY: str
@@ -26,6 +126,93 @@ class Settings(BaseSettings):
     MONGO_STATE_CHECKPOINT_COLLECTION: str = "ufcfighter_state_checkpoints"
     MONGO_STATE_WRITES_COLLECTION: str = "ufcfighter_state_writes"
     MONGO_LONG_TERM_MEMORY_COLLECTION: str = "ufcfighter_long_term_memory"
+    MONGO_RESPONSE_CACHE_COLLECTION: str = "ufcfighter_response_cache"
+    MONGO_INGESTION_MARKERS_COLLECTION: str = Field(
+        default="ufcfighter_ingestion_markers",
+        description="Collection recording the version of each ingested collection.",
+    )
+    MONGO_CHECKPOINT_MAX_POOL_SIZE: int = Field(
+        default=100,
+        description="Maximum number of pooled connections shared by the conversation checkpointer.",
+    )
+    MONGO_CHECKPOINT_MIN_POOL_SIZE: int = Field(
+        default=0,
+        description="Minimum number of pooled connections kept open by the conversation checkpointer.",
+    )
+
+    # --- Checkpoint Retention Configuration ---
+    CHECKPOINT_RETENTION_KEEP_LAST: int = Field(
+        default=10,
+        ge=1,
+        description="Number of most recent checkpoints kept per conversation thread.",
+    )
+    CHECKPOINT_RETENTION_IDLE_TTL_SECONDS: int = Field(
+        default=30 * 24 * 60 * 60,
+        description="Conversation threads idle for longer are deleted. 0 keeps them forever.",
+    )
+    CHECKPOINT_RETENTION_INTERVAL_SECONDS: int = Field(
+        default=0,
+        description="Interval between two retention runs in the API. 0 disables the scheduled job, which deletes idle threads.",
+    )
+
+    # --- Checkpoint Serialization Configuration ---
+    CHECKPOINT_SERDE_COMPACT: bool = Field(
+        default=False,
+        description="Write checkpoints with fighter personas by reference and zstd compression. Checkpoints of either format stay readable when it is toggled.",
+    )
+    CHECKPOINT_SERDE_COMPRESSION_LEVEL: int = 3
+    CHECKPOINT_SERDE_MIN_COMPRESS_SIZE: int = 256
+
+    # --- Checkpoint Cache Configuration ---
+    CHECKPOINT_CACHE_ENABLED: bool = Field(
+        default=False,
+        description="Serve the latest checkpoint of recently active threads from memory. Requires sticky sessions with several API replicas.",
+    )
+    CHECKPOINT_CACHE_MAX_THREADS: int = 1024
+    CHECKPOINT_CACHE_DURABILITY: Literal["async", "sync"] = Field(
+        default="async",
+        description="'async' flushes checkpoints to MongoDB in the background, 'sync' waits for each write.",
+    )
+    CHECKPOINT_CACHE_MAX_PENDING_WRITES: int = 1000
+    CHECKPOINT_CACHE_FLUSH_FAILURE_BACKOFF_SECONDS: float = Field(
+        default=30.0,
+        description="Time a thread is read from MongoDB instead of memory after one of its checkpoints failed to flush.",
+    )
+
+    # --- Streaming Configuration ---
+    STREAM_FRAME_INTERVAL_MS: int = Field(
+        default=30,
+        description="Default time window merging streamed chunks into one frame. 0 sends a frame per chunk.",
+    )
+    STREAM_FRAME_MAX_BYTES: int = 1024
+    SSE_HEARTBEAT_SECONDS: float = Field(
+        default=15.0,
+        ge=0,
+        description="Idle time after which /chat/stream sends a heartbeat comment. 0 disables heartbeats.",
+    )
+    WS_MAX_CONCURRENT_REQUESTS: int = Field(
+        default=4,
+        ge=1,
+        description="Maximum number of requests answered at once on one websocket connection.",
+    )
+    WS_SEND_QUEUE_SIZE: int = Field(
+        default=64,
+        ge=1,
+        description="Frames queued for a websocket before the streams wait for the client to read.",
+    )
+
+    # --- Batch Configuration ---
+    BATCH_MAX_CONCURRENCY: int = Field(
+        default=8,
+        ge=1,
+        description="Maximum number of batch items answered at once.",
+    )
+    BATCH_ITEM_TIMEOUT_SECONDS: float = Field(
+        default=60.0,
+        gt=0,
+        description="Time after which a batch item is cancelled and reported as timed out.",
+    )
+    BATCH_MAX_ITEMS: int = 500
 
     # --- Comet ML & Opik Configuration ---
     COMET_API_KEY: str | None = Field(
@@ -36,9 +223,66 @@ class Settings(BaseSettings):
         description="Project name for Comet ML and Opik tracking.",
     )
 
+    # --- Tracing Configuration ---
+    OPIK_TRACE_SAMPLE_RATE: float = Field(
+        default=1.0,
+        ge=0,
+        le=1,
+        description="Share of the conversation turns traced to Opik, decided when the turn starts.",
+    )
+    OPIK_TRACE_ERRORS: bool = Field(
+        default=True,
+        description="Whether turns that fail are traced even when they weren't sampled.",
+    )
+    OPIK_EXPORT_QUEUE_SIZE: int = Field(
+        default=10_000,
+        gt=0,
+        description="Spans waiting to be exported before new ones are dropped.",
+    )
+    OPIK_EXPORT_BATCH_SIZE: int = Field(
+        default=200, gt=0, description="Maximum spans sent to Opik per request."
+    )
+    OPIK_EXPORT_FLUSH_INTERVAL_SECONDS: float = Field(
+        default=1.0,
+        gt=0,
+        description="Longest time a span waits for its batch to fill before export.",
+    )
+    OPIK_EXPORT_SHUTDOWN_TIMEOUT_SECONDS: float = Field(
+        default=5.0,
+        ge=0,
+        description="Time given to the pending spans to be exported at shutdown.",
+    )
+
     # --- Agents Configuration ---
     TOTAL_MESSAGES_SUMMARY_TRIGGER: int = 30
     TOTAL_MESSAGES_AFTER_SUMMARY: int = 5
+    CONVERSATION_TOKEN_BUDGET: int = Field(
+        default=3072,
+        description="Maximum number of conversation history tokens sent to GROQ_LLM_MODEL. Older messages are trimmed.",
+    )
+    CONVERSATION_SUMMARY_TOKEN_TRIGGER: int = Field(
+        default=2048,
+        description="Number of tokens of the messages a summarization would remove, i.e. all but the last TOTAL_MESSAGES_AFTER_SUMMARY, above which the conversation is summarized.",
+    )
+    CONVERSATION_SUMMARY_DEFERRED: bool = Field(
+        default=False,
+        description="Summarize conversations in background workers instead of before answering.",
+    )
+    CONVERSATION_SUMMARY_WORKERS: int = 2
+    CONVERSATION_SUMMARY_MAX_PENDING: int = 100
+
+    # --- Semantic Response Cache Configuration ---
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD: float = 0.95
+    SEMANTIC_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    SEMANTIC_CACHE_MAX_ENTRIES: int = Field(
+        default=1024,
+        description="Maximum number of in-memory cached answers per fighter.",
+    )
+    SEMANTIC_CACHE_PERSISTENT: bool = Field(
+        default=True,
+        description="Write cached answers through to MongoDB so they survive restarts.",
+    )
 
     # --- RAG Configuration ---
     RAG_TEXT_EMBEDDING_MODEL_ID: str = "sentence-transformers/all-MiniLM-L6-v2"
@@ -46,6 +290,23 @@ class Settings(BaseSettings):
     RAG_TOP_K: int = 3
     RAG_DEVICE: str = "cpu"
     RAG_CHUNK_SIZE: int = 256
+    RAG_PRECOMPUTED_CONTEXT_SUMMARIES: bool = Field(
+        default=False,
+        description="Answer with the chunk summaries stored at ingestion instead of summarizing the retrieved context with an LLM call.",
+    )
+    RAG_CHUNK_SUMMARY_MAX_CONCURRENCY: int = 4
+    RAG_EAGER_RETRIEVAL: bool = Field(
+        default=False,
+        description="Retrieve the context of knowledge questions before the first response call, classified locally, instead of waiting for a tool call.",
+    )
+    RAG_CACHE_ENABLED: bool = True
+    RAG_CACHE_MAX_QUERIES: int = 1024
+    RAG_CACHE_MAX_EMBEDDINGS: int = 4096
+    RAG_CACHE_TTL_SECONDS: int = 10 * 60
+    RAG_CACHE_VERSION_CHECK_SECONDS: float = Field(
+        default=5.0,
+        description="Interval between checks of the ingestion marker, bounding how long cached retrieval results outlive a re-ingestion.",
+    )
 
     # --- Paths Configuration ---
     EVALUATION_DATASET_FILE_PATH: Path = Path("data/evaluation_dataset.json")
@@ -1,20 +1,71 @@
-from contextlib import asynccontextmanager
-
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+import asyncio
+import json
+import math
+import time
+from contextlib import aclosing, asynccontextmanager
+from typing import Any, Callable
+
+from fastapi import FastAPI, HTTPException, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from opik.integrations.langchain import OpikTracer
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from prometheus_client import REGISTRY
+from pydantic import BaseModel, Field
 
+from fighteragents.application.conversation_service.batch import (
+    BatchItem,
+    BatchRunner,
+)
 from fighteragents.application.conversation_service.generate_response import (
+    CHUNK_EVENT,
+    RETRIEVAL_STARTED_EVENT,
     get_response,
-    get_streaming_response,
+    get_streaming_events,
+)
+from fighteragents.application.conversation_service.hot_thread_checkpointer import (
+    HotThreadCheckpointSaver,
+)
+from fighteragents.application.conversation_service.rate_limiter import (
+    find_rate_limit_error,
+    get_rate_limiter_stats,
 )
 from fighteragents.application.conversation_service.reset_conversation import (
     reset_conversation_state,
 )
+from fighteragents.application.conversation_service.runtime import (
+    WorkflowRuntime,
+    get_shared_workflow_runtime,
+    start_workflow_runtime,
+    stop_workflow_runtime,
+)
+from fighteragents.application.conversation_service.workflow.chains import (
+    close_chain_registry,
+)
+from fighteragents.application.conversation_service.workflow.hedging import (
+    get_hedging_stats,
+)
+from fighteragents.application.conversation_service.workflow.router import (
+    get_routing_stats,
+)
+from fighteragents.application.rag.cache import get_retrieval_cache_stats
+from fighteragents.config import settings
 from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
 
+from .chat_connection import ChatConnection
+from .disconnect import (
+    CLIENT_CLOSED_REQUEST,
+    ClientDisconnected,
+    cancel_on_disconnect,
+)
+from .metrics import (
+    CONTENT_TYPE,
+    HTTP_REQUEST_DURATION,
+    ComponentStats,
+    StatsCollector,
+    render_metrics,
+)
 from .opik_utils import configure
+from .sse import SSE_HEADERS, format_event, with_heartbeats
+from .tracing import close_trace_exporter, get_trace_export_stats
 
 configure()
 
@@ -23,10 +74,13 @@ configure()
 async def lifespan(app: FastAPI):
     """Handles startup and shutdown events for the API."""
     # Startup code (if any) goes here
+    await start_workflow_runtime()
     yield
     # Shutdown code goes here
-    opik_tracer = OpikTracer()
-    opik_tracer.flush()
+    await stop_workflow_runtime()
+    await close_chain_registry()
+    # Blocks for at most OPIK_EXPORT_SHUTDOWN_TIMEOUT_SECONDS.
+    await asyncio.to_thread(close_trace_exporter)
 
 
 app = FastAPI(lifespan=lifespan)
@@ -40,86 +94,276 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+
+        return response
+    finally:
+        # Labelled by route template rather than path, to bound the label values.
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        ).observe(time.perf_counter() - start_time)
+
+
 class ChatMessage(BaseModel):
     message: str
     ufcfighter_id: str
+    session_id: str | None = Field(default=None, min_length=1, max_length=128)
 
 
 @app.post("/chat")
-async def chat(chat_message: ChatMessage):
+async def chat(chat_message: ChatMessage, request: Request):
+    # Requests without a session keep using the fighter's shared thread, as clients
+    # predating sessions expect.
+    session_id = chat_message.session_id
+
     try:
         ufcfighter_factory = UFCFighterFactory()
         ufcfighter = ufcfighter_factory.get_ufcfighter(chat_message.ufcfighter_id)
 
-        response, _ = await get_response(
-            messages=chat_message.message,
-            ufcfighter_id=chat_message.ufcfighter_id,
-            ufcfighter_name=ufcfighter.name,
-            ufcfighter_perspective=ufcfighter.perspective,
-            ufcfighter_style=ufcfighter.style,
-            ufcfighter_context="",
+        response, _ = await cancel_on_disconnect(
+            request,
+            get_response(
+                messages=chat_message.message,
+                ufcfighter_id=chat_message.ufcfighter_id,
+                ufcfighter_name=ufcfighter.name,
+                ufcfighter_perspective=ufcfighter.perspective,
+                ufcfighter_style=ufcfighter.style,
+                ufcfighter_context="",
+                session_id=session_id,
+            ),
         )
-        return {"response": response}
+        return {"response": response, "session_id": session_id}
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     except Exception as e:
-        opik_tracer = OpikTracer()
-        opik_tracer.flush()
+        rate_limit_error = find_rate_limit_error(e)
+        if rate_limit_error is not None:
+            raise HTTPException(
+                status_code=429,
+                detail=str(rate_limit_error),
+                headers={"Retry-After": str(math.ceil(rate_limit_error.retry_after))},
+            )
 
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.websocket("/ws/chat")
-async def websocket_chat(websocket: WebSocket):
-    await websocket.accept()
+class BatchChatRequest(BaseModel):
+    items: list[BatchItem] = Field(min_length=1, max_length=settings.BATCH_MAX_ITEMS)
+    max_concurrency: int | None = Field(default=None, ge=1)
+    item_timeout_seconds: float | None = Field(default=None, gt=0)
+
+
+@app.post("/chat/batch")
+async def chat_batch(batch_request: BatchChatRequest):
+    """Answers many messages at once, streaming the results as NDJSON.
+
+    Each line is the result of an item, in completion order and carrying the index of
+    the item in the request. The last line holds the aggregate stats of the batch.
+    """
+
+    batch_runner = BatchRunner.build_from_settings(
+        max_concurrency=batch_request.max_concurrency,
+        item_timeout_seconds=batch_request.item_timeout_seconds,
+    )
+
+    async def stream_results():
+        async with aclosing(batch_runner.run(batch_request.items)) as results:
+            async for result in results:
+                yield result.model_dump_json() + "\n"
+
+        yield json.dumps({"stats": batch_runner.stats.model_dump()}) + "\n"
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post("/chat/stream")
+async def chat_stream(chat_message: ChatMessage):
+    """Streams the answer as Server-Sent Events, for clients without websockets.
+
+    Events: `start` (with the session), `retrieval_started` (with the search query)
+    and `retrieval_done` when the fighter looks up its context, a `chunk` per piece
+    of the answer, then `done` with the whole answer, or `error`. Comments are sent
+    as heartbeats while the stream is idle.
+    """
+
+    session_id = chat_message.session_id
 
     try:
-        while True:
-            data = await websocket.receive_json()
-
-            if "message" not in data or "ufcfighter_id" not in data:
-                await websocket.send_json(
-                    {
-                        "error": "Invalid message format. Required fields: 'message' and 'ufcfighter_id'"
-                    }
-                )
-                continue
+        ufcfighter_factory = UFCFighterFactory()
+        ufcfighter = ufcfighter_factory.get_ufcfighter(chat_message.ufcfighter_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-            try:
-                ufcfighter_factory = UFCFighterFactory()
-                ufcfighter = ufcfighter_factory.get_ufcfighter(
-                    data["ufcfighter_id"]
-                )
+    async def stream_events():
+        yield format_event("start", {"session_id": session_id})
 
-                # Use streaming response instead of get_response
-                response_stream = get_streaming_response(
-                    messages=data["message"],
-                    ufcfighter_id=data["ufcfighter_id"],
+        try:
+            response_chunks = []
+            async with aclosing(
+                get_streaming_events(
+                    messages=chat_message.message,
+                    ufcfighter_id=chat_message.ufcfighter_id,
                     ufcfighter_name=ufcfighter.name,
                     ufcfighter_perspective=ufcfighter.perspective,
                     ufcfighter_style=ufcfighter.style,
                     ufcfighter_context="",
+                    session_id=session_id,
                 )
+            ) as events:
+                async for event, data in events:
+                    if event == CHUNK_EVENT:
+                        response_chunks.append(data)
+                        yield format_event(event, {"chunk": data})
+                    elif event == RETRIEVAL_STARTED_EVENT:
+                        yield format_event(event, {"query": data})
+                    else:
+                        yield format_event(event, {})
+
+            yield format_event(
+                "done", {"response": "".join(response_chunks), "session_id": session_id}
+            )
+        except Exception as e:
+            error = {"error": str(e)}
+            rate_limit_error = find_rate_limit_error(e)
+            if rate_limit_error is not None:
+                error["retry_after"] = math.ceil(rate_limit_error.retry_after)
+
+            yield format_event("error", error)
+
+    return StreamingResponse(
+        with_heartbeats(stream_events(), settings.SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
 
-                # Send initial message to indicate streaming has started
-                await websocket.send_json({"streaming": True})
-
-                # Stream each chunk of the response
-                full_response = ""
-                async for chunk in response_stream:
-                    full_response += chunk
-                    await websocket.send_json({"chunk": chunk})
 
-                await websocket.send_json(
-                    {"response": full_response, "streaming": False}
-                )
-
-            except Exception as e:
-                opik_tracer = OpikTracer()
-                opik_tracer.flush()
-
-                await websocket.send_json({"error": str(e)})
+@app.websocket("/ws/chat")
+async def websocket_chat(websocket: WebSocket):
+    await websocket.accept()
 
-    except WebSocketDisconnect:
-        pass
+    connection = ChatConnection.build_from_settings(websocket)
+    await connection.serve()
+
+
+def get_single_stats(
+    get_stats: Callable[[], dict | None],
+) -> Callable[[], ComponentStats]:
+    """Reads the stats of a single component, skipped while it doesn't exist."""
+
+    def get_component_stats() -> ComponentStats:
+        stats = get_stats()
+
+        return [] if stats is None else [({}, stats)]
+
+    return get_component_stats
+
+
+def get_runtime_stats(
+    get_component: Callable[[WorkflowRuntime], Any],
+) -> Callable[[], ComponentStats]:
+    """Reads the stats of a component of the shared workflow runtime, skipped while
+    the runtime isn't started or the component is disabled."""
+
+    def get_stats() -> dict | None:
+        runtime = get_shared_workflow_runtime()
+        component = None if runtime is None else get_component(runtime)
+
+        return None if component is None else component.stats
+
+    return get_single_stats(get_stats)
+
+
+for stats_collector in (
+    StatsCollector(
+        "fighteragents_retrieval_cache",
+        lambda: [
+            ({"cache": stats["name"]}, stats) for stats in get_retrieval_cache_stats()
+        ],
+        counters=("hits", "misses", "saved_ms"),
+    ),
+    StatsCollector(
+        "fighteragents_rate_limiter",
+        lambda: [
+            ({"model": model_name}, stats)
+            for model_name, stats in get_rate_limiter_stats().items()
+        ],
+        counters=("admitted", "rejected"),
+    ),
+    StatsCollector(
+        "fighteragents_hedging",
+        lambda: [
+            ({"primary_model": primary, "fallback_model": fallback}, stats)
+            for (primary, fallback), stats in get_hedging_stats().items()
+        ],
+        counters=("calls", "hedges", "hedges_won", "hedges_skipped"),
+    ),
+    StatsCollector(
+        "fighteragents_routing",
+        get_single_stats(get_routing_stats),
+        counters=("routed_primary", "routed_small"),
+    ),
+    StatsCollector(
+        "fighteragents_trace_export",
+        get_single_stats(get_trace_export_stats),
+        counters=(
+            "queued",
+            "exported",
+            "dropped",
+            "sampled_runs",
+            "unsampled_runs",
+            "error_runs_exported",
+        ),
+    ),
+    StatsCollector(
+        "fighteragents_turns",
+        get_runtime_stats(lambda runtime: runtime.coordinator),
+        counters=("coalesced", "lock_waits"),
+    ),
+    StatsCollector(
+        "fighteragents_cancellations",
+        get_runtime_stats(lambda runtime: runtime.cancellations),
+        counters=(
+            "completed_turns",
+            "cancelled_turns",
+            "cancelled_tokens_generated",
+            "cancelled_tokens_saved",
+        ),
+    ),
+    StatsCollector(
+        "fighteragents_response_cache",
+        get_runtime_stats(lambda runtime: runtime.response_cache),
+        counters=("hits", "misses"),
+    ),
+    StatsCollector(
+        "fighteragents_checkpoint_cache",
+        get_runtime_stats(
+            lambda runtime: (
+                runtime.checkpointer
+                if isinstance(runtime.checkpointer, HotThreadCheckpointSaver)
+                else None
+            )
+        ),
+        counters=("hits", "misses", "flush_failures", "discarded_writes"),
+    ),
+):
+    REGISTRY.register(stats_collector)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Exposes the latency histograms and the stats of the caches, rate limiters and
+    other components of the API, in the Prometheus text format."""
+
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE)
 
 
 @app.post("/reset-memory")
@@ -132,7 +376,14 @@ async def reset_conversation():
         dict: A dictionary containing the result of the reset operation.
     """
     try:
-        result = await reset_conversation_state()
+        runtime = get_shared_workflow_runtime()
+        checkpoint_cache = None
+        if runtime is not None and isinstance(
+            runtime.checkpointer, HotThreadCheckpointSaver
+        ):
+            checkpoint_cache = runtime.checkpointer
+
+        result = await reset_conversation_state(checkpoint_cache)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,241 @@
+import asyncio
+import math
+import time
+from contextlib import aclosing
+from typing import Any
+
+from fastapi import WebSocket, WebSocketDisconnect
+from loguru import logger
+from pydantic import ValidationError
+
+from fighteragents.application.conversation_service.generate_response import (
+    get_streaming_response,
+)
+from fighteragents.application.conversation_service.rate_limiter import (
+    find_rate_limit_error,
+)
+from fighteragents.config import settings
+from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
+
+from .metrics import WS_TIME_TO_FIRST_TOKEN
+from .streaming import StreamOptions, coalesce_chunks
+
+
+class ChatConnection:
+    """Conversations multiplexed over a single `/ws/chat` websocket.
+
+    A message carrying a `request_id` is answered concurrently with the other ones,
+    and every frame of its answer is tagged with that ID, so a client can stream
+    several fighters or sessions at once. At most `max_concurrent_requests` requests
+    run at a time; further ones are rejected with an error frame.
+
+    Messages without a `request_id` are queued and answered one after the other with
+    untagged frames, as before multiplexing. They don't count toward the limit.
+
+    The connection keeps reading while answers stream, so a disconnection is noticed
+    at once and cancels the answers in progress, along with their graph runs and LLM
+    streams.
+
+    Frames are sent by a single writer task through a queue of `send_queue_size`
+    frames. When a client reads slower than the answers are generated, the queue
+    fills up and the streams wait for it instead of buffering without bound.
+
+    Args:
+        websocket (WebSocket): The accepted websocket.
+        max_concurrent_requests (int): Maximum number of requests answered at once.
+        send_queue_size (int): Maximum number of frames waiting to be sent.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_concurrent_requests: int = 4,
+        send_queue_size: int = 64,
+    ) -> None:
+        self.websocket = websocket
+        self.max_concurrent_requests = max_concurrent_requests
+
+        # Messages without a session belong to the session of the connection, if
+        # any, else to the fighter's shared thread as before sessions existed.
+        self.session_id = websocket.query_params.get("session_id")
+        self.stream_options = StreamOptions()
+
+        self._outgoing: asyncio.Queue[dict] = asyncio.Queue(maxsize=send_queue_size)
+        self._requests: dict[Any, asyncio.Task] = {}
+        self._sequential_requests: set[asyncio.Task] = set()
+        self._sequential_lock = asyncio.Lock()
+
+    @classmethod
+    def build_from_settings(cls, websocket: WebSocket) -> "ChatConnection":
+        return cls(
+            websocket,
+            max_concurrent_requests=settings.WS_MAX_CONCURRENT_REQUESTS,
+            send_queue_size=settings.WS_SEND_QUEUE_SIZE,
+        )
+
+    async def serve(self) -> None:
+        """Reads the client messages until it disconnects."""
+
+        writer = asyncio.create_task(self.__write())
+        try:
+            # Frame options are negotiated with query parameters when connecting, or
+            # later with a {"stream_options": {...}} message. Both are acknowledged.
+            try:
+                self.stream_options = StreamOptions(
+                    **{
+                        name: self.websocket.query_params[name]
+                        for name in StreamOptions.model_fields
+                        if name in self.websocket.query_params
+                    }
+                )
+            except ValidationError as e:
+                await self.send({"error": f"Invalid stream options: {e}"})
+
+            while not writer.done():
+                data = await self.websocket.receive_json()
+                await self.__dispatch(data)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            tasks = [*self._requests.values(), *self._sequential_requests, writer]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def send(self, frame: dict, request_id: Any = None) -> None:
+        """Queues a frame, waiting while the send queue is full.
+
+        Args:
+            frame (dict): The frame to send.
+            request_id (Any): ID of the request the frame answers, if any.
+        """
+
+        if request_id is not None:
+            frame = {"request_id": request_id, **frame}
+
+        await self._outgoing.put(frame)
+
+    async def __dispatch(self, data: dict) -> None:
+        request_id = data.get("request_id")
+
+        if "stream_options" in data:
+            try:
+                self.stream_options = StreamOptions(**data["stream_options"])
+                await self.send(
+                    {"stream_options": self.stream_options.model_dump()}, request_id
+                )
+            except (ValidationError, TypeError) as e:
+                await self.send({"error": f"Invalid stream options: {e}"}, request_id)
+
+            return
+
+        if "message" not in data or "ufcfighter_id" not in data:
+            await self.send(
+                {
+                    "error": "Invalid message format. Required fields: 'message' and 'ufcfighter_id'"
+                },
+                request_id,
+            )
+
+            return
+
+        if request_id is None:
+            task = asyncio.create_task(self.__answer_in_order(data))
+            self._sequential_requests.add(task)
+            task.add_done_callback(self._sequential_requests.discard)
+
+            return
+
+        if request_id in self._requests:
+            await self.send(
+                {"error": f"Request '{request_id}' is already in progress."}, request_id
+            )
+
+            return
+
+        if len(self._requests) >= self.max_concurrent_requests:
+            await self.send(
+                {
+                    "error": f"Too many concurrent requests. At most {self.max_concurrent_requests} are answered at once."
+                },
+                request_id,
+            )
+
+            return
+
+        task = asyncio.create_task(self.__stream_answer(data, request_id))
+        self._requests[request_id] = task
+        task.add_done_callback(lambda _: self._requests.pop(request_id, None))
+
+    async def __answer_in_order(self, data: dict) -> None:
+        # asyncio locks are fair, so the messages are answered in arrival order.
+        async with self._sequential_lock:
+            await self.__stream_answer(data, None)
+
+    async def __stream_answer(self, data: dict, request_id: Any) -> None:
+        session_id = data.get("session_id") or self.session_id
+        if session_id is not None:
+            session_id = str(session_id)
+        start_time = time.perf_counter()
+
+        try:
+            ufcfighter_factory = UFCFighterFactory()
+            ufcfighter = ufcfighter_factory.get_ufcfighter(data["ufcfighter_id"])
+
+            response_stream = get_streaming_response(
+                messages=data["message"],
+                ufcfighter_id=data["ufcfighter_id"],
+                ufcfighter_name=ufcfighter.name,
+                ufcfighter_perspective=ufcfighter.perspective,
+                ufcfighter_style=ufcfighter.style,
+                ufcfighter_context="",
+                session_id=session_id,
+            )
+
+            # Send initial message to indicate streaming has started
+            await self.send({"streaming": True, "session_id": session_id}, request_id)
+
+            # Stream the response, chunks merged into frames. The streams are closed
+            # right away if the answer is cancelled, stopping the graph run.
+            response_chunks = []
+            async with (
+                aclosing(response_stream),
+                aclosing(
+                    coalesce_chunks(response_stream, self.stream_options)
+                ) as frames,
+            ):
+                async for frame in frames:
+                    if not frame:
+                        continue
+
+                    if not response_chunks:
+                        WS_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start_time)
+                    response_chunks.append(frame)
+                    await self.send({"chunk": frame}, request_id)
+
+            await self.send(
+                {
+                    "response": "".join(response_chunks),
+                    "streaming": False,
+                    "session_id": session_id,
+                },
+                request_id,
+            )
+
+        except Exception as e:
+            error = {"error": str(e)}
+            rate_limit_error = find_rate_limit_error(e)
+            if rate_limit_error is not None:
+                error["retry_after"] = math.ceil(rate_limit_error.retry_after)
+
+            await self.send(error, request_id)
+
+    async def __write(self) -> None:
+        while True:
+            frame = await self._outgoing.get()
+            try:
+                await self.websocket.send_json(frame)
+            except (WebSocketDisconnect, RuntimeError) as e:
+                logger.debug(f"Stopped sending to a closed websocket: {e}")
+
+                return
@@ -0,0 +1,50 @@
+import asyncio
+from typing import Awaitable, TypeVar
+
+from fastapi import Request
+
+T = TypeVar("T")
+
+# Status logged for requests whose client went away, as nothing can be sent back.
+CLIENT_CLOSED_REQUEST = 499
+
+
+class ClientDisconnected(Exception):
+    """Raised when an HTTP client disconnects before its response is ready."""
+
+
+async def cancel_on_disconnect(request: Request, awaitable: Awaitable[T]) -> T:
+    """Awaits the response of a request, cancelling it if the client disconnects.
+
+    Starlette keeps running an endpoint after its client went away, so a conversation
+    turn would otherwise run, and pay for, an answer no one reads.
+
+    Args:
+        request (Request): The request, whose body has already been read.
+        awaitable (Awaitable[T]): Computes the response.
+
+    Returns:
+        T: The result of `awaitable`.
+
+    Raises:
+        ClientDisconnected: If the client disconnected first.
+    """
+
+    async def wait_for_disconnect() -> None:
+        while (await request.receive())["type"] != "http.disconnect":
+            pass
+
+    task = asyncio.ensure_future(awaitable)
+    watcher = asyncio.create_task(wait_for_disconnect())
+    try:
+        await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        watcher.cancel()
+        if not task.done():
+            task.cancel()
+        await asyncio.gather(task, watcher, return_exceptions=True)
+
+    if task.cancelled():
+        raise ClientDisconnected()
+
+    return task.result()
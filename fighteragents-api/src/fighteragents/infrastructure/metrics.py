@@ -0,0 +1,335 @@
+import asyncio
+import time
+from typing import Any, Callable, Iterable, Iterator
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Histogram,
+    disable_created_metrics,
+    generate_latest,
+)
+from prometheus_client.metrics_core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+from pymongo import monitoring
+
+# Prometheus text exposition format, as expected on a `/metrics` endpoint.
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 512, 1024, 2048, 4096, 8192)
+
+# `*_created` series would double the samples of every counter and histogram.
+disable_created_metrics()
+
+ComponentStats = list[tuple[dict[str, str], dict[str, Any]]]
+
+
+class StatsCollector(Collector):
+    """Exposes the `stats` of components, read at each scrape.
+
+    Entries listed in `counters`, and entries ending with `_total`, only ever grow
+    and are exposed as counters, named with a `_total` suffix. Other numeric entries,
+    such as queue sizes and hit rates, are exposed as gauges.
+
+    Args:
+        prefix (str): Prepended to each entry name, e.g. "fighteragents_rate_limiter".
+        get_stats (Callable[[], ComponentStats]): Returns the stats of each
+            component, with the labels telling them apart, e.g. the model name.
+            Non numeric entries are skipped.
+        counters (Iterable[str]): Names of the monotonic entries.
+    """
+
+    def __init__(
+        self,
+        prefix: str,
+        get_stats: Callable[[], ComponentStats],
+        counters: Iterable[str] = (),
+    ) -> None:
+        self.prefix = prefix
+        self.get_stats = get_stats
+        self.counters = frozenset(counters)
+
+    def collect(self) -> Iterator[Metric]:
+        families: dict[str, Metric] = {}
+        for labels, component_stats in self.get_stats():
+            for name, value in component_stats.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, int | float):
+                    continue
+
+                family = families.get(name)
+                if family is None:
+                    family = self.__create_family(name, list(labels))
+                    families[name] = family
+                family.add_metric(list(labels.values()), value)
+
+        yield from families.values()
+
+    def describe(self) -> Iterator[Metric]:
+        # Entries are only known once the components exist.
+        return iter(())
+
+    def __create_family(self, name: str, labelnames: list[str]) -> Metric:
+        documentation = f"'{name}' entry of the {self.prefix} stats."
+        if name in self.counters or name.endswith("_total"):
+            return CounterMetricFamily(
+                f"{self.prefix}_{name.removesuffix('_total')}",
+                documentation,
+                labels=labelnames,
+            )
+
+        return GaugeMetricFamily(
+            f"{self.prefix}_{name}", documentation, labels=labelnames
+        )
+
+
+HTTP_REQUEST_DURATION = Histogram(
+    "fighteragents_http_request_duration_seconds",
+    "Time to respond to HTTP requests, until the response starts for streams.",
+    ("method", "route", "status"),
+    buckets=LATENCY_BUCKETS,
+)
+WS_TIME_TO_FIRST_TOKEN = Histogram(
+    "fighteragents_ws_time_to_first_token_seconds",
+    "Time between a /ws/chat message and the first chunk of its answer.",
+    buckets=LATENCY_BUCKETS,
+)
+GRAPH_NODE_DURATION = Histogram(
+    "fighteragents_graph_node_duration_seconds",
+    "Duration of the LangGraph workflow nodes.",
+    ("node",),
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALL_DURATION = Histogram(
+    "fighteragents_llm_call_duration_seconds",
+    "Duration of LLM calls.",
+    ("provider", "model"),
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TIME_TO_FIRST_TOKEN = Histogram(
+    "fighteragents_llm_time_to_first_token_seconds",
+    "Time to the first token of streamed LLM calls.",
+    ("provider", "model"),
+    buckets=LATENCY_BUCKETS,
+)
+LLM_CALL_TOKENS = Histogram(
+    "fighteragents_llm_call_tokens",
+    "Tokens of LLM calls, by type (input or output).",
+    ("provider", "model", "type"),
+    buckets=TOKEN_BUCKETS,
+)
+LLM_CALL_ERRORS = Counter(
+    "fighteragents_llm_call_errors_total",
+    "Failed LLM calls.",
+    ("provider", "model"),
+)
+RETRIEVER_DURATION = Histogram(
+    "fighteragents_retriever_duration_seconds",
+    "Duration of retrievals, by retriever (caching wrapper and hybrid search).",
+    ("retriever",),
+    buckets=LATENCY_BUCKETS,
+)
+EMBEDDING_DURATION = Histogram(
+    "fighteragents_embedding_duration_seconds",
+    "Time spent computing embeddings, by operation (query or documents).",
+    ("operation",),
+    buckets=LATENCY_BUCKETS,
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "fighteragents_mongo_command_duration_seconds",
+    "Duration of the MongoDB commands of the checkpointer, by command and collection.",
+    ("command", "collection"),
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def render_metrics() -> bytes:
+    """Renders every registered metric in the text exposition format."""
+
+    return generate_latest(REGISTRY)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Records the duration of the workflow nodes, LLM calls and retrievals of the
+    graph runs it is attached to.
+
+    Graph nodes are the chain runs named after the `langgraph_node` of their
+    metadata. LLM calls are labelled with the provider and model LangChain reports.
+    """
+
+    # Only bookkeeping, so it runs within the callbacks rather than in a thread pool.
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._nodes: dict[UUID, tuple[str, float]] = {}
+        self._llm_calls: dict[UUID, tuple[dict[str, str], float, bool]] = {}
+        self._retrievals: dict[UUID, tuple[str, float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any],
+        inputs: dict[str, Any],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # The run of a node is named after it. Internal nodes such as `__start__`
+        # aren't recorded.
+        if node is None or kwargs.get("name") != node or node.startswith("__"):
+            return
+
+        self._nodes[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.__end_node(run_id)
+
+    def on_chain_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.__end_node(run_id)
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self.on_llm_start(serialized, [], run_id=run_id, metadata=metadata, **kwargs)
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        labels = {
+            "provider": metadata.get("ls_provider", "unknown"),
+            "model": metadata.get("ls_model_name", "unknown"),
+        }
+        self._llm_calls[run_id] = (labels, time.perf_counter(), False)
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs: Any) -> None:
+        llm_call = self._llm_calls.get(run_id)
+        if llm_call is None or llm_call[2]:
+            return
+
+        labels, start_time, _ = llm_call
+        LLM_TIME_TO_FIRST_TOKEN.labels(**labels).observe(
+            time.perf_counter() - start_time
+        )
+        self._llm_calls[run_id] = (labels, start_time, True)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        llm_call = self._llm_calls.pop(run_id, None)
+        if llm_call is None:
+            return
+
+        labels, start_time, _ = llm_call
+        LLM_CALL_DURATION.labels(**labels).observe(time.perf_counter() - start_time)
+
+        input_tokens, output_tokens = self.__get_token_usage(response)
+        if input_tokens or output_tokens:
+            LLM_CALL_TOKENS.labels(type="input", **labels).observe(input_tokens)
+            LLM_CALL_TOKENS.labels(type="output", **labels).observe(output_tokens)
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        llm_call = self._llm_calls.pop(run_id, None)
+        # Cancelled calls, such as losing hedges, didn't fail.
+        if llm_call is not None and not isinstance(error, asyncio.CancelledError):
+            LLM_CALL_ERRORS.labels(**llm_call[0]).inc()
+
+    def on_retriever_start(
+        self, serialized: dict[str, Any], query: str, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        self._retrievals[run_id] = (name, time.perf_counter())
+
+    def on_retriever_end(self, documents: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self.__end_retrieval(run_id)
+
+    def on_retriever_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        self.__end_retrieval(run_id)
+
+    def __end_node(self, run_id: UUID) -> None:
+        node = self._nodes.pop(run_id, None)
+        if node is not None:
+            GRAPH_NODE_DURATION.labels(node=node[0]).observe(
+                time.perf_counter() - node[1]
+            )
+
+    def __end_retrieval(self, run_id: UUID) -> None:
+        retrieval = self._retrievals.pop(run_id, None)
+        if retrieval is not None:
+            RETRIEVER_DURATION.labels(retriever=retrieval[0]).observe(
+                time.perf_counter() - retrieval[1]
+            )
+
+    @staticmethod
+    def __get_token_usage(response: LLMResult) -> tuple[int, int]:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if usage:
+                    return usage["input_tokens"], usage["output_tokens"]
+
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+
+        return (
+            token_usage.get("prompt_tokens", 0),
+            token_usage.get("completion_tokens", 0),
+        )
+
+
+# Shared by every graph run: it only keeps the start times of the runs in progress.
+metrics_callback_handler = MetricsCallbackHandler()
+
+
+class MongoCommandListener(monitoring.CommandListener):
+    """Records the duration of the commands sent by a MongoDB client."""
+
+    def __init__(self) -> None:
+        self._collections: dict[tuple[Any, int], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        self._collections[(event.connection_id, event.request_id)] = (
+            collection if isinstance(collection, str) else ""
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self.__observe(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self.__observe(event)
+
+    def __observe(
+        self, event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent
+    ) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.labels(
+            command=event.command_name, collection=collection
+        ).observe(event.duration_micros / 1_000_000)
@@ -0,0 +1,62 @@
+import asyncio
+import json
+from typing import AsyncGenerator, AsyncIterator
+
+# Headers keeping proxies and load balancers from buffering or caching the stream.
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def format_event(event: str, data: dict) -> str:
+    """Formats a Server-Sent Event. The data is encoded as one line of JSON."""
+
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def with_heartbeats(
+    messages: AsyncGenerator[str, None], heartbeat_seconds: float
+) -> AsyncIterator[str]:
+    """Adds a comment to an event stream whenever it is idle for `heartbeat_seconds`.
+
+    Clients ignore comments, but they keep proxies from closing the connection while
+    the answer is slow to come, for instance during a context retrieval.
+
+    Args:
+        messages: The formatted events.
+        heartbeat_seconds: Idle time after which a heartbeat is sent. 0 disables them.
+
+    Yields:
+        str: The events and heartbeats.
+    """
+
+    if heartbeat_seconds <= 0:
+        async for message in messages:
+            yield message
+
+        return
+
+    # The pending read is kept across heartbeats, as cancelling it would stop the
+    # stream.
+    next_message = asyncio.ensure_future(anext(messages))
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_message}, timeout=heartbeat_seconds)
+            if not done:
+                yield ": heartbeat\n\n"
+
+                continue
+
+            try:
+                message = next_message.result()
+            except StopAsyncIteration:
+                break
+
+            yield message
+
+            next_message = asyncio.ensure_future(anext(messages))
+    finally:
+        next_message.cancel()
+        await asyncio.gather(next_message, return_exceptions=True)
+        await messages.aclose()
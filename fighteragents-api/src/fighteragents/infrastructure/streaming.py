@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import AsyncIterator
+
+from pydantic import BaseModel, Field
+
+from fighteragents.config import settings
+
+
+class StreamOptions(BaseModel):
+    """How the chunks of a streamed answer are grouped into frames.
+
+    Attributes:
+        frame_interval_ms (int): Time window during which chunks are merged into one
+            frame. 0 sends every chunk in its own frame.
+        frame_max_bytes (int): Size at which a frame is sent before the end of its window.
+    """
+
+    frame_interval_ms: int = Field(
+        default=settings.STREAM_FRAME_INTERVAL_MS, ge=0, le=1000
+    )
+    frame_max_bytes: int = Field(
+        default=settings.STREAM_FRAME_MAX_BYTES, ge=1, le=64 * 1024
+    )
+
+
+async def coalesce_chunks(
+    chunks: AsyncIterator[str], options: StreamOptions
+) -> AsyncIterator[str]:
+    """Merges the chunks of a stream into fewer, larger frames.
+
+    A chunk arriving more than `frame_interval_ms` after the last frame, such as the
+    first one, is sent at once to keep the time to first token. Other chunks are
+    buffered until the window since the last frame ends or the buffer reaches
+    `frame_max_bytes`. The source is read by a separate task, so a frame is sent at
+    the end of its window even when the next chunk is late.
+
+    Args:
+        chunks: The streamed chunks.
+        options: Frame window and size.
+
+    Yields:
+        str: The frames.
+    """
+
+    if options.frame_interval_ms == 0:
+        async for chunk in chunks:
+            yield chunk
+
+        return
+
+    loop = asyncio.get_running_loop()
+    interval = options.frame_interval_ms / 1000
+
+    buffer: list[str] = []
+    buffer_bytes = 0
+    reading_done = False
+    reading_error: BaseException | None = None
+    waiting_for_chunk = False
+    wakeup: asyncio.Future | None = None
+
+    def wake() -> None:
+        if wakeup is not None and not wakeup.done():
+            wakeup.set_result(None)
+
+    async def read() -> None:
+        nonlocal buffer_bytes, reading_done, reading_error
+
+        try:
+            async for chunk in chunks:
+                buffer.append(chunk)
+                buffer_bytes += len(chunk.encode())
+                if waiting_for_chunk or buffer_bytes >= options.frame_max_bytes:
+                    wake()
+        except Exception as e:
+            reading_error = e
+        finally:
+            reading_done = True
+            wake()
+
+    # Buffered chunks are only handled once per frame, not once per chunk.
+    reader = asyncio.create_task(read())
+    try:
+        last_frame_time = float("-inf")
+        while True:
+            if not buffer and not reading_done:
+                wakeup = loop.create_future()
+                waiting_for_chunk = True
+                await wakeup
+                waiting_for_chunk = False
+
+            if not buffer:
+                break
+
+            remaining = last_frame_time + interval - time.monotonic()
+            if (
+                remaining > 0
+                and not reading_done
+                and buffer_bytes < options.frame_max_bytes
+            ):
+                wakeup = loop.create_future()
+                timer = loop.call_later(remaining, wake)
+                await wakeup
+                timer.cancel()
+
+            frame = "".join(buffer)
+            buffer.clear()
+            buffer_bytes = 0
+            last_frame_time = time.monotonic()
+
+            yield frame
+
+        if reading_error is not None:
+            raise reading_error
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
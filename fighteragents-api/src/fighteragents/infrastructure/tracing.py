@@ -0,0 +1,429 @@
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Any
+
+from langchain_core.tracers.base import BaseTracer
+from langchain_core.tracers.schemas import Run
+from loguru import logger
+from opik import config as opik_config
+from opik import httpx_client, rest_client_configurator
+from opik.api_objects import validation_helpers
+from opik.integrations.langchain import OpikTracer
+from opik.message_processing import messages
+from opik.message_processing.message_processors import (
+    BaseMessageProcessor,
+    MessageSender,
+)
+from opik.rest_api import client as rest_api_client
+
+from fighteragents.config import settings
+
+# Timeout of the export requests, as set by the Opik client itself.
+_REQUEST_TIMEOUT_SECONDS = 5.0
+
+# Logger of the usage warnings of the Opik helpers, which expect a standard logger.
+_opik_logger = logging.getLogger("opik")
+
+
+class TraceExporter:
+    """Exports spans and traces to Opik in batches, from a background thread.
+
+    Tracers hand their spans over to a bounded queue and return at once, so a slow
+    or unreachable collector never holds a request. Once the queue is full, new spans
+    are dropped and counted rather than waited for. A single exporter serves the
+    whole process, where the stock Opik tracer starts an Opik client, with its own
+    threads and connection pool, for every run.
+
+    Args:
+        sender (BaseMessageProcessor): Sends the batches to the Opik REST API.
+        config (opik_config.OpikConfig): Opik configuration of the exporter.
+        max_queue_size (int): Spans waiting to be exported before new ones are dropped.
+        batch_size (int): Maximum spans sent per request.
+        flush_interval_seconds (float): Longest time a span waits for its batch to
+            fill.
+    """
+
+    def __init__(
+        self,
+        sender: BaseMessageProcessor,
+        config: opik_config.OpikConfig,
+        max_queue_size: int = 10_000,
+        batch_size: int = 200,
+        flush_interval_seconds: float = 1.0,
+    ) -> None:
+        self.sender = sender
+        self.config = config
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self.queued = 0
+        self.exported = 0
+        self.dropped = 0
+        self.sampled_runs = 0
+        self.unsampled_runs = 0
+        self.error_runs_exported = 0
+        self._lock = threading.Lock()
+        self._queue: queue.Queue[messages.BaseMessage] = queue.Queue(
+            maxsize=max_queue_size
+        )
+        self._closed = threading.Event()
+        self._thread = threading.Thread(
+            target=self.__run, name="OpikTraceExporter", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def connect(
+        cls,
+        max_queue_size: int = 10_000,
+        batch_size: int = 200,
+        flush_interval_seconds: float = 1.0,
+    ) -> "TraceExporter":
+        """Creates an exporter sending to the Opik server of the Opik configuration,
+        with the same HTTP client setup as the Opik client."""
+
+        config = opik_config.get_from_user_inputs()
+        opik_config.check_for_misconfiguration(config)
+
+        rest_client = rest_api_client.OpikApi(
+            base_url=config.url_override,
+            httpx_client=httpx_client.get(
+                workspace=config.workspace,
+                api_key=config.api_key,
+                check_tls_certificate=config.check_tls_certificate,
+            ),
+            timeout=_REQUEST_TIMEOUT_SECONDS,
+        )
+        rest_client_configurator.configure(rest_client)
+
+        return cls(
+            MessageSender(rest_client),
+            config,
+            max_queue_size=max_queue_size,
+            batch_size=batch_size,
+            flush_interval_seconds=flush_interval_seconds,
+        )
+
+    def put(self, message: messages.BaseMessage) -> bool:
+        """Queues a span or trace for export, unless the queue is full.
+
+        Returns:
+            bool: Whether the message was queued.
+        """
+
+        if self._closed.is_set():
+            return False
+
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                dropped = self.dropped
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.warning(
+                    f"Opik export queue full, {dropped} spans dropped so far."
+                )
+
+            return False
+
+        with self._lock:
+            self.queued += 1
+
+        return True
+
+    def record_run(self, sampled: bool, error_exported: bool = False) -> None:
+        with self._lock:
+            if sampled:
+                self.sampled_runs += 1
+            else:
+                self.unsampled_runs += 1
+            if error_exported:
+                self.error_runs_exported += 1
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Waits for the queued spans to be exported. Blocks, so it's meant for
+        shutdown and tools rather than the request path.
+
+        Returns:
+            bool: Whether every queued span was exported in time.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+
+        return True
+
+    def close(self, timeout: float | None = None) -> bool:
+        """Exports the queued spans within `timeout`, then stops the export thread.
+
+        Returns:
+            bool: Whether every queued span was exported in time.
+        """
+
+        flushed = self.flush(timeout)
+        self._closed.set()
+        self._thread.join(timeout=self.flush_interval_seconds)
+
+        return flushed
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "queued": self.queued,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "queue_size": self._queue.qsize(),
+            "sampled_runs": self.sampled_runs,
+            "unsampled_runs": self.unsampled_runs,
+            "error_runs_exported": self.error_runs_exported,
+        }
+
+    def __run(self) -> None:
+        while not self._closed.is_set():
+            batch = self.__next_batch()
+            if not batch:
+                continue
+
+            try:
+                self.__send(batch)
+            finally:
+                with self._lock:
+                    self.exported += len(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+    def __next_batch(self) -> list[messages.BaseMessage]:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval_seconds)]
+        except queue.Empty:
+            return []
+
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while len(batch) < self.batch_size and not self._closed.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def __send(self, batch: list[messages.BaseMessage]) -> None:
+        traces = [m for m in batch if isinstance(m, messages.CreateTraceMessage)]
+        spans = [m for m in batch if isinstance(m, messages.CreateSpanMessage)]
+
+        # Errors are logged by the sender, and the batch is lost.
+        if traces:
+            self.sender.process(messages.CreateTraceBatchMessage(batch=traces))
+        if spans:
+            self.sender.process(messages.CreateSpansBatchMessage(batch=spans))
+
+
+class _ExportClient:
+    """Stands in for the Opik client of a `SampledOpikTracer`, turning its spans and
+    traces into messages queued on the exporter."""
+
+    def __init__(self, exporter: TraceExporter) -> None:
+        self.exporter = exporter
+
+    @property
+    def config(self) -> opik_config.OpikConfig:
+        return self.exporter.config
+
+    def span(self, **span_data: Any) -> None:
+        parsed_usage = validation_helpers.validate_and_parse_usage(
+            span_data.get("usage"), _opik_logger
+        )
+        metadata = span_data.get("metadata")
+        if parsed_usage.full_usage is not None:
+            metadata = {"usage": parsed_usage.full_usage, **(metadata or {})}
+
+        self.exporter.put(
+            messages.CreateSpanMessage(
+                span_id=span_data["id"],
+                trace_id=span_data["trace_id"],
+                project_name=span_data.get("project_name") or self.config.project_name,
+                parent_span_id=span_data.get("parent_span_id"),
+                name=span_data.get("name"),
+                type=span_data.get("type", "general"),
+                start_time=span_data["start_time"],
+                end_time=span_data.get("end_time"),
+                input=span_data.get("input"),
+                output=span_data.get("output"),
+                metadata=metadata,
+                tags=span_data.get("tags"),
+                usage=parsed_usage.supported_usage,
+                model=span_data.get("model"),
+                provider=span_data.get("provider"),
+                error_info=span_data.get("error_info"),
+                total_cost=span_data.get("total_cost"),
+            )
+        )
+
+    def trace(self, **trace_data: Any) -> None:
+        """Queues a trace. Returns None, so the tracer keeps no trace objects."""
+
+        self.exporter.put(
+            messages.CreateTraceMessage(
+                trace_id=trace_data["id"],
+                project_name=trace_data.get("project_name") or self.config.project_name,
+                name=trace_data.get("name"),
+                start_time=trace_data["start_time"],
+                end_time=trace_data.get("end_time"),
+                input=trace_data.get("input"),
+                output=trace_data.get("output"),
+                metadata=trace_data.get("metadata"),
+                tags=trace_data.get("tags"),
+                error_info=trace_data.get("error_info"),
+            )
+        )
+
+    def flush(self) -> None:
+        """Doesn't wait: the exporter sends the spans in the background."""
+
+
+class SampledOpikTracer(OpikTracer):
+    """Opik tracer exporting a sample of the runs through a shared `TraceExporter`.
+
+    Whether a run is traced is decided when the tracer is created, for the whole
+    run. Unsampled runs cost no Opik work while they run. If one fails and
+    `trace_errors` is set, its spans are rebuilt from the run tree LangChain keeps
+    until the root run ends, and exported all the same.
+
+    Args:
+        exporter (TraceExporter): Exporter sending the spans to Opik.
+        sampled (bool): Whether the run is traced.
+        trace_errors (bool): Whether the run is traced anyway if it fails.
+        tags (list[str] | None): Tags of the trace.
+        metadata (dict | None): Metadata of the trace, such as the graph definition.
+        project_name (str | None): Opik project of the trace.
+    """
+
+    def __init__(
+        self,
+        exporter: TraceExporter,
+        sampled: bool,
+        trace_errors: bool = True,
+        tags: list[str] | None = None,
+        metadata: dict[str, Any] | None = None,
+        project_name: str | None = None,
+    ) -> None:
+        # Mirrors `OpikTracer.__init__`, minus the Opik client it creates. The opik
+        # pin in pyproject.toml keeps both in line, see tests/test_tracing.py.
+        BaseTracer.__init__(self)
+        self._trace_default_metadata = metadata if metadata is not None else {}
+        self._trace_default_tags = tags
+        self._span_data_map = {}
+        self._created_traces_data_map = {}
+        self._created_traces = []
+        self._externally_created_traces_ids = set()
+        self._project_name = project_name
+        self._opik_client = _ExportClient(exporter)
+
+        self.exporter = exporter
+        self.sampled = sampled
+        self.trace_errors = trace_errors
+
+    def _skip_tracking(self) -> bool:
+        return not self.sampled or super()._skip_tracking()
+
+    def _persist_run(self, run: Run) -> None:
+        if self.sampled:
+            if not super()._skip_tracking():
+                super()._persist_run(run)
+            self.exporter.record_run(sampled=True)
+
+            return
+
+        error_exported = (
+            run.error is not None and self.trace_errors and not super()._skip_tracking()
+        )
+        if error_exported:
+            self.__replay(run)
+            super()._persist_run(run)
+        self.exporter.record_run(sampled=False, error_exported=error_exported)
+
+    def __replay(self, run: Run) -> None:
+        """Records the spans of a finished run tree, as if it had been traced."""
+
+        self._process_start_span(run)
+        for child_run in run.child_runs:
+            self.__replay(child_run)
+
+        # The root span is recorded by `_persist_run`.
+        if run.parent_run_id is None:
+            return
+        if run.error is not None:
+            self._process_end_span_with_error(run)
+        else:
+            self._process_end_span(run)
+
+
+_exporter: TraceExporter | None = None
+_exporter_lock = threading.Lock()
+
+
+def get_trace_exporter() -> TraceExporter:
+    """Returns the process-wide trace exporter, sized from settings."""
+
+    global _exporter
+
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = TraceExporter.connect(
+                max_queue_size=settings.OPIK_EXPORT_QUEUE_SIZE,
+                batch_size=settings.OPIK_EXPORT_BATCH_SIZE,
+                flush_interval_seconds=settings.OPIK_EXPORT_FLUSH_INTERVAL_SECONDS,
+            )
+
+    return _exporter
+
+
+def create_tracer(metadata: dict[str, Any] | None = None) -> SampledOpikTracer:
+    """Creates the tracer of a run, sampled at `OPIK_TRACE_SAMPLE_RATE`.
+
+    Args:
+        metadata: Metadata of the trace, such as the graph definition.
+
+    Returns:
+        SampledOpikTracer: A tracer for a single run.
+    """
+
+    return SampledOpikTracer(
+        get_trace_exporter(),
+        sampled=random.random() < settings.OPIK_TRACE_SAMPLE_RATE,
+        trace_errors=settings.OPIK_TRACE_ERRORS,
+        metadata=metadata,
+    )
+
+
+def get_trace_export_stats() -> dict | None:
+    """Returns the stats of the trace exporter, or None if nothing was traced yet."""
+
+    return _exporter.stats if _exporter is not None else None
+
+
+def close_trace_exporter() -> None:
+    """Exports the pending spans, waiting up to
+    `OPIK_EXPORT_SHUTDOWN_TIMEOUT_SECONDS`. Meant to be called once at shutdown."""
+
+    global _exporter
+
+    with _exporter_lock:
+        exporter, _exporter = _exporter, None
+
+    if exporter is not None and not exporter.close(
+        settings.OPIK_EXPORT_SHUTDOWN_TIMEOUT_SECONDS
+    ):
+        logger.warning(
+            f"{exporter.stats['queue_size']} spans weren't exported to Opik in time."
+        )
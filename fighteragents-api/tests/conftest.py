@@ -0,0 +1,13 @@
+import os
+
+import pytest
+
+# Settings require the API keys, which the unit tests never use.
+os.environ.setdefault("GROQ_API_KEY", "test")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("OPIK_TRACK_DISABLE", "true")
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
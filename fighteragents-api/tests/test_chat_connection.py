@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+from fastapi import WebSocketDisconnect
+
+from fighteragents.infrastructure import chat_connection
+from fighteragents.infrastructure.chat_connection import ChatConnection
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeWebSocket:
+    """Websocket receiving `messages`, then disconnecting once `expected_answers`
+    answers or errors were sent."""
+
+    def __init__(self, messages: list[dict], expected_answers: int) -> None:
+        self.query_params = {"frame_interval_ms": "0"}
+        self.sent: list[dict] = []
+
+        self._messages = list(messages)
+        self._expected_answers = expected_answers
+        self._answered = asyncio.Event()
+
+    async def receive_json(self) -> dict:
+        if self._messages:
+            return self._messages.pop(0)
+
+        await asyncio.wait_for(self._answered.wait(), timeout=5)
+        raise WebSocketDisconnect()
+
+    async def send_json(self, frame: dict) -> None:
+        self.sent.append(frame)
+        if len(self.get_answers()) >= self._expected_answers:
+            self._answered.set()
+
+    def get_answers(self) -> list[dict]:
+        return [frame for frame in self.sent if "response" in frame or "error" in frame]
+
+
+@pytest.fixture(autouse=True)
+def stand_in_response(monkeypatch):
+    async def get_streaming_response(messages: str, **kwargs):
+        await asyncio.sleep(0.01)
+        for word in messages.split():
+            yield f"{word} "
+
+    monkeypatch.setattr(
+        chat_connection, "get_streaming_response", get_streaming_response
+    )
+
+
+async def serve(messages: list[dict], expected_answers: int) -> FakeWebSocket:
+    websocket = FakeWebSocket(messages, expected_answers)
+    await ChatConnection(websocket, max_concurrent_requests=4).serve()
+
+    return websocket
+
+
+async def test_messages_without_request_id_are_all_answered_in_order():
+    messages = [
+        {"message": f"Message {index}", "ufcfighter_id": "conor"} for index in range(6)
+    ]
+
+    websocket = await serve(messages, expected_answers=6)
+
+    assert [answer.get("response") for answer in websocket.get_answers()] == [
+        f"Message {index} " for index in range(6)
+    ]
+
+
+async def test_keyed_requests_over_the_limit_are_rejected():
+    messages = [
+        {"message": f"Message {index}", "ufcfighter_id": "conor", "request_id": index}
+        for index in range(5)
+    ]
+
+    websocket = await serve(messages, expected_answers=5)
+
+    answers = websocket.get_answers()
+    assert [answer["request_id"] for answer in answers if "error" in answer] == [4]
+    assert sum("response" in answer for answer in answers) == 4
+
+
+async def test_messages_without_request_id_bypass_the_limit():
+    messages = [
+        {"message": f"Keyed {index}", "ufcfighter_id": "conor", "request_id": index}
+        for index in range(4)
+    ]
+    messages.append({"message": "Unkeyed", "ufcfighter_id": "conor"})
+
+    websocket = await serve(messages, expected_answers=5)
+
+    answers = websocket.get_answers()
+    assert not [answer for answer in answers if "error" in answer]
+    assert {"response": "Unkeyed ", "streaming": False, "session_id": None} in answers
+
+
+async def test_empty_chunks_are_not_sent_nor_timed(monkeypatch):
+    observed = []
+
+    class Recorder:
+        def observe(self, value: float) -> None:
+            observed.append(value)
+
+    async def get_streaming_response(messages: str, **kwargs):
+        yield ""
+        await asyncio.sleep(0.05)
+        yield "Precision."
+
+    monkeypatch.setattr(
+        chat_connection, "get_streaming_response", get_streaming_response
+    )
+    monkeypatch.setattr(chat_connection, "WS_TIME_TO_FIRST_TOKEN", Recorder())
+
+    websocket = await serve([{"message": "Hi", "ufcfighter_id": "conor"}], 1)
+
+    assert [frame["chunk"] for frame in websocket.sent if "chunk" in frame] == [
+        "Precision."
+    ]
+    assert len(observed) == 1 and observed[0] >= 0.05
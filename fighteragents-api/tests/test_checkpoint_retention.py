@@ -0,0 +1,132 @@
+import uuid
+
+from fighteragents.application.conversation_service.checkpoint_retention import (
+    UUID_EPOCH_OFFSET,
+    get_checkpoint_time,
+    select_deletions,
+)
+
+NOW = 1_750_000_000.0
+DAY = 24 * 60 * 60
+
+
+def checkpoint_id(created_at: float) -> str:
+    """UUIDv6 checkpoint ID created at `created_at`, as LangGraph generates them."""
+
+    timestamp = int(created_at * 1e7) + UUID_EPOCH_OFFSET
+    value = (
+        (timestamp >> 12) << 80
+        | 6 << 76
+        | (timestamp & 0xFFF) << 64
+        | 0b10 << 62
+        | uuid.uuid4().int & ((1 << 62) - 1)
+    )
+
+    return str(uuid.UUID(int=value))
+
+
+def checkpoints_of(thread_id: str, checkpoint_ids: list[str]) -> dict:
+    return {
+        "_id": {"thread_id": thread_id, "checkpoint_ns": ""},
+        "checkpoints": [
+            {"id": id_, "size": 100} for id_ in sorted(checkpoint_ids, reverse=True)
+        ],
+    }
+
+
+def writes_of(thread_id: str, checkpoint_id: str, count: int = 2) -> dict:
+    return {
+        "_id": {
+            "thread_id": thread_id,
+            "checkpoint_ns": "",
+            "checkpoint_id": checkpoint_id,
+        },
+        "count": count,
+        "size": 10 * count,
+    }
+
+
+def test_checkpoint_time_is_read_from_the_id():
+    assert abs(get_checkpoint_time(checkpoint_id(NOW)) - NOW) < 1e-3
+    assert get_checkpoint_time(str(uuid.uuid4())) == float("inf")
+    assert get_checkpoint_time("not-a-uuid") == float("inf")
+
+
+def test_only_the_most_recent_checkpoints_are_kept():
+    ids = [checkpoint_id(NOW - step) for step in range(5)]
+
+    plan = select_deletions(
+        [checkpoints_of("conor", ids)], [], keep_last=2, idle_ttl_seconds=DAY, now=NOW
+    )
+
+    assert plan.checkpoint_queries == [
+        {"thread_id": "conor", "checkpoint_ns": "", "checkpoint_id": {"$in": ids[2:]}}
+    ]
+    assert plan.report.checkpoints_deleted == 3
+    assert plan.report.reclaimed_bytes == 300
+    assert plan.expired_thread_ids == set()
+
+
+def test_writes_of_superseded_checkpoints_are_deleted():
+    ids = [checkpoint_id(NOW - step) for step in range(3)]
+
+    plan = select_deletions(
+        [checkpoints_of("conor", ids)],
+        [writes_of("conor", id_) for id_ in ids],
+        keep_last=10,
+        idle_ttl_seconds=DAY,
+        now=NOW,
+    )
+
+    assert plan.checkpoint_queries == []
+    assert [query["checkpoint_id"] for query in plan.writes_queries] == ids[1:]
+    assert plan.report.writes_deleted == 4
+
+
+def test_writes_of_threads_started_after_the_scan_are_kept():
+    plan = select_deletions(
+        [],
+        [writes_of("khabib", checkpoint_id(NOW))],
+        keep_last=1,
+        idle_ttl_seconds=DAY,
+        now=NOW,
+    )
+
+    assert plan.writes_queries == []
+
+
+def test_idle_threads_are_deleted_entirely():
+    idle_ids = [checkpoint_id(NOW - 31 * DAY - step) for step in range(3)]
+    active_ids = [checkpoint_id(NOW - step) for step in range(3)]
+
+    plan = select_deletions(
+        [checkpoints_of("conor", idle_ids), checkpoints_of("khabib", active_ids)],
+        [writes_of("conor", idle_ids[0]), writes_of("khabib", active_ids[0])],
+        keep_last=10,
+        idle_ttl_seconds=30 * DAY,
+        now=NOW,
+    )
+
+    assert plan.expired_thread_ids == {"conor"}
+    assert plan.checkpoint_queries == [
+        {"thread_id": "conor", "checkpoint_ns": "", "checkpoint_id": {"$in": idle_ids}}
+    ]
+    assert plan.writes_queries == [writes_of("conor", idle_ids[0])["_id"]]
+    assert plan.report.threads_scanned == 2
+    assert plan.report.threads_expired == 1
+
+
+def test_idle_threads_are_kept_without_ttl():
+    ids = [checkpoint_id(NOW - 365 * DAY)]
+
+    plan = select_deletions(
+        [checkpoints_of("conor", ids)],
+        [writes_of("conor", ids[0])],
+        keep_last=1,
+        idle_ttl_seconds=0,
+        now=NOW,
+    )
+
+    assert plan.expired_thread_ids == set()
+    assert plan.checkpoint_queries == []
+    assert plan.writes_queries == []
@@ -0,0 +1,137 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from fighteragents.application.conversation_service import checkpoint_serde
+from fighteragents.application.conversation_service.checkpoint_serde import (
+    COMPRESSED_REF_TYPE,
+    REF_TYPE,
+    CompactCheckpointSerializer,
+)
+from fighteragents.domain.ufcfighter_factory import (
+    FIGHTER_NAMES,
+    FIGHTER_PERSPECTIVES,
+    FIGHTER_STYLES,
+)
+
+
+@pytest.fixture
+def serde() -> CompactCheckpointSerializer:
+    return CompactCheckpointSerializer(min_compress_size=256)
+
+
+def build_checkpoint(ufcfighter_id: str = "conor") -> dict:
+    checkpoint = empty_checkpoint()
+    checkpoint["channel_values"] = {
+        "messages": [
+            HumanMessage(content="How do you prepare for a fight?", id="1"),
+            AIMessage(content="With belief and precision.", id="2"),
+        ],
+        "ufcfighter_name": FIGHTER_NAMES[ufcfighter_id],
+        "ufcfighter_perspective": FIGHTER_PERSPECTIVES[ufcfighter_id],
+        "ufcfighter_style": FIGHTER_STYLES[ufcfighter_id],
+        "ufcfighter_context": "",
+        "summary": "",
+    }
+
+    return checkpoint
+
+
+def test_checkpoint_round_trips_without_persona_text(serde):
+    checkpoint = build_checkpoint()
+
+    type_, data = serde.dumps_typed(checkpoint)
+
+    assert type_ == COMPRESSED_REF_TYPE
+    assert serde.loads_typed((type_, data)) == checkpoint
+    assert FIGHTER_PERSPECTIVES["conor"].encode() not in serde._decompressor.decompress(
+        data
+    )
+
+
+def test_persona_channel_write_round_trips(serde):
+    type_, data = serde.dumps_typed(FIGHTER_STYLES["khabib"])
+
+    assert type_ == REF_TYPE
+    assert FIGHTER_STYLES["khabib"].encode() not in data
+    assert serde.loads_typed((type_, data)) == FIGHTER_STYLES["khabib"]
+
+
+def test_small_payloads_are_not_compressed(serde):
+    type_, data = serde.dumps_typed({"step": 1, "source": "loop"})
+
+    assert type_ == REF_TYPE
+    assert serde.loads_typed((type_, data)) == {"step": 1, "source": "loop"}
+
+
+@pytest.mark.parametrize("value", ["", "Conor", "Just a user message.", 42, None])
+def test_other_values_round_trip(serde, value):
+    assert serde.loads_typed(serde.dumps_typed(value)) == value
+
+
+def test_bytes_are_stored_as_is(serde):
+    assert serde.dumps_typed(b"raw") == ("bytes", b"raw")
+    assert serde.loads_typed(("bytes", b"raw")) == b"raw"
+
+
+def test_reads_checkpoints_of_the_default_serializer(serde):
+    checkpoint = build_checkpoint("islam")
+
+    assert serde.loads_typed(JsonPlusSerializer().dumps_typed(checkpoint)) == checkpoint
+
+
+def test_edited_persona_applies_to_stored_checkpoints(serde, monkeypatch):
+    data = serde.dumps_typed(build_checkpoint())
+
+    edited_perspectives = {**FIGHTER_PERSPECTIVES, "conor": "An edited perspective."}
+    monkeypatch.setitem(
+        checkpoint_serde.FIGHTER_FIELDS, "ufcfighter_perspective", edited_perspectives
+    )
+
+    loaded = serde.loads_typed(data)
+
+    assert (
+        loaded["channel_values"]["ufcfighter_perspective"] == "An edited perspective."
+    )
+    assert loaded["channel_values"]["ufcfighter_name"] == FIGHTER_NAMES["conor"]
+
+
+def test_compact_checkpoints_stay_readable_with_the_flag_off(serde):
+    checkpoint = build_checkpoint()
+    compact_data = serde.dumps_typed(checkpoint)
+    default_serde = CompactCheckpointSerializer(compact=False)
+
+    assert default_serde.loads_typed(compact_data) == checkpoint
+    assert default_serde.dumps_typed(checkpoint)[0] == "msgpack"
+
+
+def test_build_from_settings_follows_the_flag(monkeypatch):
+    monkeypatch.setattr(checkpoint_serde.settings, "CHECKPOINT_SERDE_COMPACT", False)
+    type_, _ = CompactCheckpointSerializer.build_from_settings().dumps_typed(
+        build_checkpoint()
+    )
+
+    assert type_ == "msgpack"
+
+
+def test_removed_fighter_loads_as_empty(serde, monkeypatch):
+    data = serde.dumps_typed(build_checkpoint())
+
+    remaining_names = {
+        ufcfighter_id: name
+        for ufcfighter_id, name in FIGHTER_NAMES.items()
+        if ufcfighter_id != "conor"
+    }
+    monkeypatch.setitem(
+        checkpoint_serde.FIGHTER_FIELDS, "ufcfighter_name", remaining_names
+    )
+
+    loaded = serde.loads_typed(data)
+
+    assert loaded["channel_values"]["ufcfighter_name"] == ""
+    assert loaded["channel_values"]["ufcfighter_style"] == FIGHTER_STYLES["conor"]
+    assert (
+        loaded["channel_values"]["messages"]
+        == build_checkpoint()["channel_values"]["messages"]
+    )
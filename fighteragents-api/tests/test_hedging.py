@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from fighteragents.application.conversation_service.workflow.hedging import (
+    HedgedResponseChain,
+    HedgingPolicy,
+    LatencyTracker,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class StreamingChain:
+    """Chain streaming `answer` as a single token after `delay` seconds."""
+
+    def __init__(self, answer: str, delay: float) -> None:
+        self.answer = answer
+        self.delay = delay
+        self.cancelled = False
+
+    async def ainvoke(self, input, config=None) -> str:
+        try:
+            await asyncio.sleep(self.delay)
+            for handler in config["callbacks"]:
+                handler.on_llm_new_token(self.answer)
+            await asyncio.sleep(0)
+        except asyncio.CancelledError:
+            self.cancelled = True
+
+            raise
+
+        return self.answer
+
+
+def get_policy(**kwargs) -> HedgingPolicy:
+    return HedgingPolicy(
+        "llama-3.3-70b",
+        "llama-3.1-8b",
+        LatencyTracker(),
+        default_deadline_seconds=0.05,
+        min_deadline_seconds=0.01,
+        **kwargs,
+    )
+
+
+async def test_fallback_answers_when_the_primary_is_late():
+    primary = StreamingChain("Primary answer.", delay=5)
+    fallback = StreamingChain("Fallback answer.", delay=0.01)
+    policy = get_policy(max_ratio=1.0)
+
+    answer = await HedgedResponseChain(primary, fallback, policy).ainvoke({})
+
+    assert answer == "Fallback answer."
+    assert primary.cancelled
+    assert policy.stats["hedges"] == 1
+    assert policy.stats["hedges_won"] == 1
+
+
+async def test_primary_answering_in_time_is_not_hedged():
+    primary = StreamingChain("Primary answer.", delay=0)
+    fallback = StreamingChain("Fallback answer.", delay=0)
+    policy = get_policy(max_ratio=1.0)
+
+    answer = await HedgedResponseChain(primary, fallback, policy).ainvoke({})
+
+    assert answer == "Primary answer."
+    assert policy.stats["hedges"] == 0
+
+
+def test_hedge_budget_applies_to_recent_calls():
+    policy = get_policy(max_ratio=0.5, budget_window=4)
+
+    # Quiet calls don't bank hedges for a later burst.
+    policy.calls = 1_000
+    hedged = []
+    for _ in range(4):
+        policy.calls += 1
+        hedged.append(policy.try_start_hedge())
+        if hedged[-1]:
+            policy.finish_hedge(won=False)
+    assert hedged == [True, True, False, False]
+
+    # Hedges older than the window free the budget again.
+    policy.calls += 2
+    assert policy.try_start_hedge()
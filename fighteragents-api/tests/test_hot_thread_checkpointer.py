@@ -0,0 +1,200 @@
+import asyncio
+
+import pytest
+from langgraph.checkpoint.base import create_checkpoint, empty_checkpoint
+from langgraph.checkpoint.memory import MemorySaver
+
+from fighteragents.application.conversation_service.hot_thread_checkpointer import (
+    HotThreadCheckpointSaver,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class GatedSaver(MemorySaver):
+    """Memory saver whose reads and writes wait for their gate, and whose writes fail
+    while `failing` is set."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.read_gate = asyncio.Event()
+        self.read_gate.set()
+        self.failing = False
+        self.reads = 0
+
+    async def aget_tuple(self, config):
+        self.reads += 1
+        await self.read_gate.wait()
+
+        return await super().aget_tuple(config)
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        await self.gate.wait()
+        if self.failing:
+            raise ConnectionError("MongoDB is unreachable.")
+
+        return await super().aput(config, checkpoint, metadata, new_versions)
+
+
+def thread_config(thread_id: str) -> dict:
+    return {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+
+
+async def put(saver: HotThreadCheckpointSaver, thread_id: str, step: int = 0) -> dict:
+    checkpoint = create_checkpoint(empty_checkpoint(), None, step)
+    checkpoint["channel_values"] = {"messages": [f"{thread_id} {step}"]}
+
+    return await saver.aput(
+        thread_config(thread_id), checkpoint, {"source": "loop", "step": step}, {}
+    )
+
+
+async def read_messages(saver: HotThreadCheckpointSaver, thread_id: str) -> list | None:
+    checkpoint_tuple = await saver.aget_tuple(thread_config(thread_id))
+    if checkpoint_tuple is None:
+        return None
+
+    return checkpoint_tuple.checkpoint["channel_values"]["messages"]
+
+
+async def test_latest_checkpoint_is_served_from_memory():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver)
+
+    await put(cache, "conor")
+
+    assert await read_messages(cache, "conor") == ["conor 0"]
+    assert saver.reads == 0
+    assert cache.stats["hits"] == 1
+
+
+async def test_least_recently_used_thread_is_evicted():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver, max_threads=2)
+
+    await put(cache, "conor")
+    await put(cache, "khabib")
+    await read_messages(cache, "conor")
+    await put(cache, "islam")
+    await cache.aflush()
+
+    assert cache.stats["threads"] == 2
+    assert await read_messages(cache, "khabib") == ["khabib 0"]
+    assert saver.reads == 1
+    assert await read_messages(cache, "conor") == ["conor 0"]
+    assert saver.reads == 2
+
+
+async def test_aflush_waits_for_pending_writes():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver)
+
+    saver.gate.clear()
+    await put(cache, "conor")
+    assert cache.stats["pending_flushes"] == 1
+    assert await saver.aget_tuple(thread_config("conor")) is None
+
+    flushed = asyncio.create_task(cache.aflush())
+    await asyncio.sleep(0)
+    assert not flushed.done()
+
+    saver.gate.set()
+    await flushed
+
+    assert cache.stats["pending_flushes"] == 0
+    assert await saver.aget_tuple(thread_config("conor")) is not None
+
+
+async def test_failed_flush_serves_thread_from_saver_during_backoff():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver, flush_failure_backoff_seconds=60.0)
+
+    await put(cache, "conor", step=0)
+    await cache.aflush()
+    saver.failing = True
+    await put(cache, "conor", step=1)
+    await cache.aflush()
+
+    assert cache.stats["flush_failures"] == 1
+    assert cache.stats["threads"] == 0
+
+    saver.failing = False
+    await put(cache, "conor", step=2)
+    await cache.aflush()
+
+    # Not cached again before the backoff ends.
+    assert await read_messages(cache, "conor") == ["conor 2"]
+    assert await read_messages(cache, "conor") == ["conor 2"]
+    assert saver.reads == 2
+
+
+async def test_thread_is_cached_again_after_backoff():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver, flush_failure_backoff_seconds=0.0)
+
+    saver.failing = True
+    await put(cache, "conor", step=0)
+    await cache.aflush()
+    saver.failing = False
+    await put(cache, "conor", step=1)
+
+    assert await read_messages(cache, "conor") == ["conor 1"]
+    assert saver.reads == 0
+
+
+async def test_invalidated_thread_is_read_from_saver():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver)
+
+    await put(cache, "conor")
+    await put(cache, "khabib")
+    await cache.aflush()
+    saver.storage.pop("conor")
+    cache.invalidate("conor")
+
+    assert await read_messages(cache, "conor") is None
+    assert await read_messages(cache, "khabib") == ["khabib 0"]
+    assert saver.reads == 1
+
+
+async def test_reset_thread_comes_back_empty():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver)
+
+    await put(cache, "conor", step=0)
+    await cache.aflush()
+    saver.gate.clear()
+    # The first write is being flushed, the second one is queued behind it.
+    await put(cache, "conor", step=1)
+    await put(cache, "conor", step=2)
+
+    clearing = asyncio.create_task(cache.aclear())
+    await asyncio.sleep(0)
+    saver.gate.set()
+    await clearing
+    # The reset drops the collections once the cache is cleared.
+    saver.storage.clear()
+    await cache.aflush()
+
+    assert await read_messages(cache, "conor") is None
+    assert cache.stats["discarded_writes"] == 1
+
+
+async def test_read_started_before_invalidation_is_not_cached():
+    saver = GatedSaver()
+    cache = HotThreadCheckpointSaver(saver)
+
+    await put(cache, "conor")
+    await cache.aflush()
+    cache.invalidate()
+
+    saver.read_gate.clear()
+    reading = asyncio.create_task(read_messages(cache, "conor"))
+    await asyncio.sleep(0)
+    cache.invalidate("conor")
+    saver.read_gate.set()
+    assert await reading == ["conor 0"]
+
+    assert cache.stats["threads"] == 0
@@ -0,0 +1,75 @@
+from fastapi.testclient import TestClient
+from prometheus_client import CollectorRegistry, generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+
+from fighteragents.application.conversation_service.rate_limiter import (
+    get_rate_limiter,
+)
+from fighteragents.infrastructure import api
+from fighteragents.infrastructure.metrics import StatsCollector
+
+
+def collect(collector: StatsCollector) -> dict:
+    registry = CollectorRegistry()
+    registry.register(collector)
+
+    return {
+        family.name: family
+        for family in text_string_to_metric_families(generate_latest(registry).decode())
+    }
+
+
+def test_monotonic_entries_are_counters():
+    families = collect(
+        StatsCollector(
+            "fighteragents_cache",
+            lambda: [({}, {"hits": 3, "wait_seconds_total": 1.5, "hit_rate": 0.75})],
+            counters=("hits",),
+        )
+    )
+
+    assert families["fighteragents_cache_hits"].type == "counter"
+    assert families["fighteragents_cache_hits"].samples[0].name == (
+        "fighteragents_cache_hits_total"
+    )
+    assert families["fighteragents_cache_wait_seconds"].type == "counter"
+    assert families["fighteragents_cache_hit_rate"].type == "gauge"
+
+
+def test_components_are_told_apart_by_labels():
+    families = collect(
+        StatsCollector(
+            "fighteragents_rate_limiter",
+            lambda: [
+                ({"model": "llama"}, {"queued": 2, "name": "skipped", "full": True}),
+                ({"model": "gemma"}, {"queued": 0, "name": "skipped", "full": False}),
+            ],
+        )
+    )
+
+    assert "fighteragents_rate_limiter_name" not in families
+    assert {
+        sample.labels["model"]: sample.value
+        for sample in families["fighteragents_rate_limiter_queued"].samples
+    } == {"llama": 2.0, "gemma": 0.0}
+    assert [
+        sample.value for sample in families["fighteragents_rate_limiter_full"].samples
+    ] == [1.0, 0.0]
+
+
+def test_metrics_endpoint_exposes_component_stats():
+    get_rate_limiter("metrics-test-model").admitted += 2
+
+    response = TestClient(api.app).get("/metrics")
+
+    assert response.status_code == 200
+    families = {
+        family.name: family for family in text_string_to_metric_families(response.text)
+    }
+    admitted = families["fighteragents_rate_limiter_admitted"]
+    assert admitted.type == "counter"
+    assert any(
+        sample.labels == {"model": "metrics-test-model"} and sample.value == 2.0
+        for sample in admitted.samples
+    )
+    assert families["fighteragents_http_request_duration_seconds"].type == "histogram"
@@ -0,0 +1,171 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fighteragents.application.conversation_service.rate_limiter import (
+    ModelRateLimiter,
+    Priority,
+    RateLimitExceeded,
+    TokenBucket,
+    find_rate_limit_error,
+)
+from fighteragents.infrastructure import api
+
+
+def saturated_limiter(max_queue_size: int = 100) -> ModelRateLimiter:
+    """Limiter whose single request per minute is already taken."""
+
+    limiter = ModelRateLimiter(
+        "llama",
+        requests_per_minute=1,
+        tokens_per_minute=0,
+        max_queue_size=max_queue_size,
+    )
+    limiter._requests.take(1)
+
+    return limiter
+
+
+def refill(limiter: ModelRateLimiter) -> None:
+    limiter._requests.available = limiter._requests.capacity
+
+
+def test_unlimited_bucket_never_waits():
+    bucket = TokenBucket(0)
+    bucket.take(1_000_000)
+
+    assert bucket.get_wait(1_000_000) == 0.0
+
+
+def test_bucket_waits_for_missing_units():
+    bucket = TokenBucket(60)
+    bucket.take(60)
+
+    assert bucket.get_wait(30) == pytest.approx(30.0, abs=0.1)
+
+
+@pytest.mark.anyio
+async def test_calls_under_the_limit_are_admitted_at_once():
+    limiter = ModelRateLimiter("llama", requests_per_minute=2, tokens_per_minute=100)
+
+    await limiter.acquire(40)
+    await limiter.acquire(40)
+
+    assert limiter.stats["admitted"] == 2
+    assert limiter.stats["queued"] == 0
+
+
+@pytest.mark.anyio
+async def test_waiters_are_admitted_by_priority_then_arrival():
+    limiter = saturated_limiter()
+    admitted = []
+
+    async def call(name: str, priority: Priority) -> None:
+        await limiter.acquire(10, priority)
+        admitted.append(name)
+
+    calls = [
+        asyncio.create_task(call("evaluation", Priority.EVALUATION)),
+        asyncio.create_task(call("batch", Priority.BATCH)),
+        asyncio.create_task(call("first chat", Priority.INTERACTIVE)),
+        asyncio.create_task(call("second chat", Priority.INTERACTIVE)),
+    ]
+    await asyncio.sleep(0.01)
+    assert limiter.stats["queued"] == 4
+
+    for _ in calls:
+        refill(limiter)
+        limiter._queue[0].wake()
+        await asyncio.sleep(0.01)
+
+    await asyncio.gather(*calls)
+    assert admitted == ["first chat", "second chat", "batch", "evaluation"]
+
+
+@pytest.mark.anyio
+async def test_full_queue_evicts_lower_priority_calls():
+    limiter = saturated_limiter(max_queue_size=1)
+
+    batch_call = asyncio.create_task(limiter.acquire(10, Priority.BATCH))
+    await asyncio.sleep(0.01)
+    chat_call = asyncio.create_task(limiter.acquire(10, Priority.INTERACTIVE))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(RateLimitExceeded) as error:
+        await batch_call
+    assert error.value.retry_after >= 1.0
+    assert limiter.stats["queued"] == 1
+
+    # Calls of the same priority don't evict each other.
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(10, Priority.INTERACTIVE)
+    assert limiter.stats["rejected"] == 2
+
+    chat_call.cancel()
+    await asyncio.gather(chat_call, return_exceptions=True)
+    assert limiter.stats["queued"] == 0
+
+
+def test_sync_and_async_waiters_share_the_queue():
+    limiter = saturated_limiter()
+    admitted = []
+
+    def sync_call() -> None:
+        limiter.acquire_sync(10, Priority.EVALUATION)
+        admitted.append("sync")
+
+    async def main() -> None:
+        thread = threading.Thread(target=sync_call)
+        thread.start()
+        while limiter.stats["queued"] < 1:
+            await asyncio.sleep(0.01)
+
+        async_call = asyncio.create_task(limiter.acquire(10, Priority.INTERACTIVE))
+        await asyncio.sleep(0.01)
+        assert limiter.stats["queued"] == 2
+
+        refill(limiter)
+        limiter._queue[0].wake()
+        await async_call
+        admitted.append("async")
+
+        refill(limiter)
+        limiter._queue[0].wake()
+        await asyncio.to_thread(thread.join, 5)
+
+    asyncio.run(main())
+
+    assert admitted == ["async", "sync"]
+    assert limiter.stats["admitted"] == 2
+
+
+def test_rate_limit_error_is_found_behind_wrapping_errors():
+    rejection = RateLimitExceeded("llama", 12.5)
+    try:
+        try:
+            raise rejection
+        except RateLimitExceeded as e:
+            raise RuntimeError("Error running conversation workflow") from e
+    except RuntimeError as e:
+        assert find_rate_limit_error(e) is rejection
+
+    assert find_rate_limit_error(ValueError()) is None
+
+
+def test_rejected_chat_returns_429_with_retry_after(monkeypatch):
+    async def get_response(**kwargs):
+        try:
+            raise RateLimitExceeded("llama", 12.5)
+        except RateLimitExceeded as e:
+            raise RuntimeError(f"Error running conversation workflow: {e}") from e
+
+    monkeypatch.setattr(api, "get_response", get_response)
+
+    response = TestClient(api.app).post(
+        "/chat", json={"message": "Hi", "ufcfighter_id": "conor"}
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "13"
@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from fighteragents.application.conversation_service.response_cache import (
+    SemanticResponseCache,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class PersistedCollection:
+    """Collection holding one cached answer, whose reads wait for `gate` and fail
+    while `failing` is set."""
+
+    def __init__(self, embedding: list[float]) -> None:
+        self.documents = [
+            {
+                "ufcfighter_id": "conor",
+                "query": "who is the best",
+                "embedding": embedding,
+                "response": "I am.",
+                "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+            }
+        ]
+        self.gate = asyncio.Event()
+        self.gate.set()
+        self.failing = False
+        self.reads = 0
+
+    async def create_index(self, *args, **kwargs) -> None:
+        pass
+
+    def find(self, filter: dict, sort: list) -> "PersistedCollection":
+        self.reads += 1
+
+        return self
+
+    async def __aiter__(self):
+        await self.gate.wait()
+        if self.failing:
+            raise ConnectionError("MongoDB is unreachable.")
+
+        for document in self.documents:
+            yield document
+
+
+@pytest.fixture
+def embeddings() -> DeterministicFakeEmbedding:
+    return DeterministicFakeEmbedding(size=8)
+
+
+async def test_concurrent_first_lookups_wait_for_one_load(embeddings):
+    collection = PersistedCollection(embeddings.embed_query("who is the best"))
+    cache = SemanticResponseCache(embeddings, collection=collection)
+
+    collection.gate.clear()
+    lookups = [
+        asyncio.create_task(cache.lookup("conor", "Who is the best?")) for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    collection.gate.set()
+
+    assert await asyncio.gather(*lookups) == ["I am."] * 3
+    assert collection.reads == 1
+    assert cache.stats["hits"] == 3
+
+
+async def test_failed_load_is_retried_by_the_next_lookup(embeddings):
+    collection = PersistedCollection(embeddings.embed_query("who is the best"))
+    cache = SemanticResponseCache(embeddings, collection=collection)
+
+    collection.failing = True
+    with pytest.raises(ConnectionError):
+        await cache.lookup("conor", "Who is the best?")
+    assert cache.stats["entries"] == 0
+
+    collection.failing = False
+    assert await cache.lookup("conor", "Who is the best?") == "I am."
+    assert collection.reads == 2
@@ -0,0 +1,141 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+from opik import config as opik_config
+from opik.integrations.langchain import OpikTracer
+from opik.message_processing import messages
+from opik.message_processing.message_processors import BaseMessageProcessor
+
+from fighteragents.infrastructure import tracing
+from fighteragents.infrastructure.tracing import SampledOpikTracer, TraceExporter
+
+
+class BlockedSender(BaseMessageProcessor):
+    """Sender whose requests hang until `released` is set."""
+
+    def __init__(self) -> None:
+        self.released = threading.Event()
+        self.sent: list[messages.BaseMessage] = []
+
+    def process(self, message: messages.BaseMessage) -> None:
+        self.released.wait(timeout=5)
+        self.sent.append(message)
+
+
+class RecordingExporter:
+    """Exporter keeping the queued messages and run counts in memory."""
+
+    def __init__(self) -> None:
+        self.config = opik_config.OpikConfig(
+            project_name="fighteragents", track_disable=False
+        )
+        self.queued: list[messages.BaseMessage] = []
+        self.runs: list[dict] = []
+
+    def put(self, message: messages.BaseMessage) -> bool:
+        self.queued.append(message)
+
+        return True
+
+    def record_run(self, sampled: bool, error_exported: bool = False) -> None:
+        self.runs.append({"sampled": sampled, "error_exported": error_exported})
+
+
+def trace_message(index: int) -> messages.CreateTraceMessage:
+    return messages.CreateTraceMessage(
+        trace_id=f"trace-{index}",
+        project_name="fighteragents",
+        name="conversation",
+        start_time=datetime.now(timezone.utc),
+        end_time=None,
+        input=None,
+        output=None,
+        metadata=None,
+        tags=None,
+        error_info=None,
+    )
+
+
+def failing_turn(input: dict) -> str:
+    raise ValueError("The LLM is unavailable.")
+
+
+def test_full_queue_drops_spans_without_blocking():
+    sender = BlockedSender()
+    exporter = TraceExporter(
+        sender,
+        opik_config.OpikConfig(project_name="fighteragents"),
+        max_queue_size=2,
+        batch_size=1,
+        flush_interval_seconds=0.01,
+    )
+    # The first message is taken by the export thread, which hangs on the collector.
+    assert exporter.put(trace_message(0))
+    while exporter.stats["queue_size"]:
+        time.sleep(0.01)
+
+    started_at = time.perf_counter()
+    queued = [exporter.put(trace_message(index)) for index in range(1, 6)]
+
+    assert time.perf_counter() - started_at < 1
+    assert queued == [True, True, False, False, False]
+    assert exporter.stats["dropped"] == 3
+
+    sender.released.set()
+    assert exporter.close(timeout=5)
+    assert exporter.stats["exported"] == 3
+
+
+def test_unsampled_failed_run_is_exported():
+    exporter = RecordingExporter()
+    tracer = SampledOpikTracer(exporter, sampled=False)
+
+    with pytest.raises(ValueError):
+        RunnableLambda(failing_turn).invoke({}, {"callbacks": [tracer]})
+
+    traces = [m for m in exporter.queued if isinstance(m, messages.CreateTraceMessage)]
+    assert len(traces) == 1
+    assert traces[0].error_info is not None
+    assert exporter.runs == [{"sampled": False, "error_exported": True}]
+
+
+def test_unsampled_run_exports_nothing():
+    exporter = RecordingExporter()
+    tracer = SampledOpikTracer(exporter, sampled=False)
+
+    RunnableLambda(lambda input: "Precision.").invoke({}, {"callbacks": [tracer]})
+
+    assert exporter.queued == []
+    assert exporter.runs == [{"sampled": False, "error_exported": False}]
+
+
+def test_tracer_sets_up_the_same_state_as_the_opik_tracer(monkeypatch):
+    monkeypatch.setattr(
+        "opik.integrations.langchain.opik_tracer.opik_client.Opik",
+        lambda **kwargs: None,
+    )
+
+    expected = set(vars(OpikTracer()))
+
+    assert expected <= set(vars(SampledOpikTracer(RecordingExporter(), sampled=True)))
+
+
+def test_export_client_builds_messages_with_this_opik_version():
+    exporter = RecordingExporter()
+    client = tracing._ExportClient(exporter)
+
+    client.trace(id="trace-0", start_time=datetime.now(timezone.utc), name="turn")
+    client.span(
+        id="span-0",
+        trace_id="trace-0",
+        start_time=datetime.now(timezone.utc),
+        usage={"prompt_tokens": 3, "completion_tokens": 5, "total_tokens": 8},
+    )
+
+    assert [type(message) for message in exporter.queued] == [
+        messages.CreateTraceMessage,
+        messages.CreateSpanMessage,
+    ]
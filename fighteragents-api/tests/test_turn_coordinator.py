@@ -0,0 +1,175 @@
+import asyncio
+
+import pytest
+
+from fighteragents.application.conversation_service.turn_coordinator import (
+    Flight,
+    TurnCoordinator,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+class Turn:
+    """Turn whose chunks are released one by one, counting how often it ran."""
+
+    def __init__(self, chunks: list[str]) -> None:
+        self.chunks = chunks
+        self.calls = 0
+        self.cancelled = False
+        self.released = asyncio.Semaphore(0)
+
+    async def __call__(self, flight: Flight) -> str:
+        self.calls += 1
+        try:
+            for chunk in self.chunks:
+                await self.released.acquire()
+                await flight.publish(chunk)
+        except asyncio.CancelledError:
+            self.cancelled = True
+
+            raise
+
+        return "".join(self.chunks)
+
+    def release(self, nb_chunks: int | None = None) -> None:
+        for _ in range(len(self.chunks) if nb_chunks is None else nb_chunks):
+            self.released.release()
+
+
+async def get_result(coordinator: TurnCoordinator, key: str, turn: Turn) -> str:
+    async with coordinator.singleflight(key, turn) as flight:
+        return await flight.result()
+
+
+async def get_chunks(coordinator: TurnCoordinator, key: str, turn: Turn) -> list[str]:
+    async with coordinator.singleflight(key, turn) as flight:
+        return [chunk async for chunk in flight.stream()]
+
+
+async def test_identical_requests_share_one_turn():
+    coordinator = TurnCoordinator()
+    turn = Turn(["Precision ", "beats ", "power."])
+
+    requests = [
+        asyncio.create_task(get_result(coordinator, "conor", turn)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+    turn.release()
+
+    assert await asyncio.gather(*requests) == ["Precision beats power."] * 3
+    assert turn.calls == 1
+    assert coordinator.stats["coalesced"] == 2
+    assert coordinator.stats["flights"] == 0
+
+
+async def test_late_follower_replays_chunks_from_the_start():
+    coordinator = TurnCoordinator()
+    turn = Turn(["Keep ", "the ", "pressure."])
+
+    leader = asyncio.create_task(get_chunks(coordinator, "khabib", turn))
+    turn.release(1)
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(get_chunks(coordinator, "khabib", turn))
+    await asyncio.sleep(0)
+    turn.release()
+
+    assert await leader == ["Keep ", "the ", "pressure."]
+    assert await follower == ["Keep ", "the ", "pressure."]
+    assert turn.calls == 1
+
+
+async def test_failed_turn_is_raised_to_every_waiter():
+    coordinator = TurnCoordinator()
+
+    async def fail(flight: Flight) -> None:
+        await asyncio.sleep(0)
+        raise ValueError("The LLM is unavailable.")
+
+    requests = [
+        asyncio.create_task(get_result(coordinator, "islam", fail)) for _ in range(2)
+    ]
+    results = await asyncio.gather(*requests, return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_follower_gets_the_answer_when_the_leader_disconnects():
+    coordinator = TurnCoordinator()
+    turn = Turn(["Be ", "like ", "water."])
+
+    leader = asyncio.create_task(get_chunks(coordinator, "conor", turn))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(get_chunks(coordinator, "conor", turn))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.gather(leader, return_exceptions=True)
+    turn.release()
+
+    assert await follower == ["Be ", "like ", "water."]
+    assert turn.calls == 1
+    assert not turn.cancelled
+
+
+async def test_turn_is_cancelled_once_every_waiter_left():
+    coordinator = TurnCoordinator()
+    turn = Turn(["Never ", "answered."])
+
+    requests = [
+        asyncio.create_task(get_result(coordinator, "conor", turn)) for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+
+    requests[0].cancel()
+    await asyncio.gather(requests[0], return_exceptions=True)
+    assert not turn.cancelled
+
+    requests[1].cancel()
+    await asyncio.gather(requests[1], return_exceptions=True)
+    assert turn.cancelled
+    assert coordinator.stats["flights"] == 0
+
+    # A new identical request runs the turn again.
+    turn.release()
+    assert await get_result(coordinator, "conor", turn) == "Never answered."
+    assert turn.calls == 2
+
+
+async def test_turns_of_a_thread_run_in_arrival_order():
+    coordinator = TurnCoordinator()
+    events = []
+
+    async def run_turn(name: str) -> None:
+        async with coordinator.lock("conor"):
+            events.append(f"{name} started")
+            await asyncio.sleep(0.01)
+            events.append(f"{name} done")
+
+    await asyncio.gather(*(run_turn(name) for name in ("first", "second", "third")))
+
+    assert events == [
+        "first started",
+        "first done",
+        "second started",
+        "second done",
+        "third started",
+        "third done",
+    ]
+    assert coordinator.stats["locked_threads"] == 0
+
+
+async def test_turns_of_other_threads_run_concurrently():
+    coordinator = TurnCoordinator()
+    running = []
+
+    async def run_turn(thread_id: str) -> int:
+        async with coordinator.lock(thread_id):
+            running.append(thread_id)
+            await asyncio.sleep(0.01)
+            concurrent = len(running)
+            running.remove(thread_id)
+
+            return concurrent
+
+    assert max(await asyncio.gather(run_turn("conor"), run_turn("khabib"))) == 2
@@ -0,0 +1,93 @@
+import asyncio
+import json
+from functools import wraps
+
+import click
+
+from fighteragents.application.conversation_service.batch import (
+    BatchItem,
+    BatchRunner,
+)
+from fighteragents.domain.ufcfighter_factory import AVAILABLE_FIGHTERS
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+@click.command()
+@click.option(
+    "--question",
+    type=str,
+    multiple=True,
+    required=True,
+    help="Question to ask. Can be repeated.",
+)
+@click.option(
+    "--ufcfighter-id",
+    type=str,
+    multiple=True,
+    default=AVAILABLE_FIGHTERS,
+    help="Fighter to ask. Can be repeated. Defaults to every fighter.",
+)
+@click.option(
+    "--max-concurrency",
+    type=int,
+    default=None,
+    help="Maximum number of questions answered at once. Defaults to the configured limit.",
+)
+@click.option(
+    "--item-timeout-seconds",
+    type=float,
+    default=None,
+    help="Time after which a question is given up. Defaults to the configured timeout.",
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="NDJSON file to write the answers to. Defaults to stdout.",
+)
+@async_command
+async def main(
+    question: tuple[str, ...],
+    ufcfighter_id: tuple[str, ...],
+    max_concurrency: int | None,
+    item_timeout_seconds: float | None,
+    output,
+) -> None:
+    """Asks every question to every fighter, in a single batch.
+
+    Answers are written as NDJSON as they complete, followed by the stats of the batch.
+
+    Args:
+        question: Questions to ask.
+        ufcfighter_id: Fighters to ask.
+        max_concurrency: Maximum number of questions answered at once.
+        item_timeout_seconds: Time after which a question is given up.
+        output: File to write the answers to.
+    """
+
+    items = [
+        BatchItem(ufcfighter_id=fighter_id, message=message)
+        for fighter_id in ufcfighter_id
+        for message in question
+    ]
+    batch_runner = BatchRunner.build_from_settings(
+        max_concurrency=max_concurrency, item_timeout_seconds=item_timeout_seconds
+    )
+
+    async for result in batch_runner.run(items):
+        output.write(result.model_dump_json() + "\n")
+        output.flush()
+    output.write(json.dumps({"stats": batch_runner.stats.model_dump()}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
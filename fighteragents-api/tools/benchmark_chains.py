@@ -0,0 +1,88 @@
+import asyncio
+import time
+from functools import wraps
+
+import click
+
+from fighteragents.application.conversation_service.workflow.chains import (
+    build_context_summary_chain,
+    build_conversation_summary_chain,
+    build_ufcfighter_response_chain,
+    close_chain_registry,
+    get_context_summary_chain,
+    get_conversation_summary_chain,
+    get_ufcfighter_response_chain,
+)
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+def rebuild_chains() -> None:
+    """Chains needed by one retrieval turn, built from scratch (previous behaviour)."""
+
+    build_ufcfighter_response_chain()
+    build_context_summary_chain()
+    build_ufcfighter_response_chain()
+    build_conversation_summary_chain(extend_summary=True)
+
+
+def lookup_chains() -> None:
+    """Chains needed by one retrieval turn, served by the chain registry."""
+
+    get_ufcfighter_response_chain()
+    get_context_summary_chain()
+    get_ufcfighter_response_chain()
+    get_conversation_summary_chain(summary="previous summary")
+
+
+def measure(fn, turns: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(turns):
+        fn()
+
+    return (time.perf_counter() - start_time) / turns * 1000
+
+
+@click.command()
+@click.option(
+    "--turns",
+    type=int,
+    default=200,
+    help="Number of simulated conversation turns.",
+)
+@async_command
+async def main(turns: int) -> None:
+    """Microbenchmark of the per-turn chain setup overhead.
+
+    No LLM call is made: it only measures building the chat model clients, binding
+    the tools and parsing the prompts, with and without the chain registry.
+
+    Args:
+        turns: Number of simulated conversation turns.
+    """
+
+    # Warm up prompt loading and imports so both measurements start from the same state.
+    rebuild_chains()
+    lookup_chains()
+
+    rebuild_ms = measure(rebuild_chains, turns)
+    lookup_ms = measure(lookup_chains, turns)
+
+    await close_chain_registry()
+
+    print(f"Turns: {turns}")
+    print(f"Per-turn overhead without registry: {rebuild_ms:.3f} ms")
+    print(f"Per-turn overhead with registry: {lookup_ms:.4f} ms")
+    print(f"Speedup: {rebuild_ms / max(lookup_ms, 1e-9):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
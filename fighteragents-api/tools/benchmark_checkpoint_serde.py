@@ -0,0 +1,132 @@
+import random
+import statistics
+import time
+
+import click
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.base import empty_checkpoint
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from fighteragents.application.conversation_service.checkpoint_serde import (
+    CompactCheckpointSerializer,
+)
+from fighteragents.application.conversation_service.tokens import (
+    count_message_tokens,
+)
+from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
+
+WORDS = "listen fight game legacy pressure discipline wrestling cage belt respect training champion".split()
+
+
+def make_text(rng: random.Random, num_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+
+def make_checkpoints(ufcfighter_id: str, turns: int, seed: int) -> list[dict]:
+    """Builds the checkpoint saved after each turn of a synthetic conversation."""
+
+    rng = random.Random(seed)
+    ufcfighter = UFCFighterFactory.get_ufcfighter(ufcfighter_id)
+    messages = []
+    checkpoints = []
+
+    for turn in range(turns):
+        messages.append(HumanMessage(content=make_text(rng, 20), id=f"human-{turn}"))
+        if rng.random() < 0.3:
+            messages.append(
+                AIMessage(
+                    content="",
+                    tool_calls=[
+                        {
+                            "name": "retrieve_ufcfighter_context",
+                            "args": {"query": make_text(rng, 6)},
+                            "id": f"call-{turn}",
+                        }
+                    ],
+                    id=f"tool-call-{turn}",
+                )
+            )
+            messages.append(
+                ToolMessage(
+                    content=make_text(rng, 150),
+                    tool_call_id=f"call-{turn}",
+                    id=f"tool-{turn}",
+                )
+            )
+        messages.append(AIMessage(content=make_text(rng, 60), id=f"ai-{turn}"))
+
+        checkpoint = empty_checkpoint()
+        checkpoint["channel_values"] = {
+            "messages": list(messages),
+            "ufcfighter_name": ufcfighter.name,
+            "ufcfighter_perspective": ufcfighter.perspective,
+            "ufcfighter_style": ufcfighter.style,
+            "ufcfighter_context": "",
+            "summary": make_text(rng, 100) if turn >= 10 else "",
+            "message_token_counts": {m.id: count_message_tokens(m) for m in messages},
+        }
+        checkpoints.append(checkpoint)
+
+    return checkpoints
+
+
+def measure(serde, checkpoints: list[dict], repeats: int) -> dict:
+    sizes = []
+    dumps_us = []
+    loads_us = []
+    for checkpoint in checkpoints:
+        for _ in range(repeats):
+            start_time = time.perf_counter()
+            serialized = serde.dumps_typed(checkpoint)
+            dumps_us.append((time.perf_counter() - start_time) * 1e6)
+
+            start_time = time.perf_counter()
+            loaded = serde.loads_typed(serialized)
+            loads_us.append((time.perf_counter() - start_time) * 1e6)
+
+        assert loaded["channel_values"] == checkpoint["channel_values"]
+        sizes.append(len(serialized[1]))
+
+    return {
+        "bytes": statistics.mean(sizes),
+        "dumps_us": statistics.median(dumps_us),
+        "loads_us": statistics.median(loads_us),
+    }
+
+
+@click.command()
+@click.option(
+    "--ufcfighter-id", type=str, default="khabib", help="Fighter of the conversation."
+)
+@click.option("--turns", type=int, default=30, help="Number of conversation turns.")
+@click.option("--repeats", type=int, default=20, help="Timing repeats per checkpoint.")
+@click.option(
+    "--seed", type=int, default=42, help="Seed of the synthetic conversation."
+)
+def main(ufcfighter_id: str, turns: int, repeats: int, seed: int) -> None:
+    """Compares checkpoint size and (de)serialization time of the checkpoint serializers.
+
+    Args:
+        ufcfighter_id: Fighter of the conversation.
+        turns: Number of conversation turns, one checkpoint per turn.
+        repeats: Timing repeats per checkpoint.
+        seed: Seed of the synthetic conversation.
+    """
+
+    checkpoints = make_checkpoints(ufcfighter_id, turns, seed)
+    results = {
+        "Default": measure(JsonPlusSerializer(), checkpoints, repeats),
+        "Compact": measure(CompactCheckpointSerializer(), checkpoints, repeats),
+    }
+
+    for name, result in results.items():
+        print(
+            f"{name}: {result['bytes']:.0f} bytes/checkpoint | dumps p50={result['dumps_us']:.0f} us | loads p50={result['loads_us']:.0f} us"
+        )
+    print(
+        f"Size reduction: {1 - results['Compact']['bytes'] / results['Default']['bytes']:.1%}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import asyncio
+import statistics
+import time
+import uuid
+from functools import wraps
+
+import click
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.mongodb.aio import AsyncMongoDBSaver
+from langgraph.graph import END, START, MessagesState, StateGraph
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from fighteragents.application.conversation_service.checkpoint_storage import (
+    create_checkpoint_indexes,
+    get_thread_id,
+)
+from fighteragents.application.conversation_service.hot_thread_checkpointer import (
+    HotThreadCheckpointSaver,
+)
+from fighteragents.config import settings
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+class TimedMongoDBSaver(AsyncMongoDBSaver):
+    """MongoDB checkpointer recording the latency of every read and write in ms."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.read_ms: list[float] = []
+        self.write_ms: list[float] = []
+
+    async def aget_tuple(self, config):
+        start_time = time.perf_counter()
+        result = await super().aget_tuple(config)
+        self.read_ms.append((time.perf_counter() - start_time) * 1000)
+
+        return result
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        start_time = time.perf_counter()
+        result = await super().aput(config, checkpoint, metadata, new_versions)
+        self.write_ms.append((time.perf_counter() - start_time) * 1000)
+
+        return result
+
+    async def aput_writes(self, config, writes, task_id):
+        start_time = time.perf_counter()
+        await super().aput_writes(config, writes, task_id)
+        self.write_ms.append((time.perf_counter() - start_time) * 1000)
+
+
+def respond(state: MessagesState) -> dict:
+    # Stands in for the LLM, so only the checkpointer is measured.
+    return {"messages": [AIMessage(content="Keep your hands up. " * 20)]}
+
+
+async def run_session(graph, thread_id: str, turns: int, turn_ms: list[float]) -> None:
+    for turn in range(turns):
+        start_time = time.perf_counter()
+        await graph.ainvoke(
+            {"messages": [HumanMessage(content=f"How do I train for round {turn}?")]},
+            config={"configurable": {"thread_id": thread_id}},
+        )
+        turn_ms.append((time.perf_counter() - start_time) * 1000)
+
+
+def percentiles(latencies: list[float]) -> str:
+    if len(latencies) < 2:
+        return "n/a"
+
+    quantiles = statistics.quantiles(latencies, n=100)
+
+    return f"p50={quantiles[49]:.1f} ms | p95={quantiles[94]:.1f} ms"
+
+
+@click.command()
+@click.option(
+    "--sessions",
+    type=int,
+    multiple=True,
+    default=[1, 10, 50, 100],
+    help="Numbers of concurrent sessions to benchmark. Can be repeated.",
+)
+@click.option("--turns", type=int, default=10, help="Number of turns per session.")
+@click.option(
+    "--shared-thread",
+    is_flag=True,
+    default=False,
+    help="Run every session on the fighter's shared thread, as before sessions existed.",
+)
+@click.option(
+    "--checkpoint-cache",
+    type=click.Choice(["off", "async", "sync"]),
+    default="off",
+    help="Put the hot-thread checkpoint cache in front of MongoDB, with this durability.",
+)
+@click.option(
+    "--ufcfighter-id", type=str, default="khabib", help="Fighter the sessions talk to."
+)
+@async_command
+async def main(
+    sessions: tuple[int, ...],
+    turns: int,
+    shared_thread: bool,
+    checkpoint_cache: str,
+    ufcfighter_id: str,
+) -> None:
+    """Load tests checkpoint reads and writes as concurrent sessions grow.
+
+    Checkpoint reads and writes are timed as they reach MongoDB, so with the
+    checkpoint cache they only count cache misses and background flushes.
+
+    Requires MongoDB. The checkpoints go to a throwaway `<MONGO_DB_NAME>_benchmark`
+    database, dropped before and after the run. No LLM is called.
+
+    Args:
+        sessions: Numbers of concurrent sessions to benchmark.
+        turns: Number of turns per session.
+        shared_thread: Whether every session uses the fighter's shared thread.
+        checkpoint_cache: Durability of the hot-thread checkpoint cache, or `off`.
+        ufcfighter_id: Fighter the sessions talk to.
+    """
+
+    db_name = f"{settings.MONGO_DB_NAME}_benchmark"
+    client = AsyncIOMotorClient(
+        settings.MONGO_URI,
+        appname="fighteragents",
+        maxPoolSize=settings.MONGO_CHECKPOINT_MAX_POOL_SIZE,
+    )
+    await client.drop_database(db_name)
+    await create_checkpoint_indexes(client[db_name])
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("respond", respond)
+    builder.add_edge(START, "respond")
+    builder.add_edge("respond", END)
+
+    try:
+        for num_sessions in sessions:
+            checkpointer = TimedMongoDBSaver(
+                client,
+                db_name=db_name,
+                checkpoint_collection_name=settings.MONGO_STATE_CHECKPOINT_COLLECTION,
+                writes_collection_name=settings.MONGO_STATE_WRITES_COLLECTION,
+            )
+            graph = builder.compile(
+                checkpointer=checkpointer
+                if checkpoint_cache == "off"
+                else HotThreadCheckpointSaver(checkpointer, durability=checkpoint_cache)
+            )
+
+            turn_ms = []
+            start_time = time.perf_counter()
+            await asyncio.gather(
+                *[
+                    run_session(
+                        graph,
+                        get_thread_id(
+                            ufcfighter_id,
+                            session_id=None if shared_thread else str(uuid.uuid4()),
+                        ),
+                        turns,
+                        turn_ms,
+                    )
+                    for _ in range(num_sessions)
+                ]
+            )
+            if isinstance(graph.checkpointer, HotThreadCheckpointSaver):
+                await graph.checkpointer.aflush()
+            elapsed = time.perf_counter() - start_time
+
+            print(
+                f"{num_sessions} sessions | {num_sessions * turns / elapsed:.0f} turns/s | "
+                f"turn: {percentiles(turn_ms)} | "
+                f"read: {percentiles(checkpointer.read_ms)} | "
+                f"write: {percentiles(checkpointer.write_ms)}"
+            )
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
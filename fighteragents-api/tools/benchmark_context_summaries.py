@@ -0,0 +1,102 @@
+import asyncio
+import statistics
+import time
+from functools import wraps
+from pathlib import Path
+
+import click
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from fighteragents.application.conversation_service.workflow.graph import (
+    create_workflow_graph,
+)
+from fighteragents.config import settings
+from fighteragents.domain.evaluation import EvaluationDataset
+from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+async def measure_turns(
+    precomputed_context_summaries: bool, queries: list[tuple[str, str]]
+) -> list[float]:
+    """Runs one single-turn conversation per query and returns their latencies in ms."""
+
+    graph = create_workflow_graph(
+        precomputed_context_summaries=precomputed_context_summaries
+    ).compile(checkpointer=MemorySaver())
+
+    latencies = []
+    for i, (ufcfighter_id, query) in enumerate(queries):
+        ufcfighter = UFCFighterFactory.get_ufcfighter(ufcfighter_id)
+
+        start_time = time.perf_counter()
+        await graph.ainvoke(
+            input={
+                "messages": [HumanMessage(content=query)],
+                "ufcfighter_name": ufcfighter.name,
+                "ufcfighter_perspective": ufcfighter.perspective,
+                "ufcfighter_style": ufcfighter.style,
+                "ufcfighter_context": "",
+            },
+            config={"configurable": {"thread_id": f"benchmark-{i}"}},
+        )
+        latencies.append((time.perf_counter() - start_time) * 1000)
+
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    p95 = (
+        statistics.quantiles(latencies, n=20)[-1]
+        if len(latencies) > 1
+        else latencies[0]
+    )
+    print(
+        f"{name}: mean={statistics.mean(latencies):.0f} ms | p50={statistics.median(latencies):.0f} ms | p95={p95:.0f} ms"
+    )
+
+
+@click.command()
+@click.option(
+    "--data-path",
+    type=click.Path(exists=True, path_type=Path),
+    default=settings.EVALUATION_DATASET_FILE_PATH,
+    help="Path to the evaluation dataset providing the queries.",
+)
+@click.option(
+    "--nb-samples", type=int, default=10, help="Number of queries to run per mode."
+)
+@async_command
+async def main(data_path: Path, nb_samples: int) -> None:
+    """Benchmarks turn latency with and without precomputed context summaries.
+
+    Requires Groq and a long-term memory created with `--summarize-chunks`. The
+    conversation state is kept in memory so only the workflow itself is measured.
+
+    Args:
+        data_path: Path to the evaluation dataset providing the queries.
+        nb_samples: Number of queries to run per mode.
+    """
+
+    dataset = EvaluationDataset.model_validate_json(data_path.read_text())
+    queries = [
+        (sample.ufcfighter_id, sample.messages[0].content)
+        for sample in dataset.samples[:nb_samples]
+    ]
+
+    report("LLM context summary", await measure_turns(False, queries))
+    report("Precomputed summaries", await measure_turns(True, queries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import asyncio
+import statistics
+import time
+from functools import wraps
+from pathlib import Path
+
+import click
+from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from fighteragents.application.conversation_service.workflow.graph import (
+    create_workflow_graph,
+)
+from fighteragents.config import settings
+from fighteragents.domain.evaluation import EvaluationDataset
+from fighteragents.domain.ufcfighter_factory import UFCFighterFactory
+
+# Nodes calling an LLM, the conversation summary aside.
+LLM_NODES = {"conversation_node", "summarize_context_node"}
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+async def measure_turns(
+    eager_retrieval: bool, queries: list[tuple[str, str]]
+) -> tuple[list[float], list[int], int]:
+    """Runs one single-turn conversation per query.
+
+    Returns:
+        tuple[list[float], list[int], int]: The latency in ms and the number of LLM
+            calls of each turn, and the number of eager retrievals.
+    """
+
+    graph = create_workflow_graph(eager_retrieval=eager_retrieval).compile(
+        checkpointer=MemorySaver()
+    )
+
+    latencies = []
+    llm_calls = []
+    eager_retrievals = 0
+    for i, (ufcfighter_id, query) in enumerate(queries):
+        ufcfighter = UFCFighterFactory.get_ufcfighter(ufcfighter_id)
+
+        turn_llm_calls = 0
+        start_time = time.perf_counter()
+        async for update in graph.astream(
+            input={
+                "messages": [HumanMessage(content=query)],
+                "ufcfighter_name": ufcfighter.name,
+                "ufcfighter_perspective": ufcfighter.perspective,
+                "ufcfighter_style": ufcfighter.style,
+                "ufcfighter_context": "",
+            },
+            config={"configurable": {"thread_id": f"benchmark-{i}"}},
+            stream_mode="updates",
+        ):
+            for node, node_update in update.items():
+                turn_llm_calls += node in LLM_NODES
+                eager_retrievals += node == "eager_retrieval_node" and bool(node_update)
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        llm_calls.append(turn_llm_calls)
+
+    return latencies, llm_calls, eager_retrievals
+
+
+def report(
+    name: str, latencies: list[float], llm_calls: list[int], eager_retrievals: int
+) -> None:
+    p95 = (
+        statistics.quantiles(latencies, n=20)[-1]
+        if len(latencies) > 1
+        else latencies[0]
+    )
+    print(
+        f"{name}: mean={statistics.mean(latencies):.0f} ms | p50={statistics.median(latencies):.0f} ms | p95={p95:.0f} ms | "
+        f"LLM calls per turn={statistics.mean(llm_calls):.2f} | eager retrievals={eager_retrievals}/{len(latencies)}"
+    )
+
+
+@click.command()
+@click.option(
+    "--data-path",
+    type=click.Path(exists=True, path_type=Path),
+    default=settings.EVALUATION_DATASET_FILE_PATH,
+    help="Path to the evaluation dataset providing the queries.",
+)
+@click.option(
+    "--nb-samples", type=int, default=10, help="Number of queries to run per mode."
+)
+@async_command
+async def main(data_path: Path, nb_samples: int) -> None:
+    """Benchmarks turn latency with and without eager retrieval.
+
+    Requires Groq and a long-term memory. The conversation state is kept in memory so
+    only the workflow itself is measured.
+
+    Args:
+        data_path: Path to the evaluation dataset providing the queries.
+        nb_samples: Number of queries to run per mode.
+    """
+
+    dataset = EvaluationDataset.model_validate_json(data_path.read_text())
+    queries = [
+        (sample.ufcfighter_id, sample.messages[0].content)
+        for sample in dataset.samples[:nb_samples]
+    ]
+
+    report("Tool call retrieval", *await measure_turns(False, queries))
+    report("Eager retrieval", *await measure_turns(True, queries))
+
+
+if __name__ == "__main__":
+    main()
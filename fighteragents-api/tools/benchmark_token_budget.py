@@ -0,0 +1,139 @@
+import random
+import statistics
+
+import click
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from fighteragents.application.conversation_service.tokens import (
+    count_new_message_tokens,
+    count_text_tokens,
+    get_conversation_tokens,
+    trim_messages_to_budget,
+)
+from fighteragents.application.conversation_service.workflow.edges import (
+    should_summarize_conversation,
+)
+from fighteragents.config import settings
+from fighteragents.domain.prompts import FIGHTER_CHARACTER_CARD
+
+WORDS = "listen fight game legacy pressure discipline wrestling cage belt respect training champion".split()
+
+
+def make_text(rng: random.Random, num_words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(num_words))
+
+
+def make_turn(rng: random.Random, turn: int) -> list:
+    """Synthetic turn: short banter, occasional pasted paragraphs and retrievals."""
+
+    num_words = 600 if turn % 10 == 9 else rng.randint(5, 40)
+    messages = [HumanMessage(content=make_text(rng, num_words), id=f"human-{turn}")]
+
+    if rng.random() < 0.3:
+        tool_call_id = f"call-{turn}"
+        messages.append(
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {
+                        "name": "retrieve_ufcfighter_context",
+                        "args": {"query": make_text(rng, 6)},
+                        "id": tool_call_id,
+                    }
+                ],
+                id=f"tool-call-{turn}",
+            )
+        )
+        messages.append(
+            ToolMessage(
+                content=make_text(rng, 150),
+                tool_call_id=tool_call_id,
+                id=f"tool-{turn}",
+            )
+        )
+
+    messages.append(AIMessage(content=make_text(rng, 60), id=f"ai-{turn}"))
+
+    return messages
+
+
+def simulate(turns: int, seed: int, token_budget: bool) -> dict:
+    rng = random.Random(seed)
+    system_tokens = count_text_tokens(FIGHTER_CHARACTER_CARD.prompt)
+    summary_tokens = 0
+    summarizations = 0
+    messages = []
+    token_counts = {}
+    prompt_tokens = []
+
+    for turn in range(turns):
+        turn_messages = make_turn(rng, turn)
+        messages.extend(turn_messages[:1])
+        token_counts.update(count_new_message_tokens(messages, token_counts))
+
+        # The prompt of the first response call of the turn.
+        history = (
+            trim_messages_to_budget(
+                messages, token_counts, settings.CONVERSATION_TOKEN_BUDGET
+            )
+            if token_budget
+            else messages
+        )
+        prompt_tokens.append(
+            system_tokens
+            + summary_tokens
+            + get_conversation_tokens(history, token_counts)
+        )
+
+        messages.extend(turn_messages[1:])
+        token_counts.update(count_new_message_tokens(messages, token_counts))
+
+        if token_budget:
+            state = {"messages": messages, "message_token_counts": token_counts}
+            summarize = should_summarize_conversation(state) != "__end__"
+        else:
+            summarize = len(messages) > settings.TOTAL_MESSAGES_SUMMARY_TRIGGER
+
+        if summarize:
+            # Summaries are at most ~150 tokens long.
+            summary_tokens = 150
+            summarizations += 1
+            messages = messages[-settings.TOTAL_MESSAGES_AFTER_SUMMARY :]
+            token_counts = {m.id: token_counts[m.id] for m in messages}
+
+    return {
+        "mean": statistics.mean(prompt_tokens),
+        "p95": statistics.quantiles(prompt_tokens, n=20)[-1],
+        "max": max(prompt_tokens),
+        "summarizations": summarizations,
+    }
+
+
+@click.command()
+@click.option("--turns", type=int, default=100, help="Number of conversation turns.")
+@click.option(
+    "--seed", type=int, default=42, help="Seed of the synthetic conversation."
+)
+def main(turns: int, seed: int) -> None:
+    """Compares prompt tokens per turn of the message-count and token-budget policies.
+
+    The conversation is synthetic and no LLM is called: the summary is assumed to be
+    150 tokens long.
+
+    Args:
+        turns: Number of conversation turns.
+        seed: Seed of the synthetic conversation.
+    """
+
+    print(
+        f"Token budget: {settings.CONVERSATION_TOKEN_BUDGET} | summary trigger: {settings.CONVERSATION_SUMMARY_TOKEN_TRIGGER} tokens"
+    )
+    for name, token_budget in [("Message count", False), ("Token budget", True)]:
+        result = simulate(turns, seed, token_budget)
+        print(
+            f"{name}: mean={result['mean']:.0f} | p95={result['p95']:.0f} | max={result['max']} prompt tokens | summarizations={result['summarizations']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
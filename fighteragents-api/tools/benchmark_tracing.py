@@ -0,0 +1,258 @@
+import asyncio
+import json
+import os
+import random
+import statistics
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableLambda
+from opik.integrations.langchain import OpikTracer
+
+from fighteragents.infrastructure.tracing import SampledOpikTracer, TraceExporter
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+class StandInCollector(ThreadingHTTPServer):
+    """Local HTTP server standing in for Opik. Counts the spans and traces it
+    receives, and answers after `delay_seconds` to play a slow collector."""
+
+    def __init__(self, delay_seconds: float) -> None:
+        super().__init__(("127.0.0.1", 0), _CollectorHandler)
+        self.delay_seconds = delay_seconds
+        self.spans = 0
+        self.traces = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self.server_address[1]}/api"
+
+    def reset(self) -> None:
+        with self.lock:
+            self.spans = self.traces = self.requests = 0
+
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    server: StandInCollector
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.spans += len(payload.get("spans", []))
+            self.server.traces += len(payload.get("traces", []))
+
+        time.sleep(self.server.delay_seconds)
+        self.send_response(204)
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def build_turn(nb_steps: int, payload_chars: int, error_rate: float):
+    """Builds a runnable shaped like a conversation turn: a few graph nodes around a
+    prompt and a chat model, moving a conversation of `payload_chars` characters."""
+
+    def node(index: int):
+        def run(state: dict) -> dict:
+            if index == nb_steps - 1 and random.random() < error_rate:
+                raise RuntimeError("Simulated turn failure.")
+
+            return {**state, "step": index}
+
+        return RunnableLambda(run, name=f"node_{index}")
+
+    answer = "I trained every day for that fight."
+    model_turn = (
+        RunnableLambda(lambda state: {"conversation": state["conversation"]})
+        | ChatPromptTemplate.from_messages(
+            [("system", "You are a UFC fighter."), ("human", "{conversation}")]
+        )
+        | FakeListChatModel(responses=[answer])
+    )
+
+    turn = node(0)
+    for index in range(1, nb_steps):
+        turn = turn | node(index)
+    turn = turn | RunnableLambda(
+        lambda state: {**state, "answer": model_turn.invoke(state).content},
+        name="conversation_node",
+    )
+
+    return turn, {"conversation": "x" * payload_chars, "step": 0}
+
+
+async def run_turns(
+    turn, turn_input: dict, nb_turns: int, concurrency: int, make_callbacks
+) -> tuple[list[float], float, float]:
+    """Runs the turns, `concurrency` at a time.
+
+    Returns:
+        tuple[list[float], float, float]: The latency of each turn in ms, the wall
+            time and the CPU time of the whole run in seconds.
+    """
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def run_turn() -> None:
+        async with semaphore:
+            start_time = time.perf_counter()
+            try:
+                await turn.ainvoke(turn_input, config={"callbacks": make_callbacks()})
+            except RuntimeError:
+                pass
+            latencies.append((time.perf_counter() - start_time) * 1000)
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    await asyncio.gather(*(run_turn() for _ in range(nb_turns)))
+
+    return latencies, time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+
+def report(
+    name: str,
+    latencies: list[float],
+    wall_seconds: float,
+    cpu_seconds: float,
+    baseline_mean: float,
+    collector: StandInCollector,
+    dropped: int | None = None,
+) -> None:
+    p95 = statistics.quantiles(latencies, n=20)[-1]
+    mean = statistics.mean(latencies)
+    print(
+        f"{name}: mean={mean:.2f} ms (+{mean - baseline_mean:.2f}) | p95={p95:.2f} ms | "
+        f"{len(latencies) / wall_seconds:.0f} turns/s | CPU={cpu_seconds:.2f} s | "
+        f"exported: {collector.traces} traces, {collector.spans} spans"
+        + (f" | dropped spans={dropped}" if dropped is not None else "")
+    )
+
+
+@click.command()
+@click.option("--nb-turns", type=int, default=500, help="Turns run per mode.")
+@click.option("--concurrency", type=int, default=16, help="Turns run at once.")
+@click.option("--nb-steps", type=int, default=6, help="Graph nodes per turn.")
+@click.option(
+    "--payload-chars",
+    type=int,
+    default=4000,
+    help="Size of the conversation moved through each span.",
+)
+@click.option(
+    "--error-rate", type=float, default=0.02, help="Share of the turns failing."
+)
+@click.option(
+    "--sample-rates",
+    default="1.0,0.1",
+    help="Comma-separated sampling rates of the sampled tracer.",
+)
+@click.option(
+    "--collector-delay-ms",
+    type=float,
+    default=50.0,
+    help="Latency of the stand-in collector per request.",
+)
+@click.option("--queue-size", type=int, default=10_000, help="Export queue size.")
+@click.option(
+    "--stock/--no-stock",
+    default=True,
+    help="Also measure the stock Opik tracer, which starts an Opik client per turn.",
+)
+@async_command
+async def main(
+    nb_turns: int,
+    concurrency: int,
+    nb_steps: int,
+    payload_chars: int,
+    error_rate: float,
+    sample_rates: str,
+    collector_delay_ms: float,
+    queue_size: int,
+    stock: bool,
+) -> None:
+    """Measures the overhead of tracing conversation turns to Opik.
+
+    Spans are exported to a local stand-in collector, so neither Comet nor Groq are
+    needed: turns are synthetic runnables with a fake chat model, spanning as many
+    runs as a workflow turn.
+    """
+
+    collector = StandInCollector(collector_delay_ms / 1000)
+    threading.Thread(target=collector.serve_forever, daemon=True).start()
+    os.environ["OPIK_URL_OVERRIDE"] = collector.url
+    os.environ["OPIK_WORKSPACE"] = "default"
+    os.environ["OPIK_TRACK_DISABLE"] = "false"
+
+    turn, turn_input = build_turn(nb_steps, payload_chars, error_rate)
+
+    latencies, wall_seconds, cpu_seconds = await run_turns(
+        turn, turn_input, nb_turns, concurrency, lambda: []
+    )
+    baseline_mean = statistics.mean(latencies)
+    report("No tracing", latencies, wall_seconds, cpu_seconds, baseline_mean, collector)
+
+    for sample_rate in [float(rate) for rate in sample_rates.split(",")]:
+        collector.reset()
+        exporter = TraceExporter.connect(max_queue_size=queue_size)
+        results = await run_turns(
+            turn,
+            turn_input,
+            nb_turns,
+            concurrency,
+            lambda: [
+                SampledOpikTracer(exporter, sampled=random.random() < sample_rate)
+            ],
+        )
+        await asyncio.to_thread(exporter.close, 60)
+        report(
+            f"Sampled tracer at {sample_rate:.0%}",
+            *results,
+            baseline_mean,
+            collector,
+            exporter.dropped,
+        )
+
+    # Last, as the Opik clients it leaves behind keep polling in their threads.
+    if stock:
+        collector.reset()
+        results = await run_turns(
+            turn, turn_input, nb_turns, concurrency, lambda: [OpikTracer()]
+        )
+        # Lets the Opik clients of the turns send their last batches.
+        await asyncio.sleep(3)
+        report("Stock Opik tracer", *results, baseline_mean, collector)
+
+    collector.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import asyncio
+import json
+import statistics
+import time
+from functools import wraps
+
+import click
+
+from fighteragents.infrastructure.streaming import StreamOptions, coalesce_chunks
+
+TOKEN = "word "
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+async def generate_tokens(num_tokens: int, token_interval_ms: float):
+    """Stands in for the LLM stream, emitting tokens at a steady rate."""
+
+    for _ in range(num_tokens):
+        await asyncio.sleep(token_interval_ms / 1000)
+        yield TOKEN
+
+
+async def stream_response(
+    options: StreamOptions, num_tokens: int, token_interval_ms: float
+) -> dict:
+    """Streams one answer the way `/ws/chat` does, encoding frames like Starlette."""
+
+    start_time = time.perf_counter()
+    first_frame_time = None
+    frames = 0
+    response_chunks = []
+
+    async for frame in coalesce_chunks(
+        generate_tokens(num_tokens, token_interval_ms), options
+    ):
+        json.dumps({"chunk": frame}, separators=(",", ":"), ensure_ascii=False).encode()
+        # Sending a frame yields to the event loop, as the ASGI send does.
+        await asyncio.sleep(0)
+        frames += 1
+        response_chunks.append(frame)
+        if first_frame_time is None:
+            first_frame_time = time.perf_counter()
+
+    assert "".join(response_chunks) == TOKEN * num_tokens
+
+    return {
+        "frames": frames,
+        "ttft_ms": (first_frame_time - start_time) * 1000,
+        "total_ms": (time.perf_counter() - start_time) * 1000,
+    }
+
+
+@click.command()
+@click.option(
+    "--concurrency", type=int, default=100, help="Number of answers streamed at once."
+)
+@click.option("--num-tokens", type=int, default=300, help="Tokens per answer.")
+@click.option(
+    "--token-interval-ms",
+    type=float,
+    default=2.0,
+    help="Delay between two tokens of an answer.",
+)
+@click.option(
+    "--frame-interval-ms",
+    type=int,
+    multiple=True,
+    default=[0, 30, 100],
+    help="Frame windows to compare. Can be repeated. 0 sends a frame per token.",
+)
+@async_command
+async def main(
+    concurrency: int,
+    num_tokens: int,
+    token_interval_ms: float,
+    frame_interval_ms: tuple[int, ...],
+) -> None:
+    """Compares websocket frame rates, CPU and time to first token across frame windows.
+
+    The LLM stream is simulated, so only the streaming path of the API is measured.
+
+    Args:
+        concurrency: Number of answers streamed at once.
+        num_tokens: Tokens per answer.
+        token_interval_ms: Delay between two tokens of an answer.
+        frame_interval_ms: Frame windows to compare.
+    """
+
+    for interval_ms in frame_interval_ms:
+        options = StreamOptions(frame_interval_ms=interval_ms)
+
+        cpu_start_time = time.process_time()
+        start_time = time.perf_counter()
+        results = await asyncio.gather(
+            *[
+                stream_response(options, num_tokens, token_interval_ms)
+                for _ in range(concurrency)
+            ]
+        )
+        elapsed = time.perf_counter() - start_time
+        cpu_time = time.process_time() - cpu_start_time
+
+        frames = sum(result["frames"] for result in results)
+        print(
+            f"Window {interval_ms} ms: {frames / concurrency:.0f} frames/response | "
+            f"{frames / elapsed:.0f} frames/s | "
+            f"CPU {cpu_time / concurrency * 1000:.2f} ms/response | "
+            f"TTFT p50={statistics.median(r['ttft_ms'] for r in results):.1f} ms | "
+            f"total p50={statistics.median(r['total_ms'] for r in results):.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import asyncio
+from functools import wraps
+
+import click
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from fighteragents.application.conversation_service.checkpoint_retention import (
+    CheckpointRetention,
+)
+from fighteragents.config import settings
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+@click.command()
+@click.option(
+    "--keep-last",
+    type=click.IntRange(min=1),
+    default=settings.CHECKPOINT_RETENTION_KEEP_LAST,
+    help="Number of most recent checkpoints kept per conversation thread.",
+)
+@click.option(
+    "--idle-ttl-seconds",
+    type=click.IntRange(min=0),
+    default=settings.CHECKPOINT_RETENTION_IDLE_TTL_SECONDS,
+    help="Delete conversation threads idle for longer. 0 keeps them forever.",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    default=False,
+    help="Only report what would be deleted.",
+)
+@async_command
+async def main(keep_last: int, idle_ttl_seconds: int, dry_run: bool) -> None:
+    """CLI command to delete old conversation checkpoints and writes.
+
+    Args:
+        keep_last: Number of most recent checkpoints kept per conversation thread.
+        idle_ttl_seconds: Delete conversation threads idle for longer.
+        dry_run: Only report what would be deleted.
+    """
+
+    client = AsyncIOMotorClient(settings.MONGO_URI, appname="fighteragents")
+    try:
+        retention = CheckpointRetention(
+            client[settings.MONGO_DB_NAME],
+            keep_last=keep_last,
+            idle_ttl_seconds=idle_ttl_seconds,
+        )
+        report = await retention.run(dry_run=dry_run)
+    finally:
+        client.close()
+
+    print(report.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,15 +14,23 @@ from fighteragents.domain.ufcfighter import UFCFighterExtract
     default=settings.EXTRACTION_METADATA_FILE_PATH,
     help="Path to the ufcfighters extraction metadata JSON file.",
 )
-def main(metadata_file: Path) -> None:
+@click.option(
+    "--summarize-chunks/--no-summarize-chunks",
+    default=settings.RAG_PRECOMPUTED_CONTEXT_SUMMARIES,
+    help="Precompute and store a summary of each chunk for the precomputed context summaries mode.",
+)
+def main(metadata_file: Path, summarize_chunks: bool) -> None:
     """CLI command to create long-term memory for ufcfighters.
 
     Args:
         metadata_file: Path to the ufcfighters extraction metadata JSON file.
+        summarize_chunks: Whether to store a summary of each chunk.
     """
     ufcfighters = UFCFighterExtract.from_json(metadata_file)
 
-    long_term_memory_creator = LongTermMemoryCreator.build_from_settings()
+    long_term_memory_creator = LongTermMemoryCreator.build_from_settings(
+        summarize_chunks=summarize_chunks
+    )
     long_term_memory_creator(ufcfighters)
 
 
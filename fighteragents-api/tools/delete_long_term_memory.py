@@ -3,6 +3,7 @@ from loguru import logger
 from pymongo import MongoClient
 from pymongo.database import Database
 
+from fighteragents.application.rag.cache import mark_ingestion
 from fighteragents.config import settings
 
 
@@ -42,6 +43,8 @@ def main(collection_name: str, mongo_uri: str, db_name: str) -> None:
     # Delete collection if it exists
     if collection_name in db.list_collection_names():
         db.drop_collection(collection_name)
+        # Lets the running APIs drop the retrieval results cached from it.
+        mark_ingestion(db, collection_name)
         logger.info(f"Successfully deleted '{collection_name}' collection.")
     else:
         logger.info(f"'{collection_name}' collection does not exist.")
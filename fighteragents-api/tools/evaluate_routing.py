@@ -0,0 +1,55 @@
+import asyncio
+from functools import wraps
+from pathlib import Path
+
+import click
+
+from fighteragents.application.evaluation import evaluate_routing
+from fighteragents.config import settings
+
+
+def async_command(f):
+    """Decorator to run an async click command."""
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        return asyncio.run(f(*args, **kwargs))
+
+    return wrapper
+
+
+@click.command()
+@click.option(
+    "--data-path",
+    type=click.Path(exists=True, path_type=Path),
+    default=settings.EVALUATION_DATASET_FILE_PATH,
+    help="Path to the dataset file",
+)
+@click.option(
+    "--nb-samples", default=20, type=int, help="Number of samples to evaluate"
+)
+@click.option(
+    "--output",
+    type=click.File("w"),
+    default="-",
+    help="JSON file to write the report to. Defaults to stdout.",
+)
+@async_command
+async def main(data_path: Path, nb_samples: int, output) -> None:
+    """Compares the answers of GROQ_LLM_MODEL with the routed ones on a dataset.
+
+    Reports the latency and cost saved by model routing, against the answer relevance
+    delta.
+
+    Args:
+        data_path: Path to the dataset file
+        nb_samples: Number of samples to evaluate
+        output: File to write the report to
+    """
+
+    report = await evaluate_routing(data_path=data_path, nb_samples=nb_samples)
+    output.write(report.model_dump_json(indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import { getSessionId } from './session';
+
 class ApiService {
   constructor() {
     const isHttps = window.location.protocol === 'https:';
@@ -34,7 +36,8 @@ class ApiService {
     try {
       const data = await this.request('/chat', 'POST', {
         message,
-        ufcfighter_id: ufcfighter.id
+        ufcfighter_id: ufcfighter.id,
+        session_id: getSessionId()
       });
 
       return data.response;
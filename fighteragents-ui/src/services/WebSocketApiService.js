@@ -1,3 +1,5 @@
+import { getSessionId } from './session';
+
 class WebSocketApiService {
   constructor() {
     // Initialize connection-related properties
@@ -116,7 +118,8 @@ class WebSocketApiService {
 
       this.socket.send(JSON.stringify({
         message: message,
-        ufcfighter_id: ufcfighter.id
+        ufcfighter_id: ufcfighter.id,
+        session_id: getSessionId()
       }));
     } catch (error) {
       console.error('Error sending message via WebSocket:', error);
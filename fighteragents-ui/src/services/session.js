@@ -0,0 +1,21 @@
+const SESSION_STORAGE_KEY = 'fighteragents-session-id';
+
+function createSessionId() {
+  if (window.crypto && window.crypto.randomUUID) {
+    return window.crypto.randomUUID();
+  }
+
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
+// Each browser keeps its own conversation threads on the API.
+export function getSessionId() {
+  let sessionId = window.localStorage.getItem(SESSION_STORAGE_KEY);
+
+  if (!sessionId) {
+    sessionId = createSessionId();
+    window.localStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+  }
+
+  return sessionId;
+}